@@ -0,0 +1,97 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Data array decoding benchmark: time and peak memory to turn a received GetDataArraysResponse frame into a numpy
+array, per value type.
+
+"before" is the previous path: etpproto decoding (fastavro list, then pydantic validation of every value) followed
+by np.array(values). "after" is the current path: avro_arrays.decode_message followed by np.asarray(values).
+
+The default size is 1 GB of float64 values. The "before" path needs roughly 30 times the array size in memory
+(Python floats, list, validated list): use --size to stay within the available RAM, the figures scale linearly.
+
+Usage:
+    python benchmarks/bench_array_decoding.py [--size 1e9] [--types float64,int64] [--after-only]
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import numpy as np
+from etpproto.connection import ETPConnection
+from etpproto.messages import Message, MessageFlags
+
+from py_etp_client import DataArray, GetDataArraysResponse
+from py_etp_client.avro_arrays import decode_message, encode_message
+from py_etp_client.etp_requests import get_numpy_any_array
+
+
+def make_frame(array: np.ndarray) -> bytes:
+    body = GetDataArraysResponse(
+        dataArrays={"0": DataArray(dimensions=list(array.shape), data=get_numpy_any_array(array))}
+    )
+    msg = Message.get_object_message(body, msg_id=3, correlation_id=2, message_flags=MessageFlags.FINALPART)
+    assert msg is not None
+    frame = encode_message(msg.header, msg.body)
+    assert frame is not None
+    return frame
+
+
+def before(frame: bytes) -> np.ndarray:
+    msg = Message.decode_binary_message(frame, ETPConnection.generic_transition_table)
+    assert msg is not None
+    return np.array(msg.body.data_arrays["0"].data.item.values)
+
+
+def after(frame: bytes) -> np.ndarray:
+    msg = decode_message(frame)
+    assert msg is not None
+    return np.asarray(msg.body.data_arrays["0"].data.item.values)
+
+
+def measure(decode: Callable[[bytes], np.ndarray], frame: bytes) -> Tuple[float, float, np.ndarray]:
+    """Returns the time in seconds, the peak of allocated memory in MB (frame excluded) and the decoded array."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    res = decode(frame)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return elapsed, peak, res
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=float, default=1e9, help="Size of the array in bytes")
+    parser.add_argument("--types", type=str, default="float64,float32,int64,int32", help="Value types to decode")
+    parser.add_argument("--after-only", action="store_true", help="Only run the current path")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'type':<8} {'MB':>6} {'before':>10} {'after':>10} {'speedup':>8} {'peak before':>12} {'peak after':>11}")
+    for name in args.types.split(","):
+        dtype = np.dtype(name)
+        nb_values = int(args.size) // dtype.itemsize
+        if dtype.kind == "f":
+            array = rng.random(nb_values).astype(dtype)
+        else:
+            array = rng.integers(-(2**20), 2**20, nb_values, dtype=dtype)
+        frame = make_frame(array)
+        t_after, m_after, res_after = measure(after, frame)
+        np.testing.assert_array_equal(res_after, array)
+        del res_after
+        if args.after_only:
+            print(f"{name:<8} {array.nbytes / 1e6:6.0f} {'-':>10} {t_after:9.3f}s {'-':>8} {'-':>12} {m_after:9.0f}MB")
+            continue
+        t_before, m_before, res_before = measure(before, frame)
+        np.testing.assert_array_equal(res_before, array)
+        del res_before
+        print(
+            f"{name:<8} {array.nbytes / 1e6:6.0f} {t_before:9.3f}s {t_after:9.3f}s {t_before / t_after:7.1f}x"
+            f" {m_before:10.0f}MB {m_after:9.0f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
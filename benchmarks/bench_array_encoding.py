@@ -0,0 +1,94 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Data array encoding benchmark: time and peak memory to encode a PutDataArrays message, per value type.
+
+"before" is the previous path: the values converted with tolist() into a validated AnyArray, encoded by etpproto
+(fastavro). "after" is the current path: the values kept as a numpy array (get_numpy_any_array) and encoded by
+avro_arrays.encode_message. Both outputs are checked to be identical.
+
+Usage:
+    python benchmarks/bench_array_encoding.py [--values 10000000] [--runs 3]
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import etptypes.energistics.etp.v12.datatypes.message_header as mh
+import numpy as np
+from etpproto.messages import Message, MessageFlags
+
+from py_etp_client import DataArray, DataArrayIdentifier, PutDataArrays, PutDataArraysType
+from py_etp_client.avro_arrays import encode_message
+from py_etp_client.etp_requests import get_any_array, get_numpy_any_array
+
+URI = "eml:///dataspace('bench')/resqml20.obj_Grid2dRepresentation(3d5e9c36-4a1e-4b1a-9f0c-2f5d1a3c7e11)"
+
+
+def _message(array: np.ndarray, any_array: Callable) -> Message:
+    body = PutDataArrays(
+        dataArrays={
+            "0": PutDataArraysType(
+                uid=DataArrayIdentifier(uri=URI, pathInResource="/values"),
+                array=DataArray(dimensions=list(array.shape), data=any_array(array)),
+            )
+        }
+    )
+    msg = Message.get_object_message(body, msg_id=2, message_flags=MessageFlags.FINALPART)
+    assert msg is not None
+    return msg
+
+
+def before(array: np.ndarray) -> bytes:
+    return _message(array, get_any_array).encode_message()
+
+
+def after(array: np.ndarray) -> bytes:
+    msg = _message(array, get_numpy_any_array)
+    res = encode_message(msg.header, msg.body)
+    assert res is not None
+    return res
+
+
+def measure(encode: Callable[[np.ndarray], bytes], array: np.ndarray, runs: int) -> Tuple[float, float, bytes]:
+    """Returns the best time in seconds, the peak of allocated memory in MB and the encoded message."""
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        res = encode(array)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    res = encode(array)
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return best, peak, res
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--values", type=int, default=10_000_000, help="Number of values of the array")
+    parser.add_argument("--runs", type=int, default=3, help="Number of timed runs (the best one is reported)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    arrays = {
+        "float64": rng.random(args.values),
+        "float32": rng.random(args.values, dtype=np.float32),
+        "int64": rng.integers(-(2**40), 2**40, args.values, dtype=np.int64),
+        "int32": rng.integers(-(2**20), 2**20, args.values, dtype=np.int32),
+        "bool": rng.random(args.values) > 0.5,
+    }
+    print(f"{'type':<8} {'before':>10} {'after':>10} {'speedup':>8} {'peak before':>12} {'peak after':>11}")
+    for name, array in arrays.items():
+        t_before, m_before, res_before = measure(before, array, args.runs)
+        t_after, m_after, res_after = measure(after, array, args.runs)
+        assert res_before == res_after, f"{name}: encodings differ"
+        print(
+            f"{name:<8} {t_before:9.3f}s {t_after:9.3f}s {t_before / t_after:7.1f}x"
+            f" {m_before:10.0f}MB {m_after:9.0f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
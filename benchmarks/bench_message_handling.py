@@ -0,0 +1,127 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Receive-side benchmark: number of ETP messages handled per second by ETPSimpleClient.on_message.
+
+A session is a list of binary ETP frames as received from the server. It can be:
+- generated: a GetDataSubarrays download answered with many frames (default);
+- recorded from a real server with `record_listener`, then replayed with `--session`:
+
+    ```python
+    client.add_listener(EventType.ON_MESSAGE, record_listener("session.bin"))
+    ```
+
+The "before" figure is the previous behaviour of ETPSimpleClient.on_message: one asyncio.run() per message and
+a second decode of the frame by etpproto handle_bytes_generator. "after" is the current on_message: a single
+decode shared with the handlers, run on the client long-lived handler loop.
+
+Usage:
+    python benchmarks/bench_message_handling.py [--frames 5000] [--values 1000] [--session session.bin]
+"""
+import argparse
+import asyncio
+import struct
+import time
+from typing import Callable, List
+
+import numpy as np
+from etpproto.connection import ETPConnection
+from etpproto.messages import Message, MessageFlags
+
+from py_etp_client import DataArray, GetDataSubarraysResponse
+from py_etp_client.etp_requests import get_any_array
+from py_etp_client.etpsimpleclient import ETPSimpleClient, EventType
+
+
+def record_listener(path: str) -> Callable:
+    """Returns an ON_MESSAGE listener appending every received frame to `path` (4 bytes length prefix)."""
+
+    def _listener(event_type: EventType, **kwargs):
+        message = kwargs.get("message")
+        if event_type == EventType.ON_MESSAGE and message is not None:
+            with open(path, "ab") as f:
+                f.write(struct.pack("<I", len(message)))
+                f.write(message)
+
+    return _listener
+
+
+def load_session(path: str) -> List[bytes]:
+    frames = []
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        (size,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        frames.append(data[offset : offset + size])
+        offset += size
+    return frames
+
+
+def generate_session(nb_frames: int, nb_values: int) -> List[bytes]:
+    """Multipart GetDataSubarraysResponse answer to a single request (correlation id 2)."""
+    values = np.random.default_rng(0).random(nb_values)
+    body = GetDataSubarraysResponse(dataSubarrays={"0": DataArray(dimensions=[nb_values], data=get_any_array(values))})
+    frames = []
+    for i in range(nb_frames):
+        flags = MessageFlags.MULTIPART | (MessageFlags.FINALPART if i == nb_frames - 1 else MessageFlags.NONE)
+        msg = Message.get_object_message(body, msg_id=2 * i + 1, correlation_id=2, message_flags=flags)
+        assert msg is not None
+        frames.append(msg.encode_message())
+    return frames
+
+
+def _new_client() -> ETPSimpleClient:
+    client = ETPSimpleClient(url="ws://localhost:0")
+    client._init_connection()
+    assert client.spec is not None
+    client.spec.is_connected = True
+    return client
+
+
+def on_message_asyncio_run(client: ETPSimpleClient, message: bytes) -> None:
+    """Previous receive path: decode, then one asyncio.run() per message to drain the etpproto handlers, which
+    decode the frame again."""
+    recieved = Message.decode_binary_message(message, dict_map_pro_to_class=ETPConnection.generic_transition_table)
+    assert recieved is not None
+
+    async def handle_msg():
+        async for _ in client.spec.handle_bytes_generator(message):  # type: ignore
+            pass
+
+    asyncio.run(handle_msg())
+
+
+def bench(name: str, frames: List[bytes], handle: Callable[[bytes], None]) -> float:
+    t0 = time.perf_counter()
+    for frame in frames:
+        handle(frame)
+    elapsed = time.perf_counter() - t0
+    rate = len(frames) / elapsed
+    print(f"{name:<28} {len(frames):>7} msgs in {elapsed:7.3f}s -> {rate:10.1f} msg/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=5000, help="Number of generated frames")
+    parser.add_argument("--values", type=int, default=1000, help="Number of doubles per generated frame")
+    parser.add_argument("--session", type=str, default=None, help="Recorded session file to replay")
+    args = parser.parse_args()
+
+    frames = load_session(args.session) if args.session else generate_session(args.frames, args.values)
+    print(f"Session: {len(frames)} frames, {sum(len(f) for f in frames) / 1e6:.1f} MB")
+
+    client = _new_client()
+    before = bench("before (asyncio.run)", frames, lambda f: on_message_asyncio_run(client, f))
+
+    client = _new_client()
+    after = bench("after (on_message)", frames, lambda f: client.on_message(None, f))
+    client._close_handler_loop()
+
+    print(f"Speedup: x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    main()
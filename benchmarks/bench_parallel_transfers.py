@@ -0,0 +1,67 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Chunked transfer benchmark: get_data_array_safe and put_data_array_safe with 1 subarray request in flight at a
+time versus several, against a local in-memory store answering after a simulated network latency (requires the `async` extra for the
+websockets module).
+
+Usage:
+    python benchmarks/bench_parallel_transfers.py [--latency 0.02] [--chunks 64] [--chunk-size 800000]
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from py_etp_client.etpclient import ETPClient
+from tests.fake_etp_server import FakeETPStore, serve_store
+
+URI = "eml:///dataspace('bench')"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated round trip time in seconds")
+    parser.add_argument("--chunks", type=int, default=64, help="Number of subarrays")
+    parser.add_argument(
+        "--chunk-size", type=int, default=800_000, help="Size of a subarray in bytes (below the message size limit)"
+    )
+    parser.add_argument("--parallel", type=str, default="1,2,4,8,16", help="max_parallel values to compare")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    row = 1000
+    rows_per_chunk = max(1, args.chunk_size // (8 * row))
+    values = np.random.default_rng(0).random((rows_per_chunk * args.chunks, row))
+    store = FakeETPStore()
+    store.arrays[(URI, "/values")] = values
+    server, url = serve_store(store, latency=args.latency)
+    client = ETPClient(url=url)
+    try:
+        assert client.start(timeout=5)
+        print(f"{values.nbytes / 1e6:.0f} MB in {args.chunks} subarrays, latency {args.latency * 1000:.0f} ms")
+        for max_parallel in [int(p) for p in args.parallel.split(",")]:
+            t0 = time.perf_counter()
+            array = client.get_data_array_safe(
+                URI, "/values", max_subarray_size=rows_per_chunk * row * 8, max_parallel=max_parallel
+            )
+            elapsed = time.perf_counter() - t0
+            np.testing.assert_array_equal(array, values)
+            print(f"get max_parallel={max_parallel:<3} {elapsed:7.3f}s  {values.nbytes / 1e6 / elapsed:8.1f} MB/s")
+        for max_parallel in [int(p) for p in args.parallel.split(",")]:
+            t0 = time.perf_counter()
+            res = client.put_data_array_safe(
+                URI, "/uploaded", values, max_subarray_size=rows_per_chunk * row * 8, max_parallel=max_parallel
+            )
+            elapsed = time.perf_counter() - t0
+            assert res == {URI: True}
+            np.testing.assert_array_equal(store.arrays[(URI, "/uploaded")], values)
+            print(f"put max_parallel={max_parallel:<3} {elapsed:7.3f}s  {values.nbytes / 1e6 / elapsed:8.1f} MB/s")
+    finally:
+        server.shutdown()
+        client.stop()
+
+
+if __name__ == "__main__":
+    main()
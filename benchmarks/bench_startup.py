@@ -0,0 +1,82 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Startup benchmark: time from ETPSimpleClient.start() to an established ETP session, against a local in-memory store
+served on a real websocket (requires the `async` extra for the websockets module).
+
+The "before" figure reproduces the previous startup: start() slept 1 second after launching the websocket thread,
+then start_client/start_and_wait_connected polled is_connected() every 250 ms. "after" is the current start(),
+which returns as soon as the OpenSession answer is processed.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--url ws://host:port]
+"""
+import argparse
+import logging
+import statistics
+import threading
+import time
+from typing import Callable, List
+
+from py_etp_client.etpsimpleclient import ETPSimpleClient
+from tests.fake_etp_server import FakeETPStore, serve_store
+
+
+def legacy_start(client: ETPSimpleClient, timeout: float = 5) -> bool:
+    """Previous startup sequence: fixed 1 second sleep, then polling every 250 ms."""
+    client.ws = None
+    client.closed = False
+    client.stop_event = threading.Event()
+    client.pending_requests.clear()
+    client._init_connection()
+    client.thread = threading.Thread(target=client._run_websocket, daemon=True)
+    client.thread.start()
+    time.sleep(1)
+    start_time = time.perf_counter()
+    while not client.is_connected() and time.perf_counter() - start_time < timeout:
+        time.sleep(0.25)
+    return client.is_connected()
+
+
+def current_start(client: ETPSimpleClient, timeout: float = 5) -> bool:
+    return client.start(timeout=timeout)
+
+
+def measure(url: str, start: Callable[[ETPSimpleClient], bool], runs: int) -> List[float]:
+    durations: List[float] = []
+    for _ in range(runs):
+        client = ETPSimpleClient(url=url, max_reconnect_attempts=0)
+        t_start = time.perf_counter()
+        connected = start(client)
+        durations.append(time.perf_counter() - t_start)
+        assert connected, f"Could not connect to {url}"
+        client.stop()
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--url", type=str, default=None, help="ETP server to connect to (default: local store)")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = serve_store(FakeETPStore())
+
+    try:
+        for name, start in (("before", legacy_start), ("after", current_start)):
+            durations = measure(url, start, args.runs)
+            print(
+                f"{name:>6}: median {statistics.median(durations) * 1000:8.1f} ms"
+                f"  min {min(durations) * 1000:8.1f} ms  max {max(durations) * 1000:8.1f} ms  ({args.runs} runs)"
+            )
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,6 @@ import logging
 import os
 import traceback
 from typing import Optional, Union
-from time import sleep, perf_counter
 
 import numpy as np
 
@@ -64,13 +63,8 @@ def start_client(config: Optional[Union[ETPConfig, ServerConfig]] = None, verify
             spec=ETPConnection(connection_type=ConnectionType.CLIENT),
             config=config,
         )
-    client.start()
-
-    start_time = perf_counter()
-    while not client.is_connected() and perf_counter() - start_time < 5:
-        sleep(0.25)
-    if not client.is_connected():
-        logging.info("The ETP session could not be established in 5 seconds.")
+    if not client.start(timeout=5):
+        logging.info("The ETP session could not be established.")
         raise Exception(f"Connexion not established with {config.url}")
     else:
         logging.info("Now connected to ETP Server")
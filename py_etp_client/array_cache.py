@@ -0,0 +1,130 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Opt-in cache of the data array chunks received by an ETPClient (see ETPClient.array_cache).
+
+The chunks are kept by (uri, path_in_resource, start, count, storeLastWrite), up to a total size in bytes, the least
+recently used ones being evicted first. A whole array is kept with start and count None.
+
+The storeLastWrite of an array is the last one seen in its metadata (get_data_array_metadata, get_data_array_safe):
+when it changes, the chunks of the previous version are dropped. The writes of the client itself (put_data_array,
+put_data_subarray, ...) invalidate the chunks of the array at once, including those of the requests still in
+flight.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# (uri, path_in_resource)
+ArrayIdentifier = Tuple[str, str]
+# (uri, path_in_resource, start, count, storeLastWrite)
+ChunkKey = Tuple[str, str, Optional[Tuple[int, ...]], Optional[Tuple[int, ...]], Optional[int]]
+
+
+@dataclass(frozen=True)
+class CacheTicket:
+    """A chunk requested to the server: its key, and the version of the array when it was requested."""
+
+    key: ChunkKey
+    generation: int
+
+
+class ArrayChunkCache:
+    """Byte-bounded LRU cache of data array chunks, safe to use from several threads.
+
+    Args:
+        max_bytes (int): maximum total size of the chunks kept. A chunk larger than that is never kept.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._chunks: "OrderedDict[ChunkKey, np.ndarray]" = OrderedDict()
+        self._keys: Dict[ArrayIdentifier, Set[ChunkKey]] = {}
+        self._store_last_write: Dict[ArrayIdentifier, Optional[int]] = {}
+        self._generations: Dict[ArrayIdentifier, int] = {}
+        self._lock = threading.Lock()
+
+    def ticket(
+        self,
+        uri: str,
+        path_in_resource: str,
+        start: Optional[Sequence[int]] = None,
+        count: Optional[Sequence[int]] = None,
+    ) -> CacheTicket:
+        """Returns the ticket of a chunk (the whole array if start and count are None), to get or put it."""
+        identifier = (uri, path_in_resource)
+        with self._lock:
+            key = (
+                uri,
+                path_in_resource,
+                None if start is None else tuple(int(s) for s in start),
+                None if count is None else tuple(int(c) for c in count),
+                self._store_last_write.get(identifier),
+            )
+            return CacheTicket(key, self._generations.get(identifier, 0))
+
+    def get(self, ticket: CacheTicket) -> Optional[np.ndarray]:
+        """Returns the values of a chunk (read only, copy them to modify them), or None if it is not kept."""
+        with self._lock:
+            array = self._chunks.get(ticket.key)
+            if array is None:
+                self.misses += 1
+                return None
+            self._chunks.move_to_end(ticket.key)
+            self.hits += 1
+            return array
+
+    def put(self, ticket: CacheTicket, array: np.ndarray):
+        """Keeps a copy of the values of a chunk, unless the array was written since the ticket was issued."""
+        if array.nbytes > self.max_bytes:
+            return
+        array = np.array(array, copy=True)
+        array.setflags(write=False)
+        identifier = ticket.key[:2]
+        with self._lock:
+            if self._generations.get(identifier, 0) != ticket.generation:
+                return
+            previous = self._chunks.pop(ticket.key, None)
+            if previous is not None:
+                self.nbytes -= previous.nbytes
+            self._chunks[ticket.key] = array
+            self._keys.setdefault(identifier, set()).add(ticket.key)
+            self.nbytes += array.nbytes
+            while self.nbytes > self.max_bytes:
+                key, evicted = self._chunks.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                self._keys[key[:2]].discard(key)
+
+    def invalidate(self, uri: str, path_in_resource: str):
+        """Drops the chunks of an array, e.g. because it is being written."""
+        identifier = (uri, path_in_resource)
+        with self._lock:
+            self._generations[identifier] = self._generations.get(identifier, 0) + 1
+            self._store_last_write.pop(identifier, None)
+            self._drop(identifier)
+
+    def set_store_last_write(self, uri: str, path_in_resource: str, store_last_write: Optional[int]):
+        """Records the storeLastWrite of an array read in its metadata. The chunks of another version are dropped."""
+        identifier = (uri, path_in_resource)
+        with self._lock:
+            if identifier in self._store_last_write and self._store_last_write[identifier] == store_last_write:
+                return
+            self._store_last_write[identifier] = store_last_write
+            self._drop(identifier)
+
+    def clear(self):
+        """Drops all the chunks."""
+        with self._lock:
+            self._chunks.clear()
+            self._keys.clear()
+            self.nbytes = 0
+
+    def _drop(self, identifier: ArrayIdentifier):
+        for key in self._keys.pop(identifier, set()):
+            self.nbytes -= self._chunks.pop(key).nbytes
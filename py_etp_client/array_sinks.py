@@ -0,0 +1,86 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Destinations of a data array written chunk by chunk as it is downloaded.
+
+A sink is anything that supports numpy slice assignment: a numpy array (typically a np.memmap), an h5py.Dataset,
+or a file path that open_array_sink turns into one of those. Each chunk received is written to its slice of the sink
+and dropped, so an array larger than the memory can be downloaded.
+"""
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from py_etp_client.utils import h5py
+
+# Extensions of the file paths written as HDF5 files (any other path is written as a .npy file)
+HDF5_EXTENSIONS = (".h5", ".hdf5")
+
+ArraySink = Union[np.ndarray, "os.PathLike[str]", str, Any]
+
+
+@contextmanager
+def open_array_sink(
+    sink: ArraySink,
+    dimensions: Sequence[int],
+    dtype: np.dtype,
+    dataset_name: Optional[str] = None,
+    resume: bool = False,
+) -> Iterator[Any]:
+    """Opens the destination of an array of the given dimensions and type.
+
+    Args:
+        sink (ArraySink): a numpy array (e.g. a np.memmap) or an h5py.Dataset with these dimensions, or a file path.
+            A path ending with .h5 or .hdf5 is opened (or created) as an HDF5 file, the array being written in its
+            dataset `dataset_name` (created if needed). Any other path is created as a .npy file, which can be read
+            back with np.load(path, mmap_mode="r").
+        dimensions (Sequence[int]): dimensions of the array
+        dtype (np.dtype): type of the values, for the sinks created here
+        dataset_name (Optional[str], optional): HDF5 dataset of a .h5 path, usually the path_in_resource of the
+            array. Defaults to None.
+        resume (bool, optional): keep the values of an existing .npy file with these dimensions and type, to resume
+            an interrupted download (HDF5 datasets are always kept). Defaults to False.
+
+    Yields:
+        Any: an object supporting numpy slice assignment. The files opened here are flushed and closed on exit.
+
+    Raises:
+        ValueError: if the sink does not have the dimensions of the array
+        ImportError: if an HDF5 sink is used without h5py installed
+    """
+    shape = tuple(int(d) for d in dimensions)
+    if isinstance(sink, (str, os.PathLike)):
+        path = os.fspath(sink)
+        if path.lower().endswith(HDF5_EXTENSIONS):
+            if h5py is None:
+                raise ImportError("h5py module is not available: install py-etp-client[hdf5] to write HDF5 files.")
+            if not dataset_name:
+                raise ValueError("A dataset name is required to write an array in an HDF5 file")
+            with h5py.File(path, "a") as f:
+                yield f.require_dataset(dataset_name, shape=shape, dtype=dtype)
+        else:
+            array = None
+            if resume and os.path.exists(path):
+                try:
+                    array = np.load(path, mmap_mode="r+")
+                except (ValueError, OSError):
+                    array = None
+                if array is not None and (array.shape != shape or array.dtype != dtype):
+                    array = None
+            if array is None:
+                array = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+            try:
+                yield array
+            finally:
+                array.flush()
+        return
+
+    if tuple(sink.shape) != shape:
+        raise ValueError(f"The sink has shape {sink.shape}, the data array has dimensions {list(shape)}")
+    try:
+        yield sink
+    finally:
+        if isinstance(sink, np.memmap):
+            sink.flush()
@@ -0,0 +1,499 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Async ETP Client Module
+
+This module provides AsyncETPClient, the asyncio counterpart of ETPClient. It offers the same
+high-level operations (dataspaces, discovery, data objects, data arrays, transactions) as
+coroutines, sharing one ETP session between as many concurrent requests as needed.
+
+Example Usage:
+    ```python
+    import asyncio
+    from py_etp_client.asyncetpclient import AsyncETPClient
+
+    async def main(uris):
+        async with AsyncETPClient(url="wss://etp-server.com") as client:
+            objects = await asyncio.gather(*[client.get_data_object(uri) for uri in uris])
+
+    asyncio.run(main([...]))
+    ```
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from energyml.utils.constants import epoch
+from energyml.utils.uri import Uri as ETPUri
+
+from py_etp_client import (
+    AnyArrayType,
+    AnyLogicalArrayType,
+    CommitTransaction,
+    CommitTransactionResponse,
+    DataArrayMetadata,
+    Dataspace,
+    DeleteDataObjects,
+    DeleteDataObjectsResponse,
+    DeleteDataspaces,
+    DeleteDataspacesResponse,
+    GetDataObjects,
+    GetDataObjectsResponse,
+    GetDataspacesResponse,
+    GetResourcesResponse,
+    GetSupportedTypesResponse,
+    Ping,
+    ProtocolException,
+    PutDataObjects,
+    PutDataObjectsResponse,
+    PutDataspacesResponse,
+    PutDataSubarraysResponse,
+    Resource,
+    RollbackTransaction,
+    RollbackTransactionResponse,
+    StartTransaction,
+    StartTransactionResponse,
+    Uuid,
+)
+from py_etp_client.asyncetpsimpleclient import AsyncETPSimpleClient
+from py_etp_client.etp_requests import (
+    create_data_array_metadata,
+    create_data_object,
+    get_data_array_metadata,
+    get_data_arrays,
+    get_data_subarrays,
+    get_dataspaces,
+    get_resources,
+    get_supported_types,
+    put_data_arrays,
+    put_data_subarrays,
+    put_dataspace,
+    put_uninitialized_data_arrays_batch,
+    read_data_array,
+    read_data_array_metadata,
+    read_data_subarray,
+    read_energyml_obj,
+    read_put_data_arrays,
+    read_put_data_subarray,
+    read_put_uninitialized_data_array,
+)
+from py_etp_client.utils import (
+    T_UriSingleOrGrouped,
+    get_valid_uri_str,
+    reshape_uris_as_str_dict,
+    reshape_uris_as_str_list,
+)
+
+
+class AsyncETPClient(AsyncETPSimpleClient):
+    """
+    High-level asyncio ETP client. Every method is a coroutine with the same parameters and
+    results as its ETPClient counterpart.
+
+    See ETPClient documentation for the description of each operation.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.active_transaction = None
+
+    #    ______
+    #   / ____/___  ________
+    #  / /   / __ \/ ___/ _ \
+    # / /___/ /_/ / /  /  __/
+    # \____/\____/_/   \___/
+
+    async def ping(self, timeout: float = 5) -> bool:
+        """Ping the server.
+
+        Returns:
+            bool: True if the server is reachable
+        """
+        ping_msg_list = await self.send_and_wait(Ping(currentDateTime=epoch()), timeout=timeout)
+        for ping_msg in ping_msg_list:
+            if isinstance(ping_msg.body, ProtocolException):
+                return False
+        return True
+
+    #     ____        __
+    #    / __ \____ _/ /_____ __________  ____ _________
+    #   / / / / __ `/ __/ __ `/ ___/ __ \/ __ `/ ___/ _ \
+    #  / /_/ / /_/ / /_/ /_/ (__  ) /_/ / /_/ / /__/  __/
+    # /_____/\__,_/\__/\__,_/____/ .___/\__,_/\___/\___/
+    #                           /_/
+
+    async def get_dataspaces(self, timeout: float = 5) -> Union[List[Dataspace], ProtocolException]:
+        """Get dataspaces list."""
+        gdr_msg_list = await self.send_and_wait(get_dataspaces(), timeout=timeout)
+
+        datasapaces = []
+        for gdr_msg in gdr_msg_list:
+            if isinstance(gdr_msg.body, GetDataspacesResponse):
+                datasapaces.extend(gdr_msg.body.dataspaces)
+            elif isinstance(gdr_msg.body, ProtocolException):
+                return gdr_msg.body
+        return datasapaces
+
+    async def put_dataspace(
+        self, dataspace_names: T_UriSingleOrGrouped, custom_data=None, timeout: float = 5
+    ) -> Union[Dict[str, Any], ProtocolException]:
+        """Put dataspaces."""
+        pdm_msg_list = await self.send_and_wait(
+            put_dataspace(dataspace_names=dataspace_names, custom_data=custom_data), timeout=timeout
+        )
+        res = {}
+        for pdm in pdm_msg_list:
+            if isinstance(pdm.body, PutDataspacesResponse):
+                res.update(pdm.body.success)
+            elif isinstance(pdm.body, ProtocolException):
+                return pdm.body
+            else:
+                logging.error("Error: %s", pdm.body)
+        return res
+
+    async def delete_dataspace(
+        self, dataspace_names: T_UriSingleOrGrouped, timeout: float = 5
+    ) -> Union[Dict[str, Any], ProtocolException]:
+        """Delete dataspaces."""
+        dataspace_names = reshape_uris_as_str_dict(dataspace_names)
+
+        ddm_msg_list = await self.send_and_wait(DeleteDataspaces(uris=dataspace_names), timeout=timeout)
+        res = {}
+        for ddm in ddm_msg_list:
+            if isinstance(ddm.body, DeleteDataspacesResponse):
+                res.update(ddm.body.success)
+            elif isinstance(ddm.body, ProtocolException):
+                return ddm.body
+            else:
+                logging.error("Error: %s", ddm.body)
+        return res
+
+    #     ____  _
+    #    / __ \(_)_____________ _   _____  _______  __
+    #   / / / / / ___/ ___/ __ \ | / / _ \/ ___/ / / /
+    #  / /_/ / (__  ) /__/ /_/ / |/ /  __/ /  / /_/ /
+    # /_____/_/____/\___/\____/|___/\___/_/   \__, /
+    #                                        /____/
+
+    async def get_resources(
+        self,
+        uri: Optional[Union[str, ETPUri]] = None,
+        depth: int = 1,
+        scope: str = "self",
+        types_filter: Optional[List[str]] = None,
+        include_edges: bool = False,
+        timeout: float = 10,
+    ) -> Union[List[Resource], ProtocolException]:
+        """Get resources from the server."""
+        gr_msg_list = await self.send_and_wait(
+            get_resources(get_valid_uri_str(uri), depth, scope, types_filter, include_edges=include_edges),
+            timeout=timeout,
+        )
+
+        resources = []
+        for gr in gr_msg_list:
+            if isinstance(gr.body, GetResourcesResponse):
+                resources.extend(gr.body.resources)
+            elif isinstance(gr.body, ProtocolException):
+                return gr.body
+            else:
+                logging.error("Error: %s", gr.body)
+        return resources
+
+    #    _____ __
+    #   / ___// /_____  ________
+    #   \__ \/ __/ __ \/ ___/ _ \
+    #  ___/ / /_/ /_/ / /  /  __/
+    # /____/\__/\____/_/   \___/
+
+    async def get_data_object(
+        self, uris: T_UriSingleOrGrouped, format_: str = "xml", timeout: float = 5
+    ) -> Optional[Union[Dict[str, str], List[str], str, ProtocolException]]:
+        """Get data object from the server.
+
+        Returns:
+            Union[Dict[str, str], List[str], str]: Returns a dict of uris and data if uris is a dict, a list of data if uris is a list, or a single data if uris is a string
+        """
+        uris_dict = reshape_uris_as_str_dict(uris)
+
+        gdor_msg_list = await self.send_and_wait(GetDataObjects(uris=uris_dict, format=format_), timeout=timeout)
+        data_obj = {}
+
+        for gdor in gdor_msg_list:
+            if isinstance(gdor.body, GetDataObjectsResponse):
+                data_obj.update({k: v.data for k, v in gdor.body.data_objects.items()})
+            elif isinstance(gdor.body, ProtocolException):
+                return gdor.body
+
+        res = None
+        if len(data_obj) > 0:
+            if isinstance(uris, str):
+                res = data_obj["0"]
+            elif isinstance(uris, dict):
+                res = {k: data_obj[k] for k in uris.keys()}
+            elif isinstance(uris, list):
+                res = [data_obj[str(i)] for i in range(len(uris))]
+
+        return res
+
+    async def get_data_object_as_obj(
+        self, uris: T_UriSingleOrGrouped, format_: str = "xml", timeout: float = 5
+    ) -> Union[Dict[str, Any], List[Any], Any, ProtocolException]:
+        """Get data object as a deserialized object."""
+        objs = await self.get_data_object(uris=uris, format_=format_, timeout=timeout)
+
+        if isinstance(objs, str) or isinstance(objs, bytes):
+            return read_energyml_obj(objs, format_)
+        elif isinstance(objs, dict):
+            for k, v in objs.items():
+                objs[k] = read_energyml_obj(v, format_)
+        elif isinstance(objs, list):
+            for i, v in enumerate(objs):
+                objs[i] = read_energyml_obj(v, format_)
+        return objs
+
+    async def put_data_object_str(
+        self,
+        obj_content: Union[str, List[str]],
+        dataspace_name: Optional[Union[str, ETPUri]] = None,
+        format: str = "xml",
+        timeout: float = 5,
+    ) -> Dict[str, Any]:
+        """Put data object to the server from its xml or json representation."""
+        if isinstance(obj_content, dict):
+            obj_content = list(obj_content.values())  # type: ignore
+        elif not isinstance(obj_content, list):
+            obj_content = [obj_content]
+
+        do_dict = {}
+        for o in obj_content:
+            do_dict[str(len(do_dict))] = create_data_object(
+                obj_as_str=o, dataspace_name=get_valid_uri_str(dataspace_name), format=format
+            )
+
+        pdor_msg_list = await self.send_and_wait(PutDataObjects(dataObjects=do_dict), timeout=timeout)
+
+        res = {}
+        for pdor in pdor_msg_list:
+            if isinstance(pdor.body, PutDataObjectsResponse):
+                res.update(pdor.body.success)
+            else:
+                logging.error("Error: %s", pdor.body)
+        return res
+
+    async def put_data_object_obj(
+        self, obj: Union[Any, List[Any]], dataspace_name: str, format_: str = "xml", timeout: float = 5
+    ) -> Dict[str, Any]:
+        """Put energyml object(s) to the server."""
+        if isinstance(obj, dict):
+            obj = list(obj.values())  # type: ignore
+        elif not isinstance(obj, list):
+            obj = [obj]
+
+        do_dict = {}
+        for o in obj:
+            do_dict[str(len(do_dict))] = create_data_object(obj=o, dataspace_name=dataspace_name, format=format_)
+
+        pdor_msg_list = await self.send_and_wait(PutDataObjects(dataObjects=do_dict), timeout=timeout)
+
+        res = {}
+        for pdor in pdor_msg_list:
+            if isinstance(pdor.body, PutDataObjectsResponse):
+                res.update(pdor.body.success)
+            else:
+                logging.error("Error: %s", pdor.body)
+        return res
+
+    async def delete_data_object(self, uris: T_UriSingleOrGrouped, timeout: float = 5) -> Dict[str, Any]:
+        """Delete data object from the server."""
+        uris_dict = reshape_uris_as_str_dict(uris)
+
+        gdor_msg_list = await self.send_and_wait(DeleteDataObjects(uris=uris_dict), timeout=timeout)
+        res = {}
+        for gdor in gdor_msg_list:
+            if isinstance(gdor.body, DeleteDataObjectsResponse):
+                res.update(gdor.body.deleted_uris)
+            else:
+                logging.error("Error: %s", gdor.body)
+        return res
+
+    #     ____        __        ___
+    #    / __ \____ _/ /_____ _/   |  ______________ ___  __
+    #   / / / / __ `/ __/ __ `/ /| | / ___/ ___/ __ `/ / / /
+    #  / /_/ / /_/ / /_/ /_/ / ___ |/ /  / /  / /_/ / /_/ /
+    # /_____/\__,_/\__/\__,_/_/  |_/_/  /_/   \__,_/\__, /
+    #                                              /____/
+
+    async def get_data_array(
+        self, uri: Union[str, ETPUri], path_in_resource: str, timeout: float = 5, out: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        """Get an array from the server, reshaped in the correct dimension."""
+        gdar_msg_list = await self.send_and_wait(get_data_arrays(uri, path_in_resource), timeout=timeout)
+        return read_data_array(gdar_msg_list, out)
+
+    async def get_data_subarray(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        start: List[int],
+        count: List[int],
+        timeout: float = 5,
+        out: Optional[np.ndarray] = None,
+    ) -> Optional[np.ndarray]:
+        """Get a sub part of an array from the server. The result is a flat array !"""
+        gdar_msg_list = await self.send_and_wait(
+            get_data_subarrays(uri, path_in_resource, start, count), timeout=timeout
+        )
+        return read_data_subarray(gdar_msg_list, out)
+
+    async def get_data_array_metadata(
+        self, uri: Union[str, ETPUri], path_in_resource: str, timeout: float = 5
+    ) -> Dict[str, DataArrayMetadata]:
+        """Get metadata of an array from the server."""
+        gdar_msg_list = await self.send_and_wait(get_data_array_metadata(uri, path_in_resource), timeout=timeout)
+        return read_data_array_metadata(gdar_msg_list)
+
+    async def put_uninitialized_data_array(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        dimensions: List[int],
+        data_type: Union[str, AnyArrayType] = "float64",
+        logical_array_type: AnyLogicalArrayType = AnyLogicalArrayType.ARRAY_OF_FLOAT32_BE,
+        custom_data: Optional[Dict[str, Any]] = None,
+        preffered_subarray_dimensions: Optional[List[int]] = None,
+        timeout: float = 5,
+    ) -> bool:
+        """Put an uninitialized data array to the server."""
+        metadata = create_data_array_metadata(
+            dimensions, data_type, logical_array_type, custom_data, preffered_subarray_dimensions
+        )
+        pdar_msg_list = await self.send_and_wait(
+            put_uninitialized_data_arrays_batch([(get_valid_uri_str(uri), path_in_resource, metadata)]),
+            timeout=timeout,
+        )
+        return read_put_uninitialized_data_array(pdar_msg_list)
+
+    async def put_data_array(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        array: Union[np.ndarray, list],
+        dimensions: Union[List[int], Tuple[int, ...]],
+        timeout: float = 5,
+    ) -> Dict[str, bool]:
+        """Put a data array to the server."""
+        pdar_msg_list = await self.send_and_wait(
+            put_data_arrays(uri, path_in_resource, array, list(dimensions)), timeout=timeout
+        )
+        return read_put_data_arrays(pdar_msg_list)
+
+    async def put_data_subarray(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        array: Union[np.ndarray, list],
+        start: List[int],
+        count: List[int],
+        timeout: float = 5,
+    ) -> Optional[Union[PutDataSubarraysResponse, ProtocolException]]:
+        """Put a sub part of a data array to the server."""
+        psar_msg_list = await self.send_and_wait(
+            put_data_subarrays(uri, path_in_resource, array, start, count), timeout=timeout
+        )
+        return read_put_data_subarray(psar_msg_list)
+
+    #    _____                              __           __   ______
+    #   / ___/__  ______  ____  ____  _____/ /____  ____/ /  /_  __/_  ______  ___  _____
+    #   \__ \/ / / / __ \/ __ \/ __ \/ ___/ __/ _ \/ __  /    / / / / / / __ \/ _ \/ ___/
+    #  ___/ / /_/ / /_/ / /_/ / /_/ / /  / /_/  __/ /_/ /    / / / /_/ / /_/ /  __(__  )
+    # /____/\__,_/ .___/ .___/\____/_/   \__/\___/\__,_/    /_/  \__, / .___/\___/____/
+    #           /_/   /_/                                       /____/_/
+
+    async def get_supported_types(
+        self,
+        uri: Union[str, ETPUri],
+        count: bool = True,
+        return_empty_types: bool = True,
+        scope: str = "self",
+        timeout: float = 5,
+    ):
+        """Get supported types."""
+        gdar_msg_list = await self.send_and_wait(
+            get_supported_types(
+                uri=get_valid_uri_str(uri), count=count, return_empty_types=return_empty_types, scope=scope
+            ),
+            timeout=timeout,
+        )
+
+        supported_types = []
+        for gdar in gdar_msg_list:
+            if isinstance(gdar.body, GetSupportedTypesResponse):
+                supported_types.extend(gdar.body.supported_types)
+            else:
+                logging.error("Error: %s", gdar.body)
+        return supported_types
+
+    #   ______                                 __  _
+    #  /_  __/________ _____  _________ ______/ /_(_)___  ____
+    #   / / / ___/ __ `/ __ \/ ___/ __ `/ ___/ __/ / __ \/ __ \
+    #  / / / /  / /_/ / / / (__  ) /_/ / /__/ /_/ / /_/ / / / /
+    # /_/ /_/   \__,_/_/ /_/____/\__,_/\___/\__/_/\____/_/ /_/
+
+    async def start_transaction(
+        self, dataspace: T_UriSingleOrGrouped, readonly: bool = False, msg: str = "", timeout: float = 5
+    ) -> Optional[Uuid]:
+        """Start a transaction."""
+        if self.active_transaction is not None:
+            logging.warning("A transaction is already active, please commit it before starting a new one")
+            return self.active_transaction
+
+        str_msg_list = await self.send_and_wait(
+            StartTransaction(
+                dataspaceUris=reshape_uris_as_str_list(dataspace),  # type: ignore
+                message=msg,
+                readOnly=readonly,
+            ),
+            timeout=timeout,
+        )
+        for str_msg in str_msg_list:
+            if isinstance(str_msg.body, StartTransactionResponse) and str_msg.body.successful:
+                self.active_transaction = str_msg.body.transaction_uuid
+                return self.active_transaction
+            else:
+                logging.error("Error: %s", str_msg.body)
+        return None
+
+    async def rollback_transaction(self, timeout: float = 5) -> bool:
+        """Rollback the active transaction."""
+        if self.active_transaction is None:
+            logging.warning("No active transaction to rollback")
+            return False
+
+        rtr_msg_list = await self.send_and_wait(
+            RollbackTransaction(transactionUuid=self.active_transaction), timeout=timeout
+        )
+        for rtr_msg in rtr_msg_list:
+            if isinstance(rtr_msg.body, RollbackTransactionResponse) and rtr_msg.body.successful:
+                self.active_transaction = None
+                return True
+            else:
+                logging.error("Error: %s", rtr_msg.body)
+        return False
+
+    async def commit_transaction(self, timeout: float = 5) -> bool:
+        """Commit the active transaction."""
+        if self.active_transaction is None:
+            logging.warning("No active transaction to commit")
+            return False
+
+        ctr_msg_list = await self.send_and_wait(
+            CommitTransaction(transactionUuid=self.active_transaction), timeout=timeout
+        )
+        for ctr_msg in ctr_msg_list:
+            if isinstance(ctr_msg.body, CommitTransactionResponse) and ctr_msg.body.successful:
+                self.active_transaction = None
+                return True
+            else:
+                logging.error("Error: %s", ctr_msg.body)
+        return False
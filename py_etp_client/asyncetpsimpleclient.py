@@ -0,0 +1,309 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Async ETP Simple Client Module
+
+This module provides AsyncETPSimpleClient, an asyncio based WebSocket client for ETP
+(Energistics Transfer Protocol) connections. It is the asyncio counterpart of ETPSimpleClient:
+no thread is used neither for the connection nor for the requests waiting for an answer.
+Each pending request is an asyncio.Future resolved by a single reader task, so thousands of
+requests can be in flight on the same session.
+
+The transport relies on the optional `websockets` package:
+    pip install py-etp-client[async]
+
+Example:
+    ```python
+    import asyncio
+    from py_etp_client.asyncetpsimpleclient import AsyncETPSimpleClient
+    from py_etp_client import Ping
+    from energyml.utils.constants import epoch
+
+    async def main():
+        async with AsyncETPSimpleClient(url="wss://example.com") as client:
+            answers = await asyncio.gather(
+                *[client.send_and_wait(Ping(currentDateTime=epoch())) for _ in range(1000)]
+            )
+
+    asyncio.run(main())
+    ```
+"""
+import asyncio
+import logging
+import ssl
+import time
+from typing import Any, Callable, List, Optional, Union
+
+from etpproto.connection import ETPConnection
+from etpproto.messages import Message
+from etptypes.energistics.etp.v12.protocol.core.request_session import (
+    RequestSession,
+)
+
+from py_etp_client import CloseSession
+from py_etp_client.auth import AuthConfig
+from py_etp_client.etpconfig import ETPConfig, ServerConfig
+from py_etp_client.etpsimpleclient import ETPClientBase, EventType
+
+try:
+    from websockets.asyncio.client import connect as ws_connect
+    from websockets.exceptions import ConnectionClosed
+
+    __WEBSOCKETS_MODULE_EXISTS__ = True
+except Exception:
+    ws_connect = None
+    ConnectionClosed = Exception  # type: ignore
+    __WEBSOCKETS_MODULE_EXISTS__ = False
+
+
+class AsyncETPSimpleClient(ETPClientBase):
+    """Asyncio WebSocket client for ETP connections.
+
+    The client shares the configuration, authentication and listener system of ETPSimpleClient
+    (see ETPSimpleClient documentation). Listeners are called from the event loop, they must not block.
+
+    Usage:
+    ```python
+    client = AsyncETPSimpleClient(url="wss://example.com")
+    await client.start()
+    answers = await client.send_and_wait(req)
+    await client.close()
+    ```
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        spec: Optional[ETPConnection] = None,
+        access_token: Optional[str] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        headers: Optional[Union[dict, str]] = None,
+        verify: Optional[Any] = None,
+        req_session: Optional[RequestSession] = None,
+        config: Optional[Union[ETPConfig, ServerConfig, AuthConfig]] = None,
+    ):
+        """Initializes the AsyncETPSimpleClient. The connection is only opened by start().
+
+        Args:
+            url (str): The WebSocket URL to connect to.
+            spec (Optional[ETPConnection]): The ETPConnection specification to use.
+            access_token (Optional[str], optional): Access token for authentication. Defaults to None.
+            username (Optional[str], optional): Username for basic authentication (ignored if access_token is provided). Defaults to None.
+            password (Optional[str], optional): Password for basic authentication (ignored if access_token is provided). Defaults to None.
+            headers (Optional[Union[dict, str]], optional): Additional headers to include in the WebSocket request. Defaults to None.
+            verify (Optional[Any], optional): SSL verification options. Defaults to None.
+            req_session (Optional[RequestSession], optional): RequestSession object to use. If None provided, a default one will be created. Defaults to None.
+            config (Optional[Union[ETPConfig, ServerConfig, AuthConfig]], optional): Configuration object for server settings. Defaults to None.
+        """
+        super().__init__(
+            url=url,
+            spec=spec,
+            access_token=access_token,
+            username=username,
+            password=password,
+            headers=headers,
+            verify=verify,
+            req_session=req_session,
+            config=config,
+        )
+        self.reader_task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "AsyncETPSimpleClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def _ssl_context(self) -> Optional[ssl.SSLContext]:
+        if not self.url.startswith("wss"):
+            return None
+        ctx = ssl.create_default_context()
+        if isinstance(self.verify, bool) and not self.verify:
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+        return ctx
+
+    async def start(self, timeout: float = 10) -> bool:
+        """Open the WebSocket connection and the ETP session.
+
+        Args:
+            timeout (float, optional): Maximum time to wait for the OpenSession answer in seconds. Defaults to 10.
+
+        Returns:
+            bool: True if the ETP session is established
+        """
+        if not __WEBSOCKETS_MODULE_EXISTS__:
+            raise ImportError("websockets module is not available. Install it with: pip install py-etp-client[async]")
+
+        self.closed = False
+        self.pending_requests.clear()
+        self._init_connection()
+
+        logging.info(f"Connecting to {self.url} ...")
+        self.ws = await ws_connect(
+            self.url,
+            subprotocols=[ETPConnection.SUB_PROTOCOL],  # type: ignore
+            additional_headers=self.headers,
+            ssl=self._ssl_context(),
+            max_size=None,
+        )
+        self.reader_task = asyncio.get_running_loop().create_task(self._read_loop())
+        logging.info("Connected to WebSocket!")
+
+        try:
+            answer = await self.send_and_wait(self.request_session, timeout=timeout)
+            logging.info(f"CONNECTED : {answer}")
+        except Exception as e:
+            logging.error(e)
+        self._notify_listeners(EventType.ON_OPEN, ws=self.ws)
+
+        self._notify_listeners(EventType.START)
+        return self.is_connected()
+
+    async def stop(self) -> None:
+        """Gracefully stop the WebSocket connection."""
+        self.closed = True
+        if self.ws is not None:
+            await self.ws.close()
+        if self.reader_task is not None and self.reader_task is not asyncio.current_task():
+            await self.reader_task
+            self.reader_task = None
+        self.spec = None
+        logging.info("WebSocket client stopped.")
+
+        self._notify_listeners(EventType.STOP)
+
+    async def close(self) -> None:
+        """Send a CloseSession message, stop the client and notify CLOSE event listeners."""
+        if self.ws is not None and not self.closed:
+            try:
+                await self.send(CloseSession(reason="I want to stop"))
+            except Exception as e:
+                logging.debug(f"CloseSession could not be sent: {e}")
+        await self.stop()
+
+        self._notify_listeners(EventType.CLOSE)
+
+    async def _read_loop(self) -> None:
+        """Reads every incoming message until the connection is closed."""
+        close_status_code, close_msg = None, None
+        try:
+            async for message in self.ws:  # type: ignore
+                if isinstance(message, bytes):
+                    await self.on_message(message)
+        except ConnectionClosed as e:
+            close_status_code, close_msg = getattr(e, "code", None), getattr(e, "reason", None)
+        except Exception as e:
+            logging.info(f"Error: {e}")
+            self._notify_listeners(EventType.ON_ERROR, ws=self.ws, error=e)
+        finally:
+            logging.info("WebSocket closed")
+            self.closed = True
+            # Wake up all waiting requests to prevent hanging
+            self.pending_requests.fail_all(RuntimeError("WebSocket connection closed while waiting for response"))
+            self._notify_listeners(
+                EventType.ON_CLOSE, ws=self.ws, close_status_code=close_status_code, close_msg=close_msg
+            )
+
+    async def on_message(self, message: bytes) -> None:
+        """Handles incoming WebSocket messages."""
+        wire_size = len(message)
+        message = self._decode_frame(message)
+        recieved = self._decode_message(message)
+
+        if not isinstance(recieved, Message):
+            logging.error(f"Received message is not an instance of Message: {type(recieved)} : {recieved}")
+            return
+
+        if self.spec is None:
+            logging.error("ETPConnection spec is not defined for this client.")
+            return
+
+        self.compression_counters.record(
+            "received", recieved.header.protocol, recieved.header.message_type, len(message), wire_size
+        )
+        try:
+            await self._handle_message(recieved)
+        except Exception as e:
+            logging.error(f"#ERR: {type(e).__name__} : {e}")
+
+        if recieved.header.correlation_id is not None:
+            self.pending_requests.dispatch(recieved, len(message))
+
+        self._notify_listeners(EventType.ON_MESSAGE, ws=self.ws, message=message, received=recieved)
+
+    async def _send(
+        self, req, future: Optional[asyncio.Future] = None, on_part: Optional[Callable[[Message], None]] = None
+    ) -> int:
+        if self.ws is None or self.closed:
+            raise RuntimeError("WebSocket is not connected.")
+
+        obj_msg = Message.get_object_message(etp_object=req)
+        if not isinstance(obj_msg, Message):
+            raise TypeError(f"Expected an instance of Message, got {type(obj_msg)}")
+
+        assert self.spec is not None, "ETPConnection spec must be defined before sending messages."
+
+        # Encoding is synchronous: message ids are consumed without any other coroutine interleaving
+        msg_id = -1
+        parts = []
+        for m_id, msg_to_send in self._encode_message(obj_msg):
+            if msg_id < 0:
+                msg_id = m_id
+            parts.append(self._encode_frame(obj_msg.header, msg_to_send))
+
+        # Registered before sending so that a fast answer cannot be missed
+        if future is not None:
+            self.pending_requests.register(msg_id, future, on_part)
+
+        for part in parts:
+            await self.ws.send(part)
+        return msg_id
+
+    async def send(self, req) -> int:
+        """Sends an ETP message without waiting for an answer.
+
+        Returns:
+            int: the message id
+        """
+        return await self._send(req)
+
+    async def send_and_wait(
+        self, req, timeout: float = 5, on_part: Optional[Callable[[Message], None]] = None
+    ) -> List[Message]:
+        """Sends an ETP message and waits for all the parts of the answer (until the final one).
+
+        Args:
+            req: The request to send
+            timeout: Maximum time to wait for a response in seconds. For multipart answers, it is the maximum
+                time between two parts.
+            on_part: Optional callback called with each part of the answer as soon as it is received. It is called
+                from the event loop and must not block.
+
+        Returns:
+            List[Message]: List of received messages
+
+        Raises:
+            TimeoutError: If no response is received within timeout
+            RuntimeError: If WebSocket connection is closed while waiting
+        """
+        future = asyncio.get_running_loop().create_future()
+        msg_id = await self._send(req, future, on_part)
+        pending = self.pending_requests.get(msg_id)
+        if pending is None:  # already answered
+            return await future
+        pending.last_activity = time.monotonic()
+        try:
+            # The deadline is pushed back each time a part is received
+            while True:
+                done, _ = await asyncio.wait(
+                    {future}, timeout=max(0.0, pending.last_activity + timeout - time.monotonic())
+                )
+                if done:
+                    return future.result()
+                if time.monotonic() >= pending.last_activity + timeout:
+                    raise TimeoutError(f"No response received for message ID: {msg_id} within {timeout} seconds")
+        finally:
+            self.pending_requests.discard(msg_id)
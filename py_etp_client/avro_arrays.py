@@ -0,0 +1,429 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Avro binary encoding and decoding of the ETP messages carrying data arrays, directly from and to numpy buffers.
+
+The generic etpproto encoding goes through `body.dict()` and fastavro, which requires the array values as a Python
+list: a 100M elements array becomes 100M Python objects before being encoded. Here the values of the AnyArray
+fields are kept as numpy arrays (see etp_requests.get_numpy_any_array) and encoded in bulk:
+- double and float: the little-endian buffer of the array, as is;
+- int and long: zig-zag varints computed with vectorized numpy operations;
+- boolean: one byte per value.
+
+The other fields of the message (uris, dimensions, ...) are encoded by a small schema-driven writer. A message is
+assembled with a single copy of the array buffer into the final frame.
+
+The GetDataArraysResponse, GetDataSubarraysResponse and PutDataSubarrays messages are decoded the same way (see decode_message): the
+values are read with np.frombuffer or a bulk varint decoding, without going through a Python list and the pydantic
+validation of each value.
+"""
+import json
+import logging
+import struct
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import etptypes.energistics.etp.v12.datatypes.message_header as mh
+import numpy as np
+from etpproto.messages import Message
+from etptypes import ETPModel, avro_schema
+
+from py_etp_client import (
+    AnyArray,
+    ArrayOfBoolean,
+    ArrayOfDouble,
+    ArrayOfFloat,
+    ArrayOfInt,
+    ArrayOfLong,
+    ArrayOfString,
+    DataArray,
+    DataArrayIdentifier,
+    GetDataArraysResponse,
+    GetDataSubarraysResponse,
+    PutDataArrays,
+    PutDataSubarrays,
+    PutDataSubarraysType,
+)
+from py_etp_client.compression import read_header
+
+# Message types encoded by encode_body, the others are left to etpproto
+ARRAY_MESSAGE_TYPES = (PutDataArrays, PutDataSubarrays, GetDataArraysResponse, GetDataSubarraysResponse)
+
+# 3 int (5 bytes max) and 2 long (10 bytes max) varints
+MESSAGE_HEADER_MAX_SIZE = 35
+
+# Number of values zig-zag encoded or decoded at once: bounds the temporary memory (~30 bytes per value)
+VARINT_BLOCK_SIZE = 1 << 18
+
+_NUMPY_ITEM_TYPES = {
+    "double": np.dtype("<f8"),
+    "float": np.dtype("<f4"),
+    "long": np.dtype("<i8"),
+    "int": np.dtype("<i8"),
+    "boolean": np.dtype("u1"),
+}
+
+# Branches of the AnyArray union, in the order of its Avro schema: (class, avro type of the values)
+_ANY_ARRAY_BRANCHES = [
+    (ArrayOfBoolean, "boolean"),
+    (ArrayOfInt, "int"),
+    (ArrayOfLong, "long"),
+    (ArrayOfFloat, "float"),
+    (ArrayOfDouble, "double"),
+    (ArrayOfString, "string"),
+    (None, "bytes"),
+]
+
+_DECODED_ITEM_TYPES = {
+    "double": np.dtype(np.float64),
+    "float": np.dtype(np.float32),
+    "long": np.dtype(np.int64),
+    "int": np.dtype(np.int32),
+}
+
+
+class UnsupportedBody(Exception):
+    """Raised when a message body contains a value the fast encoding can not write."""
+
+
+def zigzag(values: np.ndarray) -> np.ndarray:
+    """Zig-zag transform of integers: maps signed values to unsigned ones, small magnitudes to small values."""
+    v = values.astype(np.int64, copy=False)
+    return ((v << 1) ^ (v >> 63)).view(np.uint64)
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """Encodes integers as Avro zig-zag varints (int and long have the same encoding).
+
+    Args:
+        values (np.ndarray): flat array of integers
+
+    Returns:
+        bytes: the concatenated varints
+    """
+    chunks = []
+    for block_start in range(0, len(values), VARINT_BLOCK_SIZE):
+        z = zigzag(values[block_start : block_start + VARINT_BLOCK_SIZE])
+        # Number of 7 bits groups of each value (at least 1, at most 10 for 64 bits)
+        nb_bytes = np.ones(len(z), dtype=np.uint8)
+        rest = z >> np.uint64(7)
+        while rest.any():
+            nb_bytes += rest != 0
+            rest >>= np.uint64(7)
+        width = int(nb_bytes.max()) if len(z) > 0 else 1
+        groups = np.empty((len(z), width), dtype=np.uint8)
+        for k in range(width):
+            group = ((z >> np.uint64(7 * k)) & np.uint64(0x7F)).astype(np.uint8)
+            # Continuation bit on every group but the last one of each value
+            groups[:, k] = np.where(nb_bytes > k + 1, group | 0x80, group)
+        chunks.append(groups[np.arange(width) < nb_bytes[:, None]].tobytes())
+    return b"".join(chunks)
+
+
+def encode_long(value: int) -> bytes:
+    value = int(value)
+    z = (value << 1) ^ (value >> 63)
+    out = bytearray()
+    while z & ~0x7F:
+        out.append((z & 0x7F) | 0x80)
+        z >>= 7
+    out.append(z)
+    return bytes(out)
+
+
+def encode_array_block(values: Union[np.ndarray, List[Any]], item_type: str) -> List[Any]:
+    """Encodes an Avro array of primitive values from a numpy array: a single block (count, values) followed by
+    the end marker.
+
+    Returns:
+        List[Any]: the encoded parts (bytes or buffers to concatenate)
+    """
+    if len(values) == 0:
+        return [b"\x00"]
+    dtype = _NUMPY_ITEM_TYPES.get(item_type)
+    if dtype is None:
+        # Strings: encoded one by one
+        parts = [encode_long(len(values))]
+        for v in values:
+            parts.extend(_encode_primitive(item_type, v))
+        parts.append(b"\x00")
+        return parts
+    array = np.asarray(values).ravel()
+    if item_type in ("int", "long"):
+        data: Any = encode_varints(array)
+    else:
+        data = np.ascontiguousarray(array, dtype=dtype).data.cast("B")
+    return [encode_long(len(array)), data, b"\x00"]
+
+
+def _encode_primitive(schema: str, datum: Any) -> List[Any]:
+    if schema in ("long", "int"):
+        return [encode_long(datum)]
+    elif schema == "string":
+        data = datum.encode("utf-8") if isinstance(datum, str) else bytes(datum)
+        return [encode_long(len(data)), data]
+    elif schema == "bytes":
+        return [encode_long(len(datum)), bytes(datum)]
+    elif schema == "boolean":
+        return [b"\x01" if datum else b"\x00"]
+    elif schema == "double":
+        return [struct.pack("<d", datum)]
+    elif schema == "float":
+        return [struct.pack("<f", datum)]
+    elif schema == "null":
+        return []
+    raise UnsupportedBody(f"Unsupported avro type {schema}")
+
+
+def _branch_name(schema: Any) -> str:
+    if isinstance(schema, dict):
+        return schema.get("fullName") or schema.get("name") or schema["type"]
+    return schema
+
+
+def _encode(schema: Any, datum: Any, parts: List[Any]) -> None:
+    if isinstance(schema, str):
+        parts.extend(_encode_primitive(schema, datum))
+    elif isinstance(schema, list):
+        # Union: etptypes models give (type name, value) tuples for named types
+        if datum is None and "null" in schema:
+            parts.append(encode_long(schema.index("null")))
+            return
+        if not isinstance(datum, tuple):
+            raise UnsupportedBody(f"Unsupported union value {type(datum)}")
+        name, value = datum
+        for index, branch in enumerate(schema):
+            if _branch_name(branch) == name or (isinstance(branch, dict) and branch.get("name") == name):
+                parts.append(encode_long(index))
+                _encode(branch, value, parts)
+                return
+        raise UnsupportedBody(f"{name} is not a branch of the union")
+    elif schema["type"] == "record":
+        for f in schema["fields"]:
+            _encode(f["type"], datum[f["name"]], parts)
+    elif schema["type"] == "map":
+        if len(datum) > 0:
+            parts.append(encode_long(len(datum)))
+            for k, v in datum.items():
+                parts.extend(_encode_primitive("string", k))
+                _encode(schema["values"], v, parts)
+        parts.append(b"\x00")
+    elif schema["type"] == "array":
+        if isinstance(schema["items"], str):
+            parts.extend(encode_array_block(datum, schema["items"]))
+        else:
+            if len(datum) > 0:
+                parts.append(encode_long(len(datum)))
+                for v in datum:
+                    _encode(schema["items"], v, parts)
+            parts.append(b"\x00")
+    elif schema["type"] == "enum":
+        parts.append(encode_long(schema["symbols"].index(datum)))
+    elif schema["type"] == "fixed":
+        parts.append(bytes(datum))
+    else:
+        _encode(schema["type"], datum, parts)
+
+
+@lru_cache(maxsize=None)
+def _schema(body_type: type) -> Dict[str, Any]:
+    return json.loads(avro_schema(body_type))
+
+
+def encode_body(body: ETPModel) -> Optional[List[Any]]:
+    """Encodes the body of a data array message (see ARRAY_MESSAGE_TYPES) in Avro binary, with the numpy values
+    written in bulk.
+
+    Returns:
+        Optional[List[Any]]: the encoded parts to concatenate, None if the body must be encoded by etpproto
+    """
+    if not isinstance(body, ARRAY_MESSAGE_TYPES):
+        return None
+    parts: List[Any] = []
+    try:
+        _encode(_schema(type(body)), body.dict(by_alias=True), parts)
+    except UnsupportedBody:
+        return None
+    return parts
+
+
+def encode_header(header: mh.MessageHeader) -> bytes:
+    """Encodes a message header in Avro binary (at most MESSAGE_HEADER_MAX_SIZE bytes)."""
+    parts: List[Any] = []
+    _encode(_schema(mh.MessageHeader), header.dict(by_alias=True), parts)
+    return b"".join(parts)
+
+
+def encode_message(header: mh.MessageHeader, body: ETPModel) -> Optional[bytes]:
+    """Encodes a data array message (header and body) in Avro binary.
+
+    Returns:
+        Optional[bytes]: the binary message, None if the body must be encoded by etpproto
+    """
+    parts = encode_body(body)
+    if parts is None:
+        return None
+    return encode_header(header) + b"".join(parts)
+
+
+def decode_varints(data: np.ndarray, count: int, dtype: Any = np.int64) -> Tuple[np.ndarray, int]:
+    """Decodes Avro zig-zag varints in bulk.
+
+    Args:
+        data (np.ndarray): the encoded bytes (uint8), starting with the first varint
+        count (int): number of values to decode
+        dtype (Any, optional): type of the returned values. Defaults to np.int64.
+
+    Returns:
+        Tuple[np.ndarray, int]: the values and the number of bytes read
+    """
+    values = np.empty(count, dtype=dtype)
+    offset = 0
+    width = 2
+    for block_start in range(0, count, VARINT_BLOCK_SIZE):
+        nb = min(VARINT_BLOCK_SIZE, count - block_start)
+        # Window of `width` bytes per value, widened until it contains the whole block (10 bytes max per varint)
+        while True:
+            window = data[offset : offset + width * nb]
+            ends = np.flatnonzero(window < 0x80)[:nb]
+            if len(ends) == nb or width >= 10 or len(window) < width * nb:
+                break
+            width = min(10, 2 * width)
+        if len(ends) < nb:
+            raise ValueError("Truncated varint array")
+        starts = np.empty(nb, dtype=np.int64)
+        starts[0] = offset
+        starts[1:] = offset + ends[:-1] + 1
+        lengths = offset + ends + 1 - starts
+        z = np.zeros(nb, dtype=np.uint64)
+        for k in range(int(lengths.max())):
+            group = (data[np.minimum(starts + k, offset + ends)] & 0x7F).astype(np.uint64)
+            z |= np.where(lengths > k, group << np.uint64(7 * k), np.uint64(0))
+        values[block_start : block_start + nb] = (z >> np.uint64(1)).view(np.int64) ^ -(z & np.uint64(1)).view(
+            np.int64
+        )
+        offset += int(ends[-1]) + 1
+    return values, offset
+
+
+class _Reader:
+    """Cursor on an Avro binary buffer."""
+
+    def __init__(self, frame: bytes, offset: int = 0):
+        self.data = np.frombuffer(frame, dtype=np.uint8)
+        self.pos = offset
+
+    def read_long(self) -> int:
+        value = shift = 0
+        while True:
+            b = int(self.data[self.pos])
+            self.pos += 1
+            value |= (b & 0x7F) << shift
+            if b < 0x80:
+                return (value >> 1) ^ -(value & 1)
+            shift += 7
+
+    def read_bytes(self) -> bytes:
+        size = self.read_long()
+        self.pos += size
+        return self.data[self.pos - size : self.pos].tobytes()
+
+    def read_string(self) -> str:
+        return self.read_bytes().decode("utf-8")
+
+    def read_block_count(self) -> int:
+        count = self.read_long()
+        if count < 0:
+            # Negative count: followed by the size of the block in bytes
+            self.read_long()
+            count = -count
+        return count
+
+    def read_primitive_array(self, item_type: str) -> Union[np.ndarray, List[Any]]:
+        """Reads an Avro array of primitive values: numeric types as a numpy array, strings as a list."""
+        blocks = []
+        count = self.read_block_count()
+        while count > 0:
+            if item_type == "string":
+                blocks.append([self.read_string() for _ in range(count)])
+            elif item_type in ("int", "long"):
+                values, size = decode_varints(self.data[self.pos :], count, _DECODED_ITEM_TYPES[item_type])
+                blocks.append(values)
+                self.pos += size
+            else:
+                dtype = _NUMPY_ITEM_TYPES[item_type]
+                values = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.pos)
+                # Copy in native order: the array does not depend on the received frame and is writable
+                blocks.append(values.astype(_DECODED_ITEM_TYPES.get(item_type, np.bool_)))
+                self.pos += count * dtype.itemsize
+            count = self.read_block_count()
+        if item_type == "string":
+            return [v for block in blocks for v in block]
+        if len(blocks) == 1:
+            return blocks[0]
+        if len(blocks) == 0:
+            return np.empty(0, dtype=_DECODED_ITEM_TYPES.get(item_type, np.bool_))
+        return np.concatenate(blocks)
+
+    def read_any_array(self) -> AnyArray:
+        array_class, item_type = _ANY_ARRAY_BRANCHES[self.read_long()]
+        if array_class is None:
+            item: Any = self.read_bytes()
+        else:
+            item = array_class.construct(values=self.read_primitive_array(item_type))
+        return AnyArray.construct(item=item)
+
+    def read_data_array(self) -> DataArray:
+        dimensions = self.read_primitive_array("long").tolist()  # type: ignore
+        return DataArray.construct(dimensions=dimensions, data=self.read_any_array())
+
+    def read_put_data_subarrays_type(self) -> PutDataSubarraysType:
+        uid = DataArrayIdentifier.construct(uri=self.read_string(), path_in_resource=self.read_string())
+        data = self.read_any_array()
+        starts = self.read_primitive_array("long").tolist()  # type: ignore
+        counts = self.read_primitive_array("long").tolist()  # type: ignore
+        return PutDataSubarraysType.construct(uid=uid, data=data, starts=starts, counts=counts)
+
+    def read_map(self, read_value: Callable[[], Any]) -> Dict[str, Any]:
+        res = {}
+        count = self.read_block_count()
+        while count > 0:
+            for _ in range(count):
+                key = self.read_string()
+                res[key] = read_value()
+            count = self.read_block_count()
+        return res
+
+
+# (protocol, message type) of the messages decoded by decode_message
+_DECODED_MESSAGES = {
+    (9, 1): lambda reader: GetDataArraysResponse.construct(data_arrays=reader.read_map(reader.read_data_array)),
+    (9, 8): lambda reader: GetDataSubarraysResponse.construct(data_subarrays=reader.read_map(reader.read_data_array)),
+    (9, 5): lambda reader: PutDataSubarrays.construct(
+        data_subarrays=reader.read_map(reader.read_put_data_subarrays_type)
+    ),
+}
+
+
+def decode_message(frame: bytes) -> Optional[Message]:
+    """Decodes a GetDataArraysResponse, GetDataSubarraysResponse or PutDataSubarrays message with its values as
+    numpy arrays.
+
+    The models are built without validation (construct()): the values of the AnyArray are numpy arrays instead of
+    lists.
+
+    Returns:
+        Optional[Message]: the decoded message, None for the other messages (to decode with etpproto)
+    """
+    # protocol and messageType are the first fields of the header
+    reader = _Reader(frame)
+    decode = _DECODED_MESSAGES.get((reader.read_long(), reader.read_long()))
+    if decode is None:
+        return None
+    header, reader.pos = read_header(frame)
+    try:
+        body = decode(reader)
+    except (IndexError, ValueError) as e:
+        logging.error(f"Malformed data array message: {e}")
+        return None
+    return Message(mh.MessageHeader.parse_obj(header), body)
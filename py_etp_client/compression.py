@@ -0,0 +1,150 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+ETP 1.2 message body compression.
+
+The compression is negotiated at session opening: the client lists the algorithms it supports in
+RequestSession.supportedCompression and the server picks one in OpenSession.supportedCompression. Once
+negotiated, the body of a message (the bytes after the header) may be compressed, which is signaled by the
+COMPRESSED flag of its header. RequestSession, OpenSession, ProtocolException and Acknowledge are never
+compressed.
+
+Only gzip is supported, the only algorithm named by the ETP 1.2 specification.
+"""
+import gzip
+import json
+import threading
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+
+import etptypes.energistics.etp.v12.datatypes.message_header as mh
+from etpproto.connection import ETPConnection
+from etpproto.messages import MessageFlags
+from fastavro import parse_schema, schemaless_reader, schemaless_writer
+
+GZIP = "gzip"
+SUPPORTED_COMPRESSIONS = [GZIP]
+
+# gzip level: a good trade-off between the compression ratio and the throughput on large array messages
+COMPRESSION_LEVEL = 6
+
+_HEADER_SCHEMA = parse_schema(json.loads(mh.avro_schema))
+
+# Core RequestSession and OpenSession
+_UNCOMPRESSIBLE_CORE_TYPES = (1, 2)
+# ProtocolException and Acknowledge, in any protocol
+_UNCOMPRESSIBLE_TYPES = (1000, 1001)
+
+
+def read_header(frame: bytes) -> Tuple[Dict[str, Any], int]:
+    """Reads the header of a binary ETP message.
+
+    Returns:
+        Tuple[Dict[str, Any], int]: the header record and its size in bytes (the offset of the body)
+    """
+    fo = BytesIO(frame)
+    header = schemaless_reader(fo, _HEADER_SCHEMA)
+    assert isinstance(header, dict)
+    return header, fo.tell()
+
+
+def _write_header(header: Dict[str, Any]) -> bytes:
+    bio = BytesIO()
+    schemaless_writer(bio, _HEADER_SCHEMA, header)
+    return bio.getvalue()
+
+
+def is_compressible(header: Dict[str, Any]) -> bool:
+    """Returns False for the messages that the specification forbids to compress."""
+    if header["messageType"] in _UNCOMPRESSIBLE_TYPES:
+        return False
+    return not (header["protocol"] == 0 and header["messageType"] in _UNCOMPRESSIBLE_CORE_TYPES)
+
+
+def message_type_name(protocol: int, message_type: int) -> str:
+    """Returns the name of an ETP message type (e.g. "GetDataArraysResponse")."""
+    try:
+        return ETPConnection.generic_transition_table[str(protocol)][str(message_type)].__name__
+    except KeyError:
+        return f"{protocol}.{message_type}"
+
+
+def compress_frame(frame: bytes, threshold: int = 0, level: int = COMPRESSION_LEVEL) -> bytes:
+    """Compresses the body of a binary ETP message with gzip and sets the COMPRESSED flag of its header.
+
+    The frame is returned unchanged if its body is smaller than the threshold, if the message type can not be
+    compressed or if the compressed body would not be smaller.
+
+    Args:
+        frame (bytes): the binary message
+        threshold (int, optional): minimum body size in bytes to compress. Defaults to 0.
+        level (int, optional): gzip compression level. Defaults to COMPRESSION_LEVEL.
+
+    Returns:
+        bytes: the message to send
+    """
+    header, body_offset = read_header(frame)
+    if (
+        len(frame) - body_offset < max(threshold, 1)
+        or header["messageFlags"] & MessageFlags.COMPRESSED
+        or not is_compressible(header)
+    ):
+        return frame
+    body = gzip.compress(memoryview(frame)[body_offset:], compresslevel=level, mtime=0)
+    if len(body) >= len(frame) - body_offset:
+        return frame
+    compressed_header = dict(header, messageFlags=header["messageFlags"] | MessageFlags.COMPRESSED)
+    return _write_header(compressed_header) + body
+
+
+def decompress_frame(frame: bytes) -> bytes:
+    """Decompresses the body of a binary ETP message if its COMPRESSED flag is set. The flag is removed from
+    the returned message, which can then be decoded as any other message.
+    """
+    header, body_offset = read_header(frame)
+    if not header["messageFlags"] & MessageFlags.COMPRESSED:
+        return frame
+    uncompressed_header = dict(header, messageFlags=header["messageFlags"] & ~MessageFlags.COMPRESSED)
+    return _write_header(uncompressed_header) + gzip.decompress(memoryview(frame)[body_offset:])
+
+
+class CompressionStats:
+    """Thread safe counters of the bytes sent and received, per direction and per message type.
+
+    stats() returns for each direction ("sent", "received") and message type the number of messages, of
+    compressed messages, the uncompressed size ("raw_bytes"), the size on the wire ("wire_bytes") and the
+    compression ratio (raw_bytes / wire_bytes).
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[str, Dict[str, int]]] = {"sent": {}, "received": {}}
+        self._lock = threading.Lock()
+
+    def record(self, direction: str, protocol: int, message_type: int, raw_size: int, wire_size: int) -> None:
+        name = message_type_name(protocol, message_type)
+        with self._lock:
+            counters = self._counters[direction].setdefault(
+                name, {"messages": 0, "compressed_messages": 0, "raw_bytes": 0, "wire_bytes": 0}
+            )
+            counters["messages"] += 1
+            counters["raw_bytes"] += raw_size
+            counters["wire_bytes"] += wire_size
+            if wire_size != raw_size:
+                counters["compressed_messages"] += 1
+
+    def stats(self, message_type: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Returns the counters, optionally for a single message type."""
+        with self._lock:
+            res: Dict[str, Dict[str, Dict[str, float]]] = {}
+            for direction, by_type in self._counters.items():
+                res[direction] = {}
+                for name, counters in by_type.items():
+                    if message_type is None or name == message_type:
+                        res[direction][name] = dict(
+                            counters, ratio=counters["raw_bytes"] / max(counters["wire_bytes"], 1)
+                        )
+            return res
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters = {"sent": {}, "received": {}}
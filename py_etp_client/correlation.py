@@ -0,0 +1,422 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Correlation of the received ETP messages with the requests waiting for an answer.
+
+The CorrelationTable only keeps the requests that are still waiting: an entry is dropped as soon as its answer
+is delivered, or when the request times out or the connection is closed. For debugging, the last answers can
+optionally be kept in a capped retention buffer (by number of answers and/or by size).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from etpproto.messages import Message
+
+# Minimal delay between two scans for expired requests, in seconds
+EXPIRY_CHECK_PERIOD = 0.5
+
+
+@dataclass
+class PendingRequest:
+    """Answer parts received so far for a request waiting for its answer.
+
+    An answer can be split by the server in several messages (e.g. GetResourcesResponse pages), the last one
+    having the FINALPART flag: the request is complete only when this final part is received.
+    The future (concurrent.futures.Future or asyncio.Future) is resolved with the list of parts.
+    """
+
+    msg_id: int
+    future: Any = None
+    parts: List[Message] = field(default_factory=list)
+    on_part: Optional[Callable[[Message], None]] = None
+    last_activity: float = field(default_factory=time.monotonic)
+    nb_bytes: int = 0
+    timeout: Optional[float] = None
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """True if no part has been received for more than `timeout` seconds."""
+        return self.timeout is not None and (now or time.monotonic()) >= self.last_activity + self.timeout
+
+    def add_part(self, msg: Message, size: int = 0) -> bool:
+        """Adds a received part and calls the on_part callback.
+
+        Returns:
+            bool: True if it is the final part of the answer
+        """
+        final = self.record_part(msg, size)
+        self.notify_part(msg)
+        return final
+
+    def record_part(self, msg: Message, size: int = 0) -> bool:
+        """Adds a received part, without calling the on_part callback (see notify_part).
+
+        Returns:
+            bool: True if it is the final part of the answer
+        """
+        self.parts.append(msg)
+        self.nb_bytes += size
+        self.last_activity = time.monotonic()
+        return msg.is_final_msg()
+
+    def notify_part(self, msg: Message) -> None:
+        """Calls the on_part callback with a received part."""
+        if self.on_part is not None:
+            try:
+                self.on_part(msg)
+            except Exception as e:
+                logging.error(f"Error in on_part callback for message {msg.header.correlation_id}: {e}")
+
+    def is_complete(self) -> bool:
+        return len(self.parts) > 0 and self.parts[-1].is_final_msg()
+
+
+class CorrelationTable:
+    """Thread safe table of the requests waiting for an answer, indexed by message id.
+
+    The table can also bound the number of requests in flight (max_requests) and the size of the answer parts
+    received for requests not complete yet (max_bytes): acquire_slot() blocks the senders while the window is full.
+
+    Counters:
+    - live_entries: number of requests waiting for (the end of) their answer
+    - bytes_retained: size of the received parts still referenced by the table (waiting requests and retention)
+    - evictions: number of entries dropped without their answer being delivered (timeout, connection closed)
+      or pushed out of the retention buffer by its caps
+    - window_queue_depth: number of senders currently waiting for a slot in the in-flight window
+    - window_waits, window_wait_time, window_max_wait_time: number of sends that had to wait for a slot, total and
+      maximum waiting time in seconds
+    """
+
+    def __init__(self, retention_count: int = 0, retention_bytes: int = 0, max_requests: int = 0, max_bytes: int = 0):
+        """
+        Args:
+            retention_count (int, optional): Number of delivered answers kept for debugging. Defaults to 0 (none).
+            retention_bytes (int, optional): Maximum size of the kept answers in bytes, 0 for no size limit.
+                Defaults to 0.
+            max_requests (int, optional): Maximum number of requests in flight, 0 for no limit. Defaults to 0.
+            max_bytes (int, optional): Maximum size in bytes of the parts received for requests in flight, 0 for no
+                limit. Defaults to 0.
+        """
+        self.retention_count = retention_count
+        self.retention_bytes = retention_bytes
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.delivered = 0
+        self.window_queue_depth = 0
+        self.window_waits = 0
+        self.window_wait_time = 0.0
+        self.window_max_wait_time = 0.0
+        self._pending: Dict[int, PendingRequest] = {}
+        self._pending_bytes = 0
+        self._reserved = 0
+        self._retained: "OrderedDict[int, PendingRequest]" = OrderedDict()
+        self._retained_bytes = 0
+        self._next_expiry_check = 0.0
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, msg_id: int) -> bool:
+        return msg_id in self._pending
+
+    @property
+    def live_entries(self) -> int:
+        return len(self._pending)
+
+    @property
+    def bytes_retained(self) -> int:
+        return self._retained_bytes + self._pending_bytes
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the counters of the table."""
+        return {
+            "live_entries": self.live_entries,
+            "bytes_retained": self.bytes_retained,
+            "evictions": self.evictions,
+            "delivered": self.delivered,
+            "retained_answers": len(self._retained),
+            "window_queue_depth": self.window_queue_depth,
+            "window_waits": self.window_waits,
+            "window_wait_time": self.window_wait_time,
+            "window_max_wait_time": self.window_max_wait_time,
+        }
+
+    def retained(self) -> Dict[int, List[Message]]:
+        """Returns the answers kept in the retention buffer {correlation_id: parts}, oldest first."""
+        with self._lock:
+            return {msg_id: list(p.parts) for msg_id, p in self._retained.items()}
+
+    def acquire_slot(self, timeout: Optional[float] = None, reserve: bool = False) -> float:
+        """Waits until the in-flight window has room for a new request.
+
+        Args:
+            timeout (Optional[float], optional): Maximum waiting time in seconds, None to wait forever.
+                Defaults to None.
+            reserve (bool, optional): Keep the slot for a request that will be registered (see register). Defaults
+                to False.
+
+        Raises:
+            TimeoutError: if the window is still full after timeout
+
+        Returns:
+            float: the waiting time in seconds
+        """
+        t_start = time.monotonic()
+        expired: List[PendingRequest] = []
+        waited = 0.0
+        with self._slot_freed:
+            if self._is_full():
+                self.window_queue_depth += 1
+                try:
+                    while self._is_full():
+                        remaining = None if timeout is None else t_start + timeout - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            break
+                        self._slot_freed.wait(
+                            EXPIRY_CHECK_PERIOD if remaining is None else min(remaining, EXPIRY_CHECK_PERIOD)
+                        )
+                        # Requests that will never be answered must not keep the window full
+                        expired.extend(self._pop_expired(time.monotonic()))
+                finally:
+                    self.window_queue_depth -= 1
+                    waited = time.monotonic() - t_start
+                    self.window_waits += 1
+                    self.window_wait_time += waited
+                    self.window_max_wait_time = max(self.window_max_wait_time, waited)
+            full = self._is_full()
+            if not full and reserve:
+                self._reserved += 1
+        self._fail_expired(expired)
+        if full:
+            raise TimeoutError(f"In-flight window still full after {timeout} seconds")
+        return waited
+
+    def release_slot(self) -> None:
+        """Releases a slot reserved by acquire_slot that will not be registered (e.g. sending failed)."""
+        with self._slot_freed:
+            self._reserved = max(0, self._reserved - 1)
+            self._slot_freed.notify_all()
+
+    def register(
+        self,
+        msg_id: int,
+        future: Any = None,
+        on_part: Optional[Callable[[Message], None]] = None,
+        timeout: Optional[float] = None,
+        reserved: bool = False,
+    ) -> PendingRequest:
+        """Registers a request waiting for an answer. Must be called before the request is sent.
+
+        Args:
+            msg_id (int): Message id of the request
+            future (Any, optional): Future resolved with the answer parts. Defaults to None.
+            on_part (Optional[Callable[[Message], None]], optional): Called with each received part. Defaults to None.
+            timeout (Optional[float], optional): If set, the request is failed with a TimeoutError by expire() when
+                no part has been received for this delay (seconds). Defaults to None.
+            reserved (bool, optional): True if a slot has been reserved for this request with acquire_slot.
+                Defaults to False.
+        """
+        self.expire()
+        pending = PendingRequest(msg_id=msg_id, future=future, on_part=on_part, timeout=timeout)
+        with self._lock:
+            if reserved:
+                self._reserved = max(0, self._reserved - 1)
+            self._pending[msg_id] = pending
+        return pending
+
+    def get(self, msg_id: int) -> Optional[PendingRequest]:
+        return self._pending.get(msg_id)
+
+    def dispatch(self, msg: Message, size: int = 0) -> Optional[PendingRequest]:
+        """Adds a received message to the request it answers. When it is the final part, the entry is removed
+        and its future resolved with all the parts.
+
+        Args:
+            msg (Message): The received message
+            size (int, optional): Size of the received frame in bytes. Defaults to 0.
+
+        Returns:
+            Optional[PendingRequest]: the request answered by this message, None if no request is waiting for it
+        """
+        self.expire()
+        correlation_id = msg.header.correlation_id
+        with self._lock:
+            pending = self._pending.get(correlation_id)
+            if pending is not None:
+                # The part and its size are counted together: a concurrent discard/expire removes both
+                final = pending.record_part(msg, size)
+                self._pending_bytes += size
+        if pending is None:
+            if self.retention_count > 0:
+                # Answer nobody waits for (late answer after a timeout, unsolicited message): kept for debugging
+                with self._lock:
+                    orphan = self._retained.pop(correlation_id, None)
+                    if orphan is not None:
+                        self._retained_bytes -= orphan.nb_bytes
+                        if orphan.is_complete():
+                            orphan = None
+                    if orphan is None:
+                        orphan = PendingRequest(msg_id=correlation_id)
+                    orphan.add_part(msg, size)
+                    self._retain(orphan)
+            return None
+
+        pending.notify_part(msg)
+        if final:
+            with self._lock:
+                if self._remove(correlation_id) is None:
+                    # Discarded or expired meanwhile: the answer is not delivered anymore
+                    return None
+                self.delivered += 1
+                if self.retention_count > 0:
+                    self._retain(pending)
+            if pending.future is not None and not pending.future.done():
+                pending.future.set_result(pending.parts)
+        return pending
+
+    def discard(self, msg_id: int) -> Optional[PendingRequest]:
+        """Removes a request that will not wait anymore for its answer (e.g. timeout)."""
+        with self._lock:
+            pending = self._remove(msg_id)
+            if pending is not None:
+                self.evictions += 1
+        return pending
+
+    def expire(self, force: bool = False) -> int:
+        """Fails with a TimeoutError the requests registered with a timeout that received nothing for too long.
+        Called on each register/dispatch, the table is scanned at most every EXPIRY_CHECK_PERIOD seconds.
+
+        Returns:
+            int: number of expired requests
+        """
+        now = time.monotonic()
+        if not force and now < self._next_expiry_check:
+            return 0
+        with self._lock:
+            expired = self._pop_expired(now)
+        self._fail_expired(expired)
+        return len(expired)
+
+    def fail_all(self, error: BaseException) -> None:
+        """Removes all the waiting requests, their futures are failed with the given error."""
+        with self._lock:
+            pendings = list(self._pending.values())
+            self._pending = {}
+            self._pending_bytes = 0
+            self._reserved = 0
+            self.evictions += len(pendings)
+            self._slot_freed.notify_all()
+        for pending in pendings:
+            if pending.future is not None and not pending.future.done():
+                pending.future.set_exception(error)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending = {}
+            self._pending_bytes = 0
+            self._reserved = 0
+            self._retained = OrderedDict()
+            self._retained_bytes = 0
+            self._slot_freed.notify_all()
+
+    def _is_full(self) -> bool:
+        # lock must be held
+        return (self.max_requests > 0 and len(self._pending) + self._reserved >= self.max_requests) or (
+            self.max_bytes > 0 and self._pending_bytes >= self.max_bytes
+        )
+
+    def _remove(self, msg_id: int) -> Optional[PendingRequest]:
+        # lock must be held
+        pending = self._pending.pop(msg_id, None)
+        if pending is not None:
+            self._pending_bytes -= pending.nb_bytes
+            self._slot_freed.notify_all()
+        return pending
+
+    def _pop_expired(self, now: float) -> List[PendingRequest]:
+        # lock must be held
+        self._next_expiry_check = now + EXPIRY_CHECK_PERIOD
+        expired = [p for p in self._pending.values() if p.is_expired(now)]
+        for p in expired:
+            self._remove(p.msg_id)
+        self.evictions += len(expired)
+        return expired
+
+    @staticmethod
+    def _fail_expired(expired: List[PendingRequest]) -> None:
+        # Futures are failed without holding the lock: their callbacks may use the table
+        for p in expired:
+            if p.future is not None and not p.future.done():
+                p.future.set_exception(
+                    TimeoutError(f"No response received for message ID: {p.msg_id} within {p.timeout} seconds")
+                )
+
+    def _retain(self, pending: PendingRequest) -> None:
+        # lock must be held
+        previous = self._retained.pop(pending.msg_id, None)
+        if previous is not None:
+            self._retained_bytes -= previous.nb_bytes
+        self._retained[pending.msg_id] = pending
+        self._retained_bytes += pending.nb_bytes
+        while self._retained and (
+            len(self._retained) > self.retention_count
+            or (self.retention_bytes > 0 and self._retained_bytes > self.retention_bytes)
+        ):
+            _, oldest = self._retained.popitem(last=False)
+            self._retained_bytes -= oldest.nb_bytes
+            self.evictions += 1
+
+
+def map_future(future: Future, fn: Callable[[Any], Any]) -> Future:
+    """Returns a concurrent.futures.Future resolved with fn(result of future). Exceptions raised by future or fn
+    are set on the returned future.
+    """
+    mapped: Future = Future()
+
+    def _done(f: Future):
+        try:
+            mapped.set_result(fn(f.result()))
+        except BaseException as e:
+            mapped.set_exception(e)
+
+    future.add_done_callback(_done)
+    return mapped
+
+
+def gather_futures(futures: List[Future]) -> Future:
+    """Returns a concurrent.futures.Future resolved with the list of the results of futures, in the same order.
+    It fails with the first exception raised by one of them.
+    """
+    gathered: Future = Future()
+    results: List[Any] = [None] * len(futures)
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    if not futures:
+        gathered.set_result([])
+        return gathered
+
+    def _done(i: int, f: Future):
+        # The callbacks run in the threads resolving the futures: gathered is checked and resolved under the lock
+        try:
+            results[i] = f.result()
+        except BaseException as e:
+            with lock:
+                if not gathered.done():
+                    gathered.set_exception(e)
+            return
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0 and not gathered.done():
+                gathered.set_result(results)
+
+    for i, future in enumerate(futures):
+        future.add_done_callback(lambda f, i=i: _done(i, f))
+    return gathered
@@ -0,0 +1,152 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Dask arrays backed by the data arrays of an ETP server (requires the dask extra: pip install "py-etp-client[dask]").
+
+to_dask builds a dask.array whose tasks retrieve their chunk with GetDataSubarrays messages, so that reductions over
+arrays larger than the memory run in parallel. With the threaded scheduler, the tasks share the ETPClient given
+(its requests are pipelined on the session). With process based workers (e.g. dask.distributed), give an
+ETPClientPool instead: each worker process opens its own ETP session, once.
+
+Example:
+    ```python
+    def open_session() -> ETPClient:
+        client = ETPClient(url=url, access_token=token)
+        client.start()
+        return client
+
+    values = to_dask(ETPClientPool(open_session), uri, "/RESQML/values")
+    print(values.mean().compute())
+    ```
+"""
+import threading
+import uuid
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from py_etp_client import DataArrayMetadata
+from py_etp_client.etp_requests import get_any_array_type_dtype, get_wire_item_size
+from py_etp_client.etparray import ETPArray
+from py_etp_client.transfers import tile_shape
+from py_etp_client.utils import get_valid_uri_str
+
+try:
+    import dask.array as da
+
+    __DASK_MODULE_EXISTS__ = True
+except Exception:
+    da = None
+    __DASK_MODULE_EXISTS__ = False
+
+if TYPE_CHECKING:
+    from py_etp_client.etpclient import ETPClient
+
+# Sessions opened by the pools in this process, by pool key
+_POOL_CLIENTS: Dict[str, "ETPClient"] = {}
+_POOL_LOCK = threading.Lock()
+
+
+class ETPClientPool:
+    """Picklable source of ETP sessions: each process using the pool opens its own session with `factory` on first
+    use, and reuses it afterwards (it is opened again if it was closed).
+
+    Args:
+        factory (Callable[[], ETPClient]): returns a connected client. It must be picklable to be sent to worker
+            processes (dask.distributed uses cloudpickle, which also handles lambdas).
+    """
+
+    def __init__(self, factory: Callable[[], "ETPClient"]):
+        self.factory = factory
+        self.key = uuid.uuid4().hex
+
+    def get(self) -> "ETPClient":
+        """Returns the session of this process, opened if needed."""
+        with _POOL_LOCK:
+            client = _POOL_CLIENTS.get(self.key)
+            if client is None or not client.is_connected():
+                client = self.factory()
+                _POOL_CLIENTS[self.key] = client
+            return client
+
+
+class _DaskSource:
+    """Array-like given to dask.array.from_array: each chunk is retrieved by the task that needs it."""
+
+    def __init__(
+        self,
+        client_or_pool: Union["ETPClient", ETPClientPool],
+        uri: str,
+        path_in_resource: str,
+        metadata: DataArrayMetadata,
+        timeout: int,
+    ):
+        self.client_or_pool = client_or_pool
+        self.uri = uri
+        self.path_in_resource = path_in_resource
+        self.metadata = metadata
+        self.timeout = timeout
+        self.shape = tuple(metadata.dimensions)
+        self.dtype = get_any_array_type_dtype(metadata.transport_array_type)
+        self.ndim = len(self.shape)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        client = self.client_or_pool.get() if isinstance(self.client_or_pool, ETPClientPool) else self.client_or_pool
+        return ETPArray(client, self.uri, self.path_in_resource, self.metadata, timeout=self.timeout)[key]
+
+
+def to_dask(
+    client_or_pool: Union["ETPClient", ETPClientPool],
+    uri: str,
+    path_in_resource: str,
+    chunks: Optional[Union[str, int, Sequence[Any]]] = None,
+    timeout: int = 20,
+) -> Any:
+    """Builds a dask array of a data array of the server, from its metadata.
+
+    Args:
+        client_or_pool (Union[ETPClient, ETPClientPool]): the session used by the tasks, or a pool opening one session
+            per worker process
+        uri (str): Usually the uri should be an uri of an ExternalDataArrayPart or an ExternalPartReference for resqml 2.0.1, and the uri of the object itself for resqml > 2.0.1.
+        path_in_resource (str): path to the array. Must be the same than in the original object
+        chunks (Optional[Union[str, int, Sequence[Any]]], optional): dask chunks. If None, each chunk is the largest
+            tile that fits in a message (see transfers.tile_shape). Larger chunks are retrieved in several messages.
+            Defaults to None.
+        timeout (int, optional): Defaults to 20.
+
+    Returns:
+        dask.array.Array: the lazy array
+
+    Raises:
+        ImportError: if dask is not installed
+        ValueError: if the metadata of the array cannot be retrieved
+    """
+    if da is None:
+        raise ImportError("dask module is not available: install py-etp-client[dask] to build dask arrays.")
+    client = client_or_pool.get() if isinstance(client_or_pool, ETPClientPool) else client_or_pool
+    uri = get_valid_uri_str(uri)
+    metadata = client.get_data_array_metadata(uri=uri, path_in_resource=path_in_resource, timeout=timeout).get("0")
+    if metadata is None or metadata.dimensions is None or metadata.transport_array_type is None:
+        raise ValueError(f"No metadata found for data array {uri} {path_in_resource}")
+
+    source = _DaskSource(client_or_pool, uri, path_in_resource, metadata, timeout)
+    if chunks is None:
+        chunks = tuple(
+            tile_shape(
+                source.shape,
+                get_wire_item_size(metadata.transport_array_type),
+                client.max_array_chunk_size(),
+                metadata.preferred_subarray_dimensions,
+            )
+        )
+    # The name identifies the values: the same array, unchanged since, gives the same dask keys
+    name = (
+        "etp-" + uuid.uuid5(uuid.NAMESPACE_URL, f"{uri}|{path_in_resource}|{metadata.store_last_write}|{chunks}").hex
+    )
+    return da.from_array(
+        source,
+        chunks=chunks,
+        name=name,
+        fancy=False,
+        meta=np.empty((0,) * source.ndim, dtype=source.dtype),
+    )
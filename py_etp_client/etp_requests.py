@@ -2,7 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging
 import traceback
-from typing import Any, Dict, List, Type, Union, AsyncGenerator, Optional
+from typing import Any, Dict, List, Sequence, Tuple, Type, Union, AsyncGenerator, Optional
 import uuid as pyUUID
 
 from etpproto.error import NotSupportedError
@@ -23,6 +23,7 @@ import numpy as np
 from py_etp_client import (
     Acknowledge,
     AnyArrayType,
+    AnyLogicalArrayType,
     ActiveStatusKind,
     AnyArray,
     ArrayOfBoolean,
@@ -40,6 +41,9 @@ from py_etp_client import (
     Contact,
     ContextInfo,
     ContextScopeKind,
+    DataArray,
+    DataArrayIdentifier,
+    DataArrayMetadata,
     DataObject,
     Dataspace,
     DataValue,
@@ -57,6 +61,7 @@ from py_etp_client import (
     GetDataspacesResponse,
     GetDataSubarrays,
     GetDataSubarraysResponse,
+    GetDataSubarraysType,
     GetDeletedResources,
     GetDeletedResourcesResponse,
     GetResources,
@@ -69,10 +74,17 @@ from py_etp_client import (
     ProtocolException,
     PutDataArrays,
     PutDataArraysResponse,
+    PutDataArraysType,
+    PutDataSubarrays,
+    PutDataSubarraysResponse,
+    PutDataSubarraysType,
     PutDataObjects,
     PutDataObjectsResponse,
     PutDataspaces,
     PutDataspacesResponse,
+    PutUninitializedDataArrays,
+    PutUninitializedDataArraysResponse,
+    PutUninitializedDataArrayType,
     RelationshipKind,
     RequestSession,
     Resource,
@@ -425,6 +437,29 @@ def get_any_array_type(
     return AnyArrayType.ARRAY_OF_FLOAT
 
 
+def get_any_logical_array_type(
+    dtype: str,
+) -> AnyLogicalArrayType:
+    """Get the logical type of an array of numpy type `dtype` (in the native little endian order)."""
+    logical_types = {
+        "bool": AnyLogicalArrayType.ARRAY_OF_BOOLEAN,
+        "int8": AnyLogicalArrayType.ARRAY_OF_INT8,
+        "uint8": AnyLogicalArrayType.ARRAY_OF_UINT8,
+        "int16": AnyLogicalArrayType.ARRAY_OF_INT16_LE,
+        "int32": AnyLogicalArrayType.ARRAY_OF_INT32_LE,
+        "int64": AnyLogicalArrayType.ARRAY_OF_INT64_LE,
+        "uint16": AnyLogicalArrayType.ARRAY_OF_UINT16_LE,
+        "uint32": AnyLogicalArrayType.ARRAY_OF_UINT32_LE,
+        "uint64": AnyLogicalArrayType.ARRAY_OF_UINT64_LE,
+        "float32": AnyLogicalArrayType.ARRAY_OF_FLOAT32_LE,
+        "float64": AnyLogicalArrayType.ARRAY_OF_DOUBLE64_LE,
+    }
+    dtype_str = str(dtype)
+    if dtype_str.startswith("str") or dtype_str.startswith("<U"):
+        return AnyLogicalArrayType.ARRAY_OF_STRING
+    return logical_types.get(dtype_str, AnyLogicalArrayType.ARRAY_OF_CUSTOM)
+
+
 def get_any_array_type_size(
     dtype: AnyArrayType,
 ) -> int:
@@ -439,6 +474,51 @@ def get_any_array_type_size(
     return 4
 
 
+def get_wire_item_size(data_type: Union[AnyArrayType, str, np.dtype]) -> int:
+    """Maximum size in bytes of a value of an array in an ETP message, to budget the values of a message: int and
+    long values are zig-zag varints of up to 5 and 10 bytes (for large or negative values), the others have a fixed
+    size.
+
+    Args:
+        data_type (Union[AnyArrayType, str, np.dtype]): transport type of the array, or numpy type of its values
+
+    Returns:
+        int: the size in bytes
+    """
+    array_type = data_type if isinstance(data_type, AnyArrayType) else get_any_array_type(str(data_type))
+    if array_type == AnyArrayType.ARRAY_OF_LONG:
+        return 10
+    elif array_type == AnyArrayType.ARRAY_OF_INT:
+        return 5
+    return get_any_array_type_size(array_type)
+
+
+def get_wire_size(dimensions: Sequence[int], data_type: Union[AnyArrayType, str, np.dtype]) -> int:
+    """Maximum size in bytes of the values of an array (or subarray) of these dimensions in an ETP message (see
+    get_wire_item_size).
+    """
+    return int(np.prod(dimensions, dtype=np.int64)) * get_wire_item_size(data_type)
+
+
+def get_any_array_type_dtype(
+    dtype: AnyArrayType,
+) -> np.dtype:
+    """Get the numpy type of the values of an array transported as `dtype`."""
+    if dtype == AnyArrayType.ARRAY_OF_LONG:
+        return np.dtype(np.int64)
+    elif dtype == AnyArrayType.ARRAY_OF_INT:
+        return np.dtype(np.int32)
+    elif dtype == AnyArrayType.ARRAY_OF_BOOLEAN:
+        return np.dtype(np.bool_)
+    elif dtype == AnyArrayType.ARRAY_OF_DOUBLE:
+        return np.dtype(np.float64)
+    elif dtype == AnyArrayType.ARRAY_OF_FLOAT:
+        return np.dtype(np.float32)
+    elif dtype == AnyArrayType.BYTES:
+        return np.dtype(np.uint8)
+    return np.dtype(object)
+
+
 def get_any_array(
     array: Union[List[Any], np.ndarray],
 ) -> AnyArray:
@@ -459,6 +539,285 @@ def get_any_array(
     return AnyArray(item=get_array_class_from_dtype(str(array.dtype))(values=array.tolist()))  # type: ignore
 
 
+def get_numpy_any_array(
+    array: Union[List[Any], np.ndarray],
+) -> AnyArray:
+    """Get an AnyArray instance whose values are kept as a flat numpy array (no conversion to a list).
+
+    The instance is built without validation: it is meant to be sent with the numpy encoding of the data array
+    messages (see avro_arrays), which writes the array buffer directly.
+
+    Args:
+        array (Union[List[Any], np.ndarray]): an array.
+
+    Returns:
+        AnyArray: The AnyArray instance
+    """
+    array = np.ravel(array)
+    array_class = get_array_class_from_dtype(str(array.dtype))
+    if array_class.__name__ in ("ArrayOfString", "ArrayOfBytes"):
+        return get_any_array(array)
+    return AnyArray.construct(item=array_class.construct(values=array))  # type: ignore
+
+
+def get_data_arrays(uri: str, path_in_resource: str) -> GetDataArrays:
+    return GetDataArrays(
+        dataArrays={"0": DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path_in_resource)}
+    )
+
+
+def get_data_arrays_batch(identifiers: Sequence[Tuple[str, str]]) -> GetDataArrays:
+    """GetDataArrays of many arrays, given by (uri, path_in_resource): the key of each array is its position."""
+    return GetDataArrays(
+        dataArrays={
+            str(i): DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path)
+            for i, (uri, path) in enumerate(identifiers)
+        }
+    )
+
+
+def get_data_subarrays(uri: str, path_in_resource: str, start: List[int], count: List[int]) -> GetDataSubarrays:
+    return GetDataSubarrays(
+        dataSubarrays={
+            "0": GetDataSubarraysType(
+                uid=DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path_in_resource),
+                starts=[int(s) for s in start],  # type: ignore
+                counts=[int(c) for c in count],  # type: ignore
+            )
+        }
+    )
+
+
+def get_data_subarrays_batch(
+    uri: str, path_in_resource: str, regions: Sequence[Tuple[Sequence[int], Sequence[int]]]
+) -> GetDataSubarrays:
+    """GetDataSubarrays of many regions of an array, given by (start, count): the key of each region is its position."""
+    uid = DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path_in_resource)
+    return GetDataSubarrays(
+        dataSubarrays={
+            str(i): GetDataSubarraysType(
+                uid=uid,
+                starts=[int(s) for s in start],  # type: ignore
+                counts=[int(c) for c in count],  # type: ignore
+            )
+            for i, (start, count) in enumerate(regions)
+        }
+    )
+
+
+def get_data_array_metadata(uri: str, path_in_resource: str) -> GetDataArrayMetadata:
+    return GetDataArrayMetadata(
+        dataArrays={"0": DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path_in_resource)}
+    )
+
+
+def get_data_array_metadata_batch(identifiers: Sequence[Tuple[str, str]]) -> GetDataArrayMetadata:
+    """GetDataArrayMetadata of many arrays, given by (uri, path_in_resource): the key of each array is its position."""
+    return GetDataArrayMetadata(
+        dataArrays={
+            str(i): DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path)
+            for i, (uri, path) in enumerate(identifiers)
+        }
+    )
+
+
+def create_data_array_metadata(
+    dimensions: Sequence[int],
+    data_type: Union[str, AnyArrayType] = "float64",
+    logical_array_type: Optional[AnyLogicalArrayType] = None,
+    custom_data: Optional[Dict[str, Any]] = None,
+    preferred_subarray_dimensions: Optional[Sequence[int]] = None,
+) -> DataArrayMetadata:
+    """Create the metadata of an array to put uninitialized.
+
+    Args:
+        dimensions (Sequence[int]): dimensions of the array
+        data_type (Union[str, AnyArrayType], optional): numpy type of the values, or their transport type. Defaults to "float64".
+        logical_array_type (Optional[AnyLogicalArrayType], optional): Defaults to None (deduced from a numpy data_type).
+        custom_data (Optional[Dict[str, Any]], optional): Defaults to None.
+        preferred_subarray_dimensions (Optional[Sequence[int]], optional): Defaults to None.
+
+    Returns:
+        DataArrayMetadata: the metadata
+    """
+    if logical_array_type is None:
+        logical_array_type = (
+            AnyLogicalArrayType.ARRAY_OF_CUSTOM
+            if isinstance(data_type, AnyArrayType)
+            else get_any_logical_array_type(data_type)
+        )
+    return DataArrayMetadata(
+        dimensions=[int(d) for d in dimensions],  # type: ignore
+        transportArrayType=data_type if isinstance(data_type, AnyArrayType) else get_any_array_type(data_type),
+        logicalArrayType=logical_array_type,
+        storeLastWrite=epoch(),
+        storeCreated=epoch(),
+        customData=custom_data or {},
+        preferredSubarrayDimensions=[int(d) for d in preferred_subarray_dimensions or []],  # type: ignore
+    )
+
+
+def put_uninitialized_data_arrays_batch(
+    arrays: Sequence[Tuple[str, str, DataArrayMetadata]],
+) -> PutUninitializedDataArrays:
+    """PutUninitializedDataArrays of many arrays, given by (uri, path_in_resource, metadata): the key of each array is
+    its position.
+    """
+    return PutUninitializedDataArrays(
+        dataArrays={
+            str(i): PutUninitializedDataArrayType(
+                uid=DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path), metadata=metadata
+            )
+            for i, (uri, path, metadata) in enumerate(arrays)
+        }
+    )
+
+
+def put_data_arrays(
+    uri: str, path_in_resource: str, array: Union[List[Any], np.ndarray], dimensions: List[int]
+) -> PutDataArrays:
+    return PutDataArrays(
+        dataArrays={
+            "0": PutDataArraysType(
+                uid=DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path_in_resource),
+                array=DataArray(dimensions=list(dimensions), data=get_numpy_any_array(array)),  # type: ignore
+            )
+        }
+    )
+
+
+def put_data_arrays_batch(arrays: Sequence[Tuple[str, str, Union[List[Any], np.ndarray]]]) -> PutDataArrays:
+    """PutDataArrays of many arrays, given by (uri, path_in_resource, array): the key of each array is its position."""
+    return PutDataArrays(
+        dataArrays={
+            str(i): PutDataArraysType(
+                uid=DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path),
+                array=DataArray(dimensions=list(np.shape(array)), data=get_numpy_any_array(array)),  # type: ignore
+            )
+            for i, (uri, path, array) in enumerate(arrays)
+        }
+    )
+
+
+def put_data_subarrays(
+    uri: str, path_in_resource: str, array: Union[List[Any], np.ndarray], start: List[int], count: List[int]
+) -> PutDataSubarrays:
+    # Convert all elements in count and start to built-in int (avoid numpy types for pydantic)
+    return PutDataSubarrays(
+        dataSubarrays={
+            "0": PutDataSubarraysType(
+                uid=DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path_in_resource),
+                data=get_numpy_any_array(array),
+                starts=[int(x) for x in start],  # type: ignore
+                counts=[int(x) for x in count],  # type: ignore
+            )
+        }
+    )
+
+
+# The answers of the requests above, shared by ETPClient and AsyncETPClient
+
+
+def read_data_array(gdar_msg_list: List[Message], out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+    """Values of the array "0" of GetDataArraysResponse messages, reshaped in its dimensions.
+
+    Args:
+        gdar_msg_list (List[Message]): the answer parts
+        out (Optional[np.ndarray], optional): array with the shape of the data array to write the values into.
+            Defaults to None.
+
+    Returns:
+        Optional[np.ndarray]: the array (out if given), None if the answer holds no array
+    """
+    parts = []
+    for gdar in gdar_msg_list:
+        if isinstance(gdar.body, GetDataArraysResponse) and "0" in gdar.body.data_arrays:
+            parts.append(
+                np.asarray(gdar.body.data_arrays["0"].data.item.values).reshape(  # type: ignore
+                    tuple(gdar.body.data_arrays["0"].dimensions)  # type: ignore
+                )
+            )
+        else:
+            logging.error("@get_data_array Error: %s", gdar.body)
+    if len(parts) == 0:
+        return None
+    if out is not None:
+        # Parts are concatenated along the first dimension, directly into the output array
+        np.concatenate(parts, out=out)
+        return out
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+def read_data_subarray(gdar_msg_list: List[Message], out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+    """Flat values of the subarray "0" of GetDataSubarraysResponse messages.
+
+    Args:
+        gdar_msg_list (List[Message]): the answer parts
+        out (Optional[np.ndarray], optional): array of the subarray size (any shape) to write the values into.
+            Defaults to None.
+
+    Returns:
+        Optional[np.ndarray]: the flat values (out if given), None if the answer holds no subarray
+    """
+    parts = []
+    for gdar in gdar_msg_list:
+        if isinstance(gdar.body, GetDataSubarraysResponse) and "0" in gdar.body.data_subarrays:
+            parts.append(np.asarray(gdar.body.data_subarrays["0"].data.item.values))  # type: ignore
+        else:
+            logging.error("Error: %s", gdar.body)
+    if len(parts) == 0:
+        return None
+    array = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    if out is not None:
+        out[...] = array.reshape(out.shape)
+        return out
+    return array
+
+
+def read_data_array_metadata(gdar_msg_list: List[Message]) -> Dict[str, DataArrayMetadata]:
+    """Metadata of GetDataArrayMetadataResponse messages, by key of the request."""
+    metadata = {}
+    for gdar in gdar_msg_list:
+        if isinstance(gdar.body, GetDataArrayMetadataResponse):
+            metadata.update(gdar.body.array_metadata)
+        else:
+            logging.error("Error: %s", gdar.body)
+    return metadata
+
+
+def read_put_uninitialized_data_array(pdar_msg_list: List[Message]) -> bool:
+    """True if the array "0" of a PutUninitializedDataArrays request has been put."""
+    for pdar in pdar_msg_list:
+        if isinstance(pdar.body, PutUninitializedDataArraysResponse):
+            return pdar.body.success.get("0", None) is not None
+        else:
+            logging.error("Error: %s", pdar.body)
+    return False
+
+
+def read_put_data_arrays(pdar_msg_list: List[Message]) -> Dict[str, bool]:
+    """Success of a PutDataArrays request, by key of the request."""
+    res = {}
+    for pdar in pdar_msg_list:
+        if isinstance(pdar.body, PutDataArraysResponse):
+            res.update(pdar.body.success)
+        else:
+            logging.info("Data array put failed: %s ==> %s", pdar, pdar.body)
+    return res
+
+
+def read_put_data_subarray(
+    psar_msg_list: List[Message],
+) -> Optional[Union[PutDataSubarraysResponse, ProtocolException]]:
+    """Answer of a PutDataSubarrays request: the response, or the ProtocolException of the server."""
+    for psar in psar_msg_list:
+        if isinstance(psar.body, (PutDataSubarraysResponse, ProtocolException)):
+            return psar.body
+        else:
+            logging.info("Data subarray put failed: %s ==> %s", psar, psar.body)
+    return None
+
+
 #    _____                              __           __   __
 #   / ___/__  ______  ____  ____  _____/ /____  ____/ /  / /___  ______  ___  _____
 #   \__ \/ / / / __ \/ __ \/ __ \/ ___/ __/ _ \/ __  /  / __/ / / / __ \/ _ \/ ___/
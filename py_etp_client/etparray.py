@@ -0,0 +1,171 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Lazy proxy of a data array stored on an ETP server.
+
+ETPArray exposes the shape and type of an array from its metadata, and turns numpy-style indexing into
+GetDataSubarrays requests: only the bounding box of the selected values travels over the wire.
+
+Example:
+    ```python
+    arr = client.array(uri, "/RESQML/values")
+    print(arr.shape, arr.dtype)
+    layer = arr[100:200, :, 5]  # a numpy array, retrieved with GetDataSubarrays
+    ```
+"""
+import math
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+import numpy as np
+
+from py_etp_client import DataArrayMetadata
+from py_etp_client.etp_requests import get_any_array_type_dtype
+
+if TYPE_CHECKING:
+    from py_etp_client.etpclient import ETPClient
+
+
+def index_region(key: Any, shape: Tuple[int, ...]) -> Tuple[List[int], List[int], Tuple[Any, ...]]:
+    """Translates a numpy index of an array of the given shape into the region to retrieve and the index to apply
+    to it.
+
+    Integers, slices (with any step), Ellipsis, None and integer or boolean sequences are supported. The region is
+    the bounding box of the selected values along each dimension.
+
+    Args:
+        key (Any): the numpy index
+        shape (Tuple[int, ...]): shape of the array
+
+    Returns:
+        Tuple[List[int], List[int], Tuple[Any, ...]]: the (starts, counts) of the region and the index of the
+        selection within the region: array[key] == region[local_key]
+
+    Raises:
+        IndexError: if the index is out of bounds or has too many dimensions
+        TypeError: for an unsupported index type
+    """
+    key = key if isinstance(key, tuple) else (key,)
+    nb_dims = sum(1 for k in key if k is not None and k is not Ellipsis)
+    if nb_dims > len(shape):
+        raise IndexError(f"too many indices for array: array is {len(shape)}-dimensional, but {nb_dims} were indexed")
+    if any(k is Ellipsis for k in key):
+        i = next(i for i, k in enumerate(key) if k is Ellipsis)
+        key = key[:i] + (slice(None),) * (len(shape) - nb_dims) + key[i + 1 :]
+    else:
+        key = key + (slice(None),) * (len(shape) - nb_dims)
+
+    starts: List[int] = []
+    counts: List[int] = []
+    local: List[Any] = []
+    dim = 0
+    for k in key:
+        if k is None:
+            local.append(None)
+            continue
+        size = shape[dim]
+        dim += 1
+        if isinstance(k, slice):
+            selected = range(*k.indices(size))
+            if len(selected) == 0:
+                starts.append(0)
+                counts.append(0)
+                local.append(slice(0, 0))
+                continue
+            low, high = min(selected), max(selected) + 1
+            stop = selected.stop - low
+            local.append(slice(selected.start - low, stop if stop >= 0 else None, selected.step))
+        elif isinstance(k, (int, np.integer)):
+            if not -size <= k < size:
+                raise IndexError(f"index {k} is out of bounds for axis {dim - 1} with size {size}")
+            low = int(k) % size
+            high = low + 1
+            local.append(0)
+        else:
+            # An empty list selects nothing, as an empty array of indices
+            indices = np.asarray(k, dtype=np.intp) if np.size(k) == 0 else np.asarray(k)
+            if indices.dtype == np.bool_:
+                if indices.shape != (size,):
+                    raise IndexError(f"boolean index of shape {indices.shape} does not match axis {dim - 1}")
+                indices = np.flatnonzero(indices)
+            elif indices.dtype.kind not in "iu":
+                raise TypeError(f"Unsupported index {k!r}")
+            if indices.size and (indices.min() < -size or indices.max() >= size):
+                raise IndexError(f"index out of bounds for axis {dim - 1} with size {size}")
+            indices = indices % size if size else indices
+            low = int(indices.min()) if indices.size else 0
+            high = int(indices.max()) + 1 if indices.size else 0
+            local.append(indices - low)
+        starts.append(low)
+        counts.append(high - low)
+    return starts, counts, tuple(local)
+
+
+class ETPArray:
+    """Lazy data array of an ETP server: see ETPClient.array.
+
+    Indexing it (arr[100:200, :, 5]) retrieves the selected region with GetDataSubarrays messages and returns a numpy
+    array. np.asarray(arr) retrieves the whole array.
+    """
+
+    def __init__(
+        self,
+        client: "ETPClient",
+        uri: str,
+        path_in_resource: str,
+        metadata: DataArrayMetadata,
+        max_parallel: int = 1,
+        timeout: int = 20,
+    ):
+        self.client = client
+        self.uri = uri
+        self.path_in_resource = path_in_resource
+        self.metadata = metadata
+        self.max_parallel = max_parallel
+        self.timeout = timeout
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(self.metadata.dimensions)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return get_any_array_type_dtype(self.metadata.transport_array_type)
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return math.prod(self.shape)
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        if not self.shape:
+            raise TypeError("len() of unsized object")
+        return self.shape[0]
+
+    def __repr__(self) -> str:
+        return f"ETPArray({self.uri!r}, {self.path_in_resource!r}, shape={self.shape}, dtype={self.dtype})"
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        starts, counts, local = index_region(key, self.shape)
+        region = self.client.get_data_subarray_safe(
+            self.uri,
+            self.path_in_resource,
+            start=starts,
+            count=counts,
+            timeout=self.timeout,
+            max_parallel=self.max_parallel,
+            metadata=self.metadata,
+        )
+        if region is None:
+            raise RuntimeError(f"Failed to get {starts} + {counts} of {self.uri} {self.path_in_resource}")
+        return region[local]
+
+    def __array__(self, dtype: Optional[Any] = None, copy: Optional[bool] = None) -> np.ndarray:
+        array = self[...]
+        return array if dtype is None else array.astype(dtype)
@@ -39,11 +39,13 @@ Example Usage:
 
 For detailed information about the event listener system, see ETPSimpleClient documentation.
 """
+import contextlib
 import json
+import math
 import os
 import logging
-from time import perf_counter, sleep
-from typing import Any, Dict, List, Optional, Union, Tuple
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union, Tuple
 
 import numpy as np
 from energyml.utils.uri import Uri as ETPUri
@@ -51,21 +53,63 @@ from energyml.utils.epc import Epc
 from energyml.utils.constants import epoch
 from py_etp_client.auth import AuthConfig
 from py_etp_client.etpconfig import ETPConfig, ServerConfig
-from py_etp_client.etp_requests import get_any_array_type, get_any_array_type_size, read_energyml_obj
+from py_etp_client.etp_requests import (
+    get_any_array_type,
+    get_any_array_type_dtype,
+    get_any_array_type_size,
+    get_wire_item_size,
+    get_wire_size,
+    read_energyml_obj,
+)
 
 
+from py_etp_client.array_cache import ArrayChunkCache, CacheTicket
+from py_etp_client.array_sinks import ArraySink, open_array_sink
+from py_etp_client.correlation import gather_futures, map_future
+from py_etp_client.etparray import ETPArray
+from py_etp_client.transfer_journal import TransferJournal
+from py_etp_client.transfers import (
+    ChunkStatus,
+    ChunkTransferError,
+    ProgressCallback,
+    chunk_slices,
+    grid_chunks,
+    iter_chunks,
+    merge_regions,
+    pack_bins,
+    plan_chunks,
+    run_chunks,
+)
 from py_etp_client.etpsimpleclient import ETPSimpleClient
 from py_etp_client import RequestSession, GetDataObjects
-from etpproto.connection import ETPConnection, ConnectionType
+from etpproto.connection import CommunicationProtocol, ETPConnection, ConnectionType
+from etpproto.messages import Message
 
 
 from py_etp_client.etp_requests import (
     create_data_object,
     get_any_array,
+    get_data_array_metadata,
+    get_data_array_metadata_batch,
+    get_data_arrays,
+    get_data_arrays_batch,
+    create_data_array_metadata,
+    get_data_subarrays,
+    get_data_subarrays_batch,
     get_dataspaces,
     get_resources,
     get_supported_types,
+    put_data_arrays,
+    put_data_arrays_batch,
+    put_data_subarrays,
     put_dataspace,
+    put_uninitialized_data_arrays_batch,
+    read_data_array,
+    read_data_array_metadata,
+    read_data_subarray,
+    read_put_data_arrays,
+    read_put_data_subarray,
+    read_put_uninitialized_data_array,
 )
 from py_etp_client.utils import (
     get_valid_uri_str,
@@ -123,6 +167,20 @@ from py_etp_client import (
     PutUninitializedDataArrayType,
 )
 
+# Room left in a message for its header, the array identifiers and the Avro framing of the values
+MESSAGE_ENVELOPE_SIZE = 4096
+# Room taken in a multi-array message by the key, the dimensions and the Avro framing of each array, besides its
+# uri and path
+ARRAY_ENTRY_OVERHEAD = 64
+
+# Identifies a data array: (uri, path_in_resource)
+DataArrayKey = Tuple[str, str]
+
+
+def _array_entry_overhead(key: DataArrayKey, dimensions: Sequence[int]) -> int:
+    """Estimated size of an array in a multi-array message, besides its values."""
+    return ARRAY_ENTRY_OVERHEAD + len(key[0]) + len(key[1]) + 10 * len(dimensions)
+
 
 def get_type_size(data_type: str) -> int:
     """
@@ -145,6 +203,23 @@ def get_type_size(data_type: str) -> int:
             raise NotImplementedError(f"Unknown data type: {data_type}")
 
 
+def _resolved_future(value: Any) -> Future:
+    """A future already resolved with value, e.g. for a request answered from the array cache."""
+    future: Future = Future()
+    future.set_result(value)
+    return future
+
+
+def _check_put_data_subarray(
+    response: Optional[Union[PutDataSubarraysResponse, ProtocolException]],
+) -> PutDataSubarraysResponse:
+    """Raises a RuntimeError if a PutDataSubarrays request was not successful."""
+    if not isinstance(response, PutDataSubarraysResponse):
+        message = response.error.message if isinstance(response, ProtocolException) and response.error else response
+        raise RuntimeError(f"PutDataSubarrays failed: {message}")
+    return response
+
+
 class ETPClient(ETPSimpleClient):
     """
     High-level ETP (Energistics Transfer Protocol) client with advanced functionality.
@@ -212,6 +287,14 @@ class ETPClient(ETPSimpleClient):
     - get_data_arrays(): Retrieve data arrays
     - put_data_arrays(): Store data arrays
 
+    Data Array Cache:
+    ----------------
+    Setting `client.array_cache = ArrayChunkCache(max_bytes)` keeps the arrays and subarrays received by
+    get_data_array, get_data_subarray and get_data_array_safe, so that reading them again costs no round trip.
+    The writes of the client drop the cached chunks of the arrays written. Each chunk is kept with the
+    storeLastWrite of its array, as last seen in its metadata: get_data_array_safe, which requests the metadata,
+    never serves the values of an array modified by another client since they were cached.
+
     See ETPSimpleClient documentation for detailed information about the event listener system.
     """
 
@@ -269,6 +352,8 @@ class ETPClient(ETPSimpleClient):
         )
 
         self.active_transaction = None
+        # Opt-in cache of the data array chunks received (see ArrayChunkCache)
+        self.array_cache: Optional[ArrayChunkCache] = None
 
     def start_and_wait_connected(self, timeout: int = 10) -> bool:
         """Start the client and wait until connected or timeout.
@@ -278,11 +363,7 @@ class ETPClient(ETPSimpleClient):
         Returns:
             bool: True if the client is connected, False if timeout occurs.
         """
-        self.start()
-        start_time = perf_counter()
-        while not self.is_connected() and perf_counter() - start_time < timeout:
-            sleep(0.25)
-        return self.is_connected()
+        return self.start(timeout=timeout)
 
     #    ______
     #   / ____/___  ________
@@ -299,7 +380,14 @@ class ETPClient(ETPSimpleClient):
         Returns:
             bool: True if the server is reachable
         """
-        ping_msg_list = self.send_and_wait(Ping(currentDateTime=epoch()), timeout=timeout)
+        return self._read_ping(self.send_and_wait(Ping(currentDateTime=epoch()), timeout=timeout))
+
+    def ping_future(self, timeout: int = 5) -> "Future[bool]":
+        """Same as ping, without waiting: the returned future is resolved with True if the server answered."""
+        return map_future(self.send_async(Ping(currentDateTime=epoch()), timeout=timeout), self._read_ping)
+
+    @staticmethod
+    def _read_ping(ping_msg_list: List[Message]) -> bool:
         for ping_msg in ping_msg_list:
             if isinstance(ping_msg.body, ProtocolException):
                 return False
@@ -341,8 +429,14 @@ class ETPClient(ETPSimpleClient):
         Returns:
             List[Dataspace]: List of dataspaces
         """
-        gdr_msg_list = self.send_and_wait(get_dataspaces(), timeout=timeout)
+        return self._read_dataspaces(self.send_and_wait(get_dataspaces(), timeout=timeout))
+
+    def get_dataspaces_future(self, timeout: int = 5) -> "Future[Union[List[Dataspace], ProtocolException]]":
+        """Same as get_dataspaces, without waiting: the returned future is resolved with the dataspaces list."""
+        return map_future(self.send_async(get_dataspaces(), timeout=timeout), self._read_dataspaces)
 
+    @staticmethod
+    def _read_dataspaces(gdr_msg_list: List[Message]) -> Union[List[Dataspace], ProtocolException]:
         datasapaces = []
         for gdr_msg in gdr_msg_list:
             if isinstance(gdr_msg.body, GetDataspacesResponse):
@@ -526,7 +620,28 @@ class ETPClient(ETPSimpleClient):
             get_resources(get_valid_uri_str(uri), depth, scope, types_filter, include_edges=include_edges),
             timeout=timeout,
         )
+        return self._read_resources(gr_msg_list)
+
+    def get_resources_future(
+        self,
+        uri: Optional[Union[str, ETPUri]] = None,
+        depth: int = 1,
+        scope: str = "self",
+        types_filter: Optional[List[str]] = None,
+        include_edges: bool = False,
+        timeout=10,
+    ) -> "Future[Union[List[Resource], ProtocolException]]":
+        """Same as get_resources, without waiting: the returned future is resolved with the resources list."""
+        return map_future(
+            self.send_async(
+                get_resources(get_valid_uri_str(uri), depth, scope, types_filter, include_edges=include_edges),
+                timeout=timeout,
+            ),
+            self._read_resources,
+        )
 
+    @staticmethod
+    def _read_resources(gr_msg_list: List[Message]) -> Union[List[Resource], ProtocolException]:
         resources = []
         for gr in gr_msg_list:
             if isinstance(gr.body, GetResourcesResponse):
@@ -617,9 +732,40 @@ class ETPClient(ETPSimpleClient):
         Returns:
             Union[Dict[str, str], List[str], str]: Returns a dict of uris and data if uris is a dict, a list of data if uris is a list, or a single data if uris is a string
         """
-        uris_dict = reshape_uris_as_str_dict(uris)
+        batches = self._split_by_response_count(reshape_uris_as_str_dict(uris), CommunicationProtocol.STORE.value)
+        if len(batches) == 1:
+            gdor_msg_list = self.send_and_wait(GetDataObjects(uris=batches[0], format=format_), timeout=timeout)
+        else:
+            # The server does not answer more than MaxResponseCount objects per request: batches are pipelined
+            futures = [self.send_async(GetDataObjects(uris=b, format=format_), timeout=timeout) for b in batches]
+            gdor_msg_list = [msg for msgs in self.wait_future(gather_futures(futures)) for msg in msgs]
+        return self._read_data_objects(uris, gdor_msg_list)
+
+    def get_data_object_future(
+        self, uris: T_UriSingleOrGrouped, format_: str = "xml", timeout: int = 5
+    ) -> "Future[Optional[Union[Dict[str, str], List[str], str, ProtocolException]]]":
+        """Same as get_data_object, without waiting: the returned future is resolved with the data object(s)."""
+        batches = self._split_by_response_count(reshape_uris_as_str_dict(uris), CommunicationProtocol.STORE.value)
+        futures = [self.send_async(GetDataObjects(uris=b, format=format_), timeout=timeout) for b in batches]
+        return map_future(
+            gather_futures(futures),
+            lambda msgs_by_batch: self._read_data_objects(uris, [msg for msgs in msgs_by_batch for msg in msgs]),
+        )
 
-        gdor_msg_list = self.send_and_wait(GetDataObjects(uris=uris_dict, format=format_), timeout=timeout)
+    def _split_by_response_count(self, uris_dict: Dict[str, str], protocol: int) -> List[Dict[str, str]]:
+        """Splits the uris of a request in batches of at most MaxResponseCount elements (one batch if the server
+        does not set this capability).
+        """
+        max_count = self.get_capability("MaxResponseCount", protocol)
+        if not max_count or len(uris_dict) <= max_count:
+            return [uris_dict]
+        items = list(uris_dict.items())
+        return [dict(items[i : i + max_count]) for i in range(0, len(items), max_count)]
+
+    @staticmethod
+    def _read_data_objects(
+        uris: T_UriSingleOrGrouped, gdor_msg_list: List[Message]
+    ) -> Optional[Union[Dict[str, str], List[str], str, ProtocolException]]:
         data_obj = {}
 
         for gdor in gdor_msg_list:
@@ -831,45 +977,49 @@ class ETPClient(ETPSimpleClient):
     # /_____/\__,_/\__/\__,_/_/  |_/_/  /_/   \__,_/\__, /
     #                                              /____/
 
-    def get_data_array(self, uri: Union[str, ETPUri], path_in_resource: str, timeout: int = 5) -> Optional[np.ndarray]:
+    def get_data_array(
+        self, uri: Union[str, ETPUri], path_in_resource: str, timeout: int = 5, out: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
         """Get an array from the server.
 
         Args:
             uri (Union[str, ETPUri]): Usually the uri should be an uri of an ExternalDataArrayPart or an ExternalPartReference.
             path_in_resource (str): path to the array. Must be the same than in the original object
             timeout (int, optional): Defaults to 5.
+            out (Optional[np.ndarray], optional): array with the shape of the data array to write the values into,
+                instead of allocating a new one. Defaults to None.
 
         Returns:
             np.ndarray: the array, reshaped in the correct dimension
         """
-        uri = get_valid_uri_str(uri)
-        gdar_msg_list = self.send_and_wait(
-            GetDataArrays(dataArrays={"0": DataArrayIdentifier(uri=uri, pathInResource=path_in_resource)}),
-            timeout=timeout,
+        ticket = self._cache_ticket(uri, path_in_resource)
+        cached = self._read_cached_array(ticket, out)
+        if cached is not None:
+            return cached
+        gdar_msg_list = self.send_and_wait(get_data_arrays(uri, path_in_resource), timeout=timeout)
+        return self._cache_array(ticket, read_data_array(gdar_msg_list, out))
+
+    def get_data_array_future(
+        self, uri: Union[str, ETPUri], path_in_resource: str, timeout: int = 5, out: Optional[np.ndarray] = None
+    ) -> "Future[Optional[np.ndarray]]":
+        """Same as get_data_array, without waiting: the returned future is resolved with the array."""
+        ticket = self._cache_ticket(uri, path_in_resource)
+        cached = self._read_cached_array(ticket, out)
+        if cached is not None:
+            return _resolved_future(cached)
+        return map_future(
+            self.send_async(get_data_arrays(uri, path_in_resource), timeout=timeout),
+            lambda gdar_msg_list: self._cache_array(ticket, read_data_array(gdar_msg_list, out)),
         )
-        array = None
-        for gdar in gdar_msg_list:
-            if isinstance(gdar.body, GetDataArraysResponse) and "0" in gdar.body.data_arrays:
-                # print(gdar)
-                if array is None:
-                    array = np.array(gdar.body.data_arrays["0"].data.item.values).reshape(  # type: ignore
-                        tuple(gdar.body.data_arrays["0"].dimensions)  # type: ignore
-                    )
-                else:
-                    array = np.concatenate(
-                        (
-                            array,
-                            np.array(gdar.body.data_arrays["0"].data.item.values).reshape(  # type: ignore
-                                tuple(gdar.body.data_arrays["0"].dimensions)  # type: ignore
-                            ),
-                        )
-                    )
-            else:
-                logging.error("@get_data_array Error: %s", gdar.body)
-        return array
 
     def get_data_subarray(
-        self, uri: Union[str, ETPUri], path_in_resource: str, start: List[int], count: List[int], timeout: int = 5
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        start: List[int],
+        count: List[int],
+        timeout: int = 5,
+        out: Optional[np.ndarray] = None,
     ) -> Optional[np.ndarray]:
         """Get a sub part of an array from the server.
 
@@ -879,38 +1029,78 @@ class ETPClient(ETPSimpleClient):
             start (List[int]): start indices in each dimensions.
             count (List[int]): Count of element in each dimensions.
             timeout (int, optional): Defaults to 5.
+            out (Optional[np.ndarray], optional): array of `count` values (any shape, e.g. a slice of a larger array)
+                to write the values into. Defaults to None.
 
         Returns:
             Optional[np.ndarray]: the array, NOT reshaped in the correct dimension. The result is a flat array !
+                If out is given, out is returned.
         """
-        start = [int(s) for s in start]
-        count = [int(c) for c in count]
-        gdar_msg_list = self.send_and_wait(
-            GetDataSubarrays(
-                dataSubarrays={
-                    "0": GetDataSubarraysType(
-                        uid=DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path_in_resource),
-                        starts=start,  # type: ignore
-                        counts=count,  # type: ignore
-                    )
-                }
-            ),
-            timeout=timeout,
+        ticket = self._cache_ticket(uri, path_in_resource, start, count)
+        cached = self._read_cached_array(ticket, out)
+        if cached is not None:
+            return cached
+        gdar_msg_list = self.send_and_wait(get_data_subarrays(uri, path_in_resource, start, count), timeout=timeout)
+        return self._cache_array(ticket, read_data_subarray(gdar_msg_list, out))
+
+    def get_data_subarray_future(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        start: List[int],
+        count: List[int],
+        timeout: int = 5,
+        out: Optional[np.ndarray] = None,
+    ) -> "Future[Optional[np.ndarray]]":
+        """Same as get_data_subarray, without waiting: the returned future is resolved with the flat subarray."""
+        ticket = self._cache_ticket(uri, path_in_resource, start, count)
+        cached = self._read_cached_array(ticket, out)
+        if cached is not None:
+            return _resolved_future(cached)
+        return map_future(
+            self.send_async(get_data_subarrays(uri, path_in_resource, start, count), timeout=timeout),
+            lambda gdar_msg_list: self._cache_array(ticket, read_data_subarray(gdar_msg_list, out)),
         )
-        array = None
-        for gdar in gdar_msg_list:
-            if isinstance(gdar.body, GetDataSubarraysResponse) and "0" in gdar.body.data_subarrays:
-                # print(gdar)
-                if array is None:
-                    array = np.array(gdar.body.data_subarrays["0"].data.item.values)  # type: ignore
-                else:
-                    array = np.concatenate(
-                        (array, np.array(gdar.body.data_subarrays["0"].data.item.values)),  # type: ignore
-                    )
-            else:
-                logging.error("Error: %s", gdar.body)
+
+    def _cache_ticket(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        start: Optional[Sequence[int]] = None,
+        count: Optional[Sequence[int]] = None,
+    ) -> Optional[CacheTicket]:
+        """Ticket of an array (or of a subarray) in the array cache, None if there is no cache."""
+        if self.array_cache is None:
+            return None
+        return self.array_cache.ticket(get_valid_uri_str(uri), path_in_resource, start, count)
+
+    def _read_cached_array(self, ticket: Optional[CacheTicket], out: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Values of a cached array or subarray, copied into out if given. None if they are not cached."""
+        cached = self.array_cache.get(ticket) if ticket is not None and self.array_cache is not None else None
+        if cached is None:
+            return None
+        if out is not None:
+            out[...] = cached.reshape(out.shape)
+            return out
+        return cached.copy()
+
+    def _cache_array(self, ticket: Optional[CacheTicket], array: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Keeps the values received for a ticket in the array cache, and returns them."""
+        if ticket is not None and array is not None and self.array_cache is not None:
+            # Subarrays are kept flat, as get_data_subarray returns them
+            self.array_cache.put(ticket, array if ticket.key[2] is None else array.reshape(-1))
         return array
 
+    def _invalidate_cached_array(self, uri: Union[str, ETPUri], path_in_resource: str):
+        """Drops the cached chunks of an array written by this client."""
+        if self.array_cache is not None:
+            self.array_cache.invalidate(get_valid_uri_str(uri), path_in_resource)
+
+    def _set_store_last_write(self, uri: Union[str, ETPUri], path_in_resource: str, metadata: DataArrayMetadata):
+        """Records the storeLastWrite of an array in the array cache, from its metadata."""
+        if self.array_cache is not None:
+            self.array_cache.set_store_last_write(get_valid_uri_str(uri), path_in_resource, metadata.store_last_write)
+
     def get_data_array_metadata(
         self, uri: Union[str, ETPUri], path_in_resource: str, timeout: int = 5
     ) -> Dict[str, DataArrayMetadata]:
@@ -924,20 +1114,80 @@ class ETPClient(ETPSimpleClient):
         Returns:
             Dict[str, Any]: metadata of the array
         """
-        gdar_msg_list = self.send_and_wait(
-            GetDataArrayMetadata(
-                dataArrays={"0": DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path_in_resource)}
-            ),
-            timeout=timeout,
+        gdar_msg_list = self.send_and_wait(get_data_array_metadata(uri, path_in_resource), timeout=timeout)
+        return self._read_data_array_metadata(uri, path_in_resource, gdar_msg_list)
+
+    def get_data_array_metadata_future(
+        self, uri: Union[str, ETPUri], path_in_resource: str, timeout: int = 5
+    ) -> "Future[Dict[str, DataArrayMetadata]]":
+        """Same as get_data_array_metadata, without waiting: the returned future is resolved with the metadata."""
+        return map_future(
+            self.send_async(get_data_array_metadata(uri, path_in_resource), timeout=timeout),
+            lambda gdar_msg_list: self._read_data_array_metadata(uri, path_in_resource, gdar_msg_list),
         )
-        metadata = {}
-        for gdar in gdar_msg_list:
-            if isinstance(gdar.body, GetDataArrayMetadataResponse):
-                metadata.update(gdar.body.array_metadata)
-            else:
-                logging.error("Error: %s", gdar.body)
+
+    def _read_data_array_metadata(
+        self, uri: Union[str, ETPUri], path_in_resource: str, gdar_msg_list: List[Message]
+    ) -> Dict[str, DataArrayMetadata]:
+        """Metadata of an array read in the answer, its storeLastWrite being recorded in the array cache."""
+        metadata = read_data_array_metadata(gdar_msg_list)
+        if "0" in metadata:
+            self._set_store_last_write(uri, path_in_resource, metadata["0"])
         return metadata
 
+    def get_data_arrays_metadata(
+        self,
+        identifiers: Sequence[Tuple[Union[str, ETPUri], str]],
+        timeout: int = 5,
+        max_parallel: int = 1,
+        retries: int = 0,
+    ) -> Dict[DataArrayKey, DataArrayMetadata]:
+        """Get the metadata of many arrays from the server, in as few messages as the message size and the
+        MaxResponseCount capability of the server allow.
+
+        Args:
+            identifiers (Sequence[Tuple[Union[str, ETPUri], str]]): (uri, path_in_resource) of each array
+            timeout (int, optional): Defaults to 5.
+            max_parallel (int, optional): maximum number of requests in flight. Defaults to 1.
+            retries (int, optional): number of times a failed request is sent again. Defaults to 0.
+
+        Returns:
+            Dict[DataArrayKey, DataArrayMetadata]: the metadata by (uri, path_in_resource). The arrays unknown to the server are missing.
+        """
+        keys = list(dict.fromkeys((get_valid_uri_str(uri), path) for uri, path in identifiers))
+        result: Dict[DataArrayKey, DataArrayMetadata] = {}
+        bins = self._pack_array_entries(keys, [_array_entry_overhead(k, []) for k in keys])
+
+        def _get_bin(i: int) -> "Future[Dict[DataArrayKey, DataArrayMetadata]]":
+            return map_future(
+                self.send_async(get_data_array_metadata_batch(bins[i]), timeout=timeout),
+                lambda msgs: {bins[i][int(k)]: m for k, m in read_data_array_metadata(msgs).items()} or None,
+            )
+
+        failures = run_chunks(
+            len(bins),
+            _get_bin,
+            max_parallel=max_parallel,
+            retries=retries,
+            on_chunk=lambda i, metadata, _: result.update(metadata),
+            poll=self.pending_requests.expire,
+            fail_fast=False,
+        )
+        for failure in failures:
+            logging.error(f"Failed to get the metadata of the data arrays {bins[failure.chunk]}: {failure.cause}")
+        for (uri, path), metadata in result.items():
+            self._set_store_last_write(uri, path, metadata)
+        return result
+
+    def _pack_array_entries(
+        self, keys: List[DataArrayKey], sizes: List[int], max_msg_size: Optional[int] = None
+    ) -> List[List[DataArrayKey]]:
+        """Groups the arrays of a multi-array request into messages of at most max_msg_size bytes (max_array_chunk_size()
+        by default) and MaxResponseCount arrays.
+        """
+        max_count = self.get_capability("MaxResponseCount", CommunicationProtocol.DATA_ARRAY.value)
+        return [[keys[i] for i in b] for b in pack_bins(sizes, max_msg_size or self.max_array_chunk_size(), max_count)]
+
     def put_uninitialized_data_array(
         self,
         uri: Union[str, ETPUri],
@@ -964,35 +1214,75 @@ class ETPClient(ETPSimpleClient):
 
         print(" datatype", data_type if isinstance(data_type, AnyArrayType) else get_any_array_type(data_type))
         uri = get_valid_uri_str(uri)
+        self._invalidate_cached_array(uri, path_in_resource)
+        metadata = create_data_array_metadata(
+            dimensions, data_type, logical_array_type, custom_data, preffered_subarray_dimensions
+        )
         pdar_msg_list = self.send_and_wait(
-            PutUninitializedDataArrays(
-                dataArrays={
-                    "0": PutUninitializedDataArrayType(
-                        uid=DataArrayIdentifier(uri=uri, pathInResource=path_in_resource),
-                        metadata=DataArrayMetadata(
-                            dimensions=dimensions,  # type: ignore
-                            transportArrayType=(
-                                data_type if isinstance(data_type, AnyArrayType) else get_any_array_type(data_type)
-                            ),
-                            logicalArrayType=logical_array_type,
-                            storeLastWrite=epoch(),
-                            storeCreated=epoch(),
-                            customData=custom_data or {},
-                            preferredSubarrayDimensions=preffered_subarray_dimensions or [],  # type: ignore
-                        ),
-                    )
-                }
-            ),
-            timeout=timeout,
+            put_uninitialized_data_arrays_batch([(uri, path_in_resource, metadata)]), timeout=timeout
         )
+        return read_put_uninitialized_data_array(pdar_msg_list)
+
+    def put_uninitialized_data_arrays(
+        self,
+        arrays: Dict[Tuple[Union[str, ETPUri], str], DataArrayMetadata],
+        timeout: int = 5,
+        max_parallel: int = 1,
+        retries: int = 0,
+    ) -> Dict[DataArrayKey, bool]:
+        """Put many uninitialized data arrays to the server, in as few messages as the message size and the
+        MaxResponseCount capability of the server allow.
+
+        Args:
+            arrays (Dict[Tuple[Union[str, ETPUri], str], DataArrayMetadata]): the metadata of the arrays by (uri, path_in_resource) (see etp_requests.create_data_array_metadata)
+            timeout (int, optional): Defaults to 5.
+            max_parallel (int, optional): maximum number of requests in flight. Defaults to 1.
+            retries (int, optional): number of times a failed request is sent again. Defaults to 0.
 
+        Returns:
+            Dict[DataArrayKey, bool]: by (uri, path_in_resource), True if the array has been successfully put
+        """
+        metadata = {(get_valid_uri_str(uri), path): m for (uri, path), m in arrays.items()}
+        keys = list(metadata)
+        for key in keys:
+            self._invalidate_cached_array(*key)
+        result = {key: False for key in keys}
+        bins = self._pack_array_entries(keys, [_array_entry_overhead(k, metadata[k].dimensions) for k in keys])
+
+        def _put_bin(i: int) -> "Future[Dict[DataArrayKey, bool]]":
+            request = put_uninitialized_data_arrays_batch(
+                [(uri, path, metadata[(uri, path)]) for uri, path in bins[i]]
+            )
+            return map_future(
+                self.send_async(request, timeout=timeout),
+                lambda msgs: self._read_put_uninitialized_data_arrays(bins[i], msgs),
+            )
+
+        failures = run_chunks(
+            len(bins),
+            _put_bin,
+            max_parallel=max_parallel,
+            retries=retries,
+            on_chunk=lambda i, success, _: result.update(success),
+            poll=self.pending_requests.expire,
+            fail_fast=False,
+        )
+        for failure in failures:
+            logging.error(f"Failed to put the uninitialized data arrays {bins[failure.chunk]}: {failure.cause}")
+        return result
+
+    @staticmethod
+    def _read_put_uninitialized_data_arrays(
+        keys: List[DataArrayKey], pdar_msg_list: List[Message]
+    ) -> Optional[Dict[DataArrayKey, bool]]:
+        success = {}
         for pdar in pdar_msg_list:
             if isinstance(pdar.body, PutUninitializedDataArraysResponse):
-                print(pdar.body)
-                return pdar.body.success.get("0", None) is not None
+                success.update({keys[int(k)]: True for k in pdar.body.success})
             else:
                 logging.error("Error: %s", pdar.body)
-        return False
+        # None if nothing was stored: the message is sent again if retries are allowed
+        return success or None
 
     def put_data_array(
         self,
@@ -1014,29 +1304,26 @@ class ETPClient(ETPSimpleClient):
         Returns:
             (Dict[str, bool]): A map of uri and a boolean indicating if the array has been successfully put
         """
-        if isinstance(dimensions, tuple):
-            dimensions = list(dimensions)
-
+        self._invalidate_cached_array(uri, path_in_resource)
         pdar_msg_list = self.send_and_wait(
-            PutDataArrays(
-                dataArrays={
-                    "0": PutDataArraysType(
-                        uid=DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path_in_resource),
-                        array=DataArray(dimensions=dimensions, data=get_any_array(array)),  # type: ignore
-                    )
-                }
-            ),
-            timeout=timeout,
+            put_data_arrays(uri, path_in_resource, array, list(dimensions)), timeout=timeout
         )
+        return read_put_data_arrays(pdar_msg_list)
 
-        res = {}
-        for pdar in pdar_msg_list:
-            if isinstance(pdar.body, PutDataArraysResponse):
-                res.update(pdar.body.success)
-            else:
-                logging.info("Data array put failed: %s ==> %s", pdar, pdar.body)
-
-        return res
+    def put_data_array_future(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        array: Union[np.ndarray, list],
+        dimensions: Union[List[int], Tuple[int, ...]],
+        timeout: int = 5,
+    ) -> "Future[Dict[str, bool]]":
+        """Same as put_data_array, without waiting: the returned future is resolved with the success map."""
+        self._invalidate_cached_array(uri, path_in_resource)
+        return map_future(
+            self.send_async(put_data_arrays(uri, path_in_resource, array, list(dimensions)), timeout=timeout),
+            read_put_data_arrays,
+        )
 
     def put_data_subarray(
         self,
@@ -1060,33 +1347,34 @@ class ETPClient(ETPSimpleClient):
         Returns:
             (Optional[Union[PutDataSubarraysResponse, ProtocolException]]): A map of uri and a boolean indicating if the sub array has been successfully put
         """
-
-        # Convert all elements in count and start to built-in int (avoid numpy types for pydantic)
-        count_py = [int(x) for x in count]
-        start_py = [int(x) for x in start]
+        self._invalidate_cached_array(uri, path_in_resource)
         psar_msg_list = self.send_and_wait(
-            PutDataSubarrays(
-                dataSubarrays={
-                    "0": PutDataSubarraysType(
-                        uid=DataArrayIdentifier(uri=get_valid_uri_str(uri), pathInResource=path_in_resource),
-                        data=get_any_array(array),
-                        starts=start_py,  # type: ignore
-                        counts=count_py,  # type: ignore
-                    )
-                }
-            ),
-            timeout=timeout,
+            put_data_subarrays(uri, path_in_resource, array, start, count), timeout=timeout
         )
+        return read_put_data_subarray(psar_msg_list)
 
-        for psar in psar_msg_list:
-            if isinstance(psar.body, PutDataSubarraysResponse):
-                return psar.body
-            elif isinstance(psar.body, ProtocolException):
-                return psar.body
-            else:
-                logging.info("Data subarray put failed: %s ==> %s", psar, psar.body)
+    def put_data_subarray_future(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        array: Union[np.ndarray, list],
+        start: List[int],
+        count: List[int],
+        timeout: int = 5,
+    ) -> "Future[Optional[Union[PutDataSubarraysResponse, ProtocolException]]]":
+        """Same as put_data_subarray, without waiting: the returned future is resolved with the server answer."""
+        self._invalidate_cached_array(uri, path_in_resource)
+        return map_future(
+            self.send_async(put_data_subarrays(uri, path_in_resource, array, start, count), timeout=timeout),
+            read_put_data_subarray,
+        )
 
-        return None
+    def max_array_chunk_size(self) -> int:
+        """Maximum size in bytes of the array values sent or received in a single message: the effective message
+        size limit of the session (see max_message_size), minus room for the message header and the array
+        identifiers. The values are budgeted at their encoded size (see etp_requests.get_wire_item_size).
+        """
+        return max(1, self.max_message_size() - MESSAGE_ENVELOPE_SIZE)
 
     def put_data_array_safe(
         self,
@@ -1095,105 +1383,205 @@ class ETPClient(ETPSimpleClient):
         array: np.ndarray,
         max_subarray_size: Optional[int] = None,
         timeout: int = 5,
+        max_parallel: int = 1,
+        retries: int = 0,
+        on_progress: Optional[ProgressCallback] = None,
+        report: Optional[List[ChunkStatus]] = None,
+        preferred_subarray_dimensions: Optional[List[int]] = None,
+        journal: Optional[Union[str, os.PathLike]] = None,
     ) -> Optional[Dict[str, bool]]:
         """Put a data array to the server.
         If the array overflow the maximum message size, it will be split in several subarrays and put using multiple PutDataSubarrays messages.
+        The subarrays are N-dimensional tiles, as large as the message size allows (see transfers.plan_chunks).
+        With max_parallel > 1, several PutDataSubarrays requests are kept in flight on the session. A failed subarray is sent again
+        (up to `retries` times) without stopping the others.
 
         Args:
             uri (Union[str, ETPUri]): Usually the uri should be an uri of an ExternalDataArrayPart or an ExternalPartReference.
             path_in_resource (str): path to the array. Must be the same than in the original object
             array (np.ndarray): a flat array,
-            max_subarray_size (Optional[int], optional): Maximum size of a subarray in bytes. If None, the value of the server capability "MaxWebSocketMessagePayloadSize" will be used. Defaults to None.
+            max_subarray_size (Optional[int], optional): Maximum size of a subarray in bytes. If None, max_array_chunk_size() is used. Defaults to None.
             timeout (int, optional): Defaults to 5.
+            max_parallel (int, optional): maximum number of subarray requests in flight. Defaults to 1.
+            retries (int, optional): number of times a failed subarray request is sent again. Defaults to 0.
+            on_progress (Optional[ProgressCallback], optional): called with (subarrays sent, number of subarrays) after each subarray. Defaults to None.
+            report (Optional[List[ChunkStatus]], optional): if given, filled with the status of each subarray (or of the whole array if it is sent in a single message). Defaults to None.
+            preferred_subarray_dimensions (Optional[List[int]], optional): preferred subarray dimensions, announced to the server with the uninitialized array and used to align the subarrays. Defaults to None.
+            journal (Optional[Union[str, os.PathLike]], optional): journal file of the subarrays sent (see transfer_journal.TransferJournal). If it records an interrupted upload of this array, and the array still exists on the server, the array is not put uninitialized again and the subarrays already sent with the same values are skipped. Defaults to None.
 
         Returns:
-            Optional[Dict[str, bool]]: A map of uri and a boolean indicating if the array has been successfully put
+            Optional[Dict[str, bool]]: A map of uri and a boolean indicating if the array has been successfully put (all its subarrays)
         """
         uri = get_valid_uri_str(uri)
         if not isinstance(array, np.ndarray):
             array = np.asarray(array)
         total_size_bytes = array.nbytes
-        max_msg_size = (
-            max_subarray_size
-            or self.spec.client_info.getCapability("MaxWebSocketMessagePayloadSize")  # type: ignore
-            or 1048576
-        )  # 1 MB by default
+        max_array_size = self.get_capability("MaxDataArraySize", CommunicationProtocol.DATA_ARRAY.value)
+        if max_array_size and total_size_bytes > max_array_size:
+            logging.error(f"Array size {total_size_bytes} bytes exceeds the server MaxDataArraySize {max_array_size}")
+            return None
+        max_msg_size = max_subarray_size or self.max_array_chunk_size()
         logging.info(f"Array size: {total_size_bytes} bytes, Max message size: {max_msg_size} bytes")
-        if total_size_bytes <= max_msg_size:
+        if array.size * get_wire_item_size(array.dtype) <= max_msg_size:
             # The array can be sent in a single PutDataArrays message
             dimensions = list(array.shape)
-            return self.put_data_array(
+            res = self.put_data_array(
                 uri=uri,
                 path_in_resource=path_in_resource,
-                array=array.flatten(),
+                array=array.ravel(),
                 dimensions=dimensions,
                 timeout=timeout,
             )
+            if report is not None:
+                report.append(ChunkStatus(0, [0] * len(dimensions), dimensions, success=bool(res), attempts=1))
+            return res
         else:
             # The array must be split in several subarrays and sent using multiple PutDataSubarrays messages
             logging.info("Array is too large to be sent in a single message, splitting it in subarrays...")
             dimensions = list(array.shape)
             data_type = str(array.dtype)
-            type_size = get_type_size(data_type)
-            if type_size is None:
-                logging.error(f"Cannot determine size of data type {data_type}")
-                return None
-            logging.info(f"Array dimensions: {dimensions}, Data type: {data_type}, Type size: {type_size} bytes")
+            type_size = get_wire_item_size(data_type)
+            logging.info(f"Array dimensions: {dimensions}, Data type: {data_type}, Wire size: {type_size} bytes")
             # Now, we can determine how to split the array in subarrays
-            # We will try to split the array along the first dimension
-            dim0 = dimensions[0]
-            other_dims = dimensions[1:]
-            other_dims_size = np.prod(other_dims) if len(other_dims) > 0 else 1
-            max_dim0_count = max_msg_size // (other_dims_size * type_size)
-            if max_dim0_count > dim0:
-                max_dim0_count = dim0
-            if max_dim0_count == 0:
-                logging.error(
-                    "Cannot split array, max message size is too small for the array dimensions and data type"
-                )
+            try:
+                tiles = plan_chunks(dimensions, type_size, max_msg_size, preferred_subarray_dimensions)
+            except ValueError as e:
+                logging.error(e)
                 return None
-            logging.info(f"Splitting array along first dimension in chunks of {max_dim0_count} (total {dim0} chunks)")
+            logging.info(f"Splitting array in {len(tiles)} subarrays of at most {tiles[0][1]}")
+
+            with TransferJournal(journal) if journal is not None else contextlib.nullcontext() as journal_file:
+                transfer = {
+                    "operation": "put",
+                    "uri": uri,
+                    "path_in_resource": path_in_resource,
+                    "dimensions": dimensions,
+                    "data_type": data_type,
+                }
+                resumed = journal_file is not None and journal_file.load(transfer)
+                if resumed:
+                    # The upload is resumed only if the array put uninitialized is still there, with the same type,
+                    # and if nobody else wrote it since the last chunk recorded
+                    metadata = self.get_data_array_metadata(uri, path_in_resource, timeout=timeout).get("0")
+                    resumed = (
+                        metadata is not None
+                        and list(metadata.dimensions) == dimensions
+                        and metadata.transport_array_type == get_any_array_type(data_type)
+                        and metadata.store_last_write == journal_file.store_last_write
+                    )
+                if not resumed:
+                    # Starting by putting an uninitialized data array
+                    if not self.put_uninitialized_data_array(
+                        uri=uri,
+                        path_in_resource=path_in_resource,
+                        data_type=data_type,
+                        dimensions=dimensions,
+                        preffered_subarray_dimensions=preferred_subarray_dimensions,
+                        timeout=timeout,
+                    ):
+                        logging.error(f"Failed to put uninitialized data array for {uri}")
+                        return None
+                    logging.info(f"Uninitialized data array put successfully for {uri}")
+                    if journal_file is not None:
+                        journal_file.begin(transfer)
+
+                # Now, we can send the array in chunks using PutDataSubarrays messages
+                return self._put_data_array_subarrays(
+                    uri,
+                    path_in_resource,
+                    array,
+                    tiles,
+                    timeout=timeout,
+                    max_parallel=max_parallel,
+                    retries=retries,
+                    on_progress=on_progress,
+                    report=report,
+                    journal=journal_file,
+                )
 
-            # Starting by putting an uninitialized data array
-            if not self.put_uninitialized_data_array(
-                uri=uri,
-                path_in_resource=path_in_resource,
-                data_type=data_type,
-                dimensions=dimensions,
-                timeout=timeout,
-            ):
-                logging.error(f"Failed to put uninitialized data array for {uri}")
-                return None
-            logging.info(f"Uninitialized data array put successfully for {uri}")
-
-            # Now, we can send the array in chunks using PutDataSubarrays messages
-            res = {}
-            nb_splits = (dim0 + max_dim0_count - 1) // max_dim0_count
-            logging.info(f"Sending array in {nb_splits} subarrays...")
-            for start0 in range(0, dim0, max_dim0_count):
-                count0 = min(max_dim0_count, dim0 - start0)
-                start = [start0] + [0] * (len(dimensions) - 1)
-                count = [count0] + other_dims
-                subarray = array[start0 : start0 + count0].flatten()
-                logging.info(
-                    f"[{start0 // max_dim0_count} / {nb_splits}] Sending subarray starting at {start} with count {count} (size {subarray.nbytes} bytes)"
+    def _put_data_array_subarrays(
+        self,
+        uri: str,
+        path_in_resource: str,
+        array: np.ndarray,
+        tiles: List[Tuple[List[int], List[int]]],
+        timeout: int = 5,
+        max_parallel: int = 1,
+        retries: int = 0,
+        on_progress: Optional[ProgressCallback] = None,
+        report: Optional[List[ChunkStatus]] = None,
+        journal: Optional[TransferJournal] = None,
+    ) -> Dict[str, bool]:
+        """Sends the tiles of an array, once it has been put uninitialized (see put_data_array_safe). The tiles
+        recorded in the journal with the same values are skipped, the others are recorded once sent, followed by the
+        storeLastWrite of the array read in its metadata.
+        """
+        chunks = [ChunkStatus(i, starts, counts) for i, (starts, counts) in enumerate(tiles)]
+        if journal is not None:
+            for chunk in chunks:
+                chunk.success = journal.is_done(
+                    chunk.starts, chunk.counts, array[chunk_slices(chunk.starts, chunk.counts)]
                 )
-                psar_response = self.put_data_subarray(
+        pending = [chunk for chunk in chunks if not chunk.success]
+        nb_splits = len(pending)
+        logging.info(
+            f"Sending array in {nb_splits} subarrays ({max_parallel} in parallel), "
+            f"{len(chunks) - nb_splits} already sent"
+        )
+
+        def _put_chunk(i: int) -> "Future[PutDataSubarraysResponse]":
+            chunk = pending[i]
+            subarray = array[chunk_slices(chunk.starts, chunk.counts)].ravel()
+            logging.debug(
+                f"[{i} / {nb_splits}] Sending subarray starting at {chunk.starts} with count {chunk.counts} (size {subarray.nbytes} bytes)"
+            )
+            return map_future(
+                self.put_data_subarray_future(
                     uri=uri,
                     path_in_resource=path_in_resource,
                     array=subarray,
-                    start=start,
-                    count=count,  # type: ignore
+                    start=chunk.starts,
+                    count=chunk.counts,
                     timeout=timeout,
-                )
-                if psar_response is None or (isinstance(psar_response, ProtocolException)):
-                    logging.error(f"Failed to put subarray starting at {start} with count {count}: {psar_response}")
-                    res[uri] = False
-                    break
-                else:
-                    res[uri] = True
+                ),
+                _check_put_data_subarray,
+            )
 
-            return res if len(res) > 0 else None
+        def _on_chunk(i: int, _: Any, attempts: int):
+            chunk = pending[i]
+            chunk.success = True
+            chunk.attempts = attempts
+            if journal is not None:
+                journal.record(chunk.starts, chunk.counts, array[chunk_slices(chunk.starts, chunk.counts)])
+                try:
+                    metadata = self.get_data_array_metadata(uri, path_in_resource, timeout=timeout).get("0")
+                except Exception as e:
+                    # Without the storeLastWrite, the upload will start over instead of being resumed
+                    logging.warning(f"Failed to read the metadata of {uri} {path_in_resource}: {e}")
+                    return
+                if metadata is not None:
+                    journal.record_store_last_write(metadata.store_last_write)
+
+        failures = run_chunks(
+            nb_splits,
+            _put_chunk,
+            max_parallel=max_parallel,
+            retries=retries,
+            on_progress=on_progress,
+            on_chunk=_on_chunk,
+            poll=self.pending_requests.expire,
+            fail_fast=False,
+        )
+        for failure in failures:
+            chunk = pending[failure.chunk]
+            chunk.attempts = failure.attempts
+            chunk.error = str(failure.cause)
+            logging.error(
+                f"Failed to put subarray starting at {chunk.starts} with count {chunk.counts}: {failure.cause}"
+            )
+        if report is not None:
+            report.extend(chunks)
+        return {uri: len(failures) == 0}
 
     def get_data_array_safe(
         self,
@@ -1201,23 +1589,66 @@ class ETPClient(ETPSimpleClient):
         path_in_resource: str,
         max_subarray_size: Optional[int] = None,
         timeout: int = 20,
+        out: Optional[np.ndarray] = None,
+        max_parallel: int = 1,
+        retries: int = 0,
+        on_progress: Optional[ProgressCallback] = None,
+        journal: Optional[Union[str, os.PathLike]] = None,
     ) -> Optional[np.ndarray]:
         """Get a data array from the server.
         After getting data array metadata, the array is retrieved in multiple subarrays using multiple GetDataSubarrays messages if necessary.
+        The subarrays are N-dimensional tiles, as large as the message size allows and aligned on the preferredSubarrayDimensions of the metadata.
+        The result is allocated once from the metadata (or given with `out`) and each subarray is written into its slice as soon as it is received.
+        With max_parallel > 1, several GetDataSubarrays requests are kept in flight on the session.
         Args:
             uri (Union[str, ETPUri]): Usually the uri should be an uri of an ExternalDataArrayPart or an ExternalPartReference for resqml 2.0.1, and the uri of the object itself for resqml > 2.0.1.
             path_in_resource (str): path to the array. Must be the same than in the original object
-            max_subarray_size (Optional[int], optional): Maximum size of a subarray in bytes. If None, the value of the server capability "MaxWebSocketMessagePayloadSize" will be used. Defaults to None.
+            max_subarray_size (Optional[int], optional): Maximum size of a subarray in bytes. If None, max_array_chunk_size() is used. Defaults to None.
             timeout (int, optional): Defaults to 20.
+            out (Optional[np.ndarray], optional): array with the dimensions of the data array to write the values into (e.g. a memory mapped file). Defaults to None.
+            max_parallel (int, optional): maximum number of subarray requests in flight. Defaults to 1.
+            retries (int, optional): number of times a failed subarray request is sent again. Defaults to 0.
+            on_progress (Optional[ProgressCallback], optional): called with (subarrays received, number of subarrays) after each subarray. Defaults to None.
+            journal (Optional[Union[str, os.PathLike]], optional): journal file of the subarrays written into out, which must then be kept between the attempts (e.g. a memory mapped file, see transfer_journal.TransferJournal). If it records an interrupted download of this version of the array, the subarrays already in out with the same values are skipped. Defaults to None.
         Returns:
-            Optional[np.ndarray]: the array, reshaped in the correct dimension
+            Optional[np.ndarray]: the array, reshaped in the correct dimension (out if given). None if a subarray could not be retrieved.
+        Raises:
+            ValueError: if out does not have the dimensions of the data array, or if a journal is given without out
         """
+        if journal is not None and out is None:
+            raise ValueError("A journal requires an out array, kept between the attempts (e.g. a np.memmap)")
         uri = get_valid_uri_str(uri)
         metadata_dict = self.get_data_array_metadata(uri=uri, path_in_resource=path_in_resource, timeout=timeout)
         if "0" not in metadata_dict:
             logging.error(f"No metadata found for data array {uri} {path_in_resource}")
             return None
-        metadata = metadata_dict["0"]
+        return self._get_data_array_with_metadata(
+            uri,
+            path_in_resource,
+            metadata_dict["0"],
+            max_subarray_size=max_subarray_size,
+            timeout=timeout,
+            out=out,
+            max_parallel=max_parallel,
+            retries=retries,
+            on_progress=on_progress,
+            journal=journal,
+        )
+
+    def _get_data_array_with_metadata(
+        self,
+        uri: str,
+        path_in_resource: str,
+        metadata: DataArrayMetadata,
+        max_subarray_size: Optional[int] = None,
+        timeout: int = 20,
+        out: Optional[np.ndarray] = None,
+        max_parallel: int = 1,
+        retries: int = 0,
+        on_progress: Optional[ProgressCallback] = None,
+        journal: Optional[Union[str, os.PathLike]] = None,
+    ) -> Optional[np.ndarray]:
+        """get_data_array_safe, once the metadata of the array is known."""
         if metadata.dimensions is None or len(metadata.dimensions) == 0:
             logging.error(f"No dimensions found in metadata for data array {uri} {path_in_resource}")
             return None
@@ -1226,70 +1657,705 @@ class ETPClient(ETPSimpleClient):
             logging.error(f"No transportArrayType found in metadata for data array {uri} {path_in_resource}")
             return None
         data_type = metadata.transport_array_type
-        type_size = get_any_array_type_size(data_type)
-        if type_size is None:
-            logging.error(f"Cannot determine size of data type {data_type}")
-            return None
+        type_size = get_wire_item_size(data_type)
+        if out is not None and tuple(out.shape) != tuple(dimensions):
+            raise ValueError(f"out has shape {out.shape}, the data array has dimensions {list(dimensions)}")
         total_size_bytes = type_size * np.prod(dimensions)
-        max_msg_size = (
-            max_subarray_size
-            or self.spec.client_info.getCapability("MaxWebSocketMessagePayloadSize")  # type: ignore
-            or 1048576
-        )  # 1 MB by default
+        max_msg_size = max_subarray_size or self.max_array_chunk_size()
         logging.info(f"Array size: {total_size_bytes} bytes, Max message size: {max_msg_size} bytes")
         if total_size_bytes <= max_msg_size:
             # The array can be retrieved in a single GetDataArrays message
-            return self.get_data_array(uri=uri, path_in_resource=path_in_resource, timeout=timeout)
+            return self.get_data_array(uri=uri, path_in_resource=path_in_resource, timeout=timeout, out=out)
         else:
             # The array must be retrieved in several subarrays using multiple GetDataSubarrays messages
             logging.info("Array is too large to be retrieved in a single message, splitting it in subarrays...")
-            dimensions = list(dimensions)
-            # Now, we can determine how to split the array in subarrays
-            # We will try to split the array along the first dimension
-            dim0 = dimensions[0]
-            other_dims = dimensions[1:]
-            other_dims_size = np.prod(other_dims) if len(other_dims) > 0 else 1  # type: ignore
-            max_dim0_count = max_msg_size // (other_dims_size * type_size)
-            if max_dim0_count > dim0:  # type: ignore
-                max_dim0_count = dim0
-            if max_dim0_count == 0:
-                logging.error(
-                    "Cannot split array, max message size is too small for the array dimensions and data type"
+            with TransferJournal(journal) if journal is not None else contextlib.nullcontext() as journal_file:
+                if journal_file is not None:
+                    journal_file.resume(self._download_transfer(uri, path_in_resource, metadata))
+                return self.get_data_subarray_safe(
+                    uri,
+                    path_in_resource,
+                    start=[0] * len(dimensions),
+                    count=list(dimensions),
+                    max_subarray_size=max_subarray_size,
+                    timeout=timeout,
+                    out=out,
+                    max_parallel=max_parallel,
+                    retries=retries,
+                    on_progress=on_progress,
+                    metadata=metadata,
+                    journal=journal_file,
                 )
+
+    @staticmethod
+    def _download_transfer(uri: str, path_in_resource: str, metadata: DataArrayMetadata) -> Dict[str, Any]:
+        """Description of the download of a version of an array, for its journal."""
+        return {
+            "operation": "get",
+            "uri": uri,
+            "path_in_resource": path_in_resource,
+            "dimensions": list(metadata.dimensions),
+            "data_type": str(get_any_array_type_dtype(metadata.transport_array_type)),
+            "store_last_write": metadata.store_last_write,
+        }
+
+    def get_data_subarray_safe(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        start: List[int],
+        count: List[int],
+        max_subarray_size: Optional[int] = None,
+        timeout: int = 20,
+        out: Optional[np.ndarray] = None,
+        max_parallel: int = 1,
+        retries: int = 0,
+        on_progress: Optional[ProgressCallback] = None,
+        metadata: Optional[DataArrayMetadata] = None,
+        journal: Optional[TransferJournal] = None,
+    ) -> Optional[np.ndarray]:
+        """Get a sub part of a data array from the server, reshaped to count.
+        The region is retrieved in multiple subarrays using multiple GetDataSubarrays messages if it overflows the maximum message size (see get_data_array_safe).
+        Args:
+            uri (Union[str, ETPUri]): Usually the uri should be an uri of an ExternalDataArrayPart or an ExternalPartReference for resqml 2.0.1, and the uri of the object itself for resqml > 2.0.1.
+            path_in_resource (str): path to the array. Must be the same than in the original object
+            start (List[int]): start indices in each dimensions.
+            count (List[int]): Count of element in each dimensions.
+            max_subarray_size (Optional[int], optional): Maximum size of a subarray in bytes. If None, max_array_chunk_size() is used. Defaults to None.
+            timeout (int, optional): Defaults to 20.
+            out (Optional[np.ndarray], optional): array of shape count to write the values into. Defaults to None.
+            max_parallel (int, optional): maximum number of subarray requests in flight. Defaults to 1.
+            retries (int, optional): number of times a failed subarray request is sent again. Defaults to 0.
+            on_progress (Optional[ProgressCallback], optional): called with (subarrays received, number of subarrays) after each subarray. Defaults to None.
+            metadata (Optional[DataArrayMetadata], optional): metadata of the array, requested to the server if None. Defaults to None.
+            journal (Optional[TransferJournal], optional): started journal of the subarrays written into out: the subarrays it records with the values found in out are skipped, the others are recorded once received. Defaults to None.
+        Returns:
+            Optional[np.ndarray]: the region of the array (out if given). None if a subarray could not be retrieved.
+        Raises:
+            ValueError: if the region is outside of the array, or if out does not have the shape count
+        """
+        uri = get_valid_uri_str(uri)
+        if metadata is None:
+            metadata = self.get_data_array_metadata(uri=uri, path_in_resource=path_in_resource, timeout=timeout).get(
+                "0"
+            )
+            if metadata is None or metadata.transport_array_type is None:
+                logging.error(f"No metadata found for data array {uri} {path_in_resource}")
                 return None
-            logging.info(f"Splitting array along first dimension in chunks of {max_dim0_count} (total {dim0} chunks)")
-
-            # Now, we can get the array in chunks using GetDataSubarrays messages
-            array = None
-            nb_splits = (dim0 + max_dim0_count - 1) // max_dim0_count  # type: ignore
-            logging.info(f"Retrieving array in {nb_splits} subarrays...")
-            for start0 in range(0, dim0, max_dim0_count):  # type: ignore
-                logging.debug("Progress: %d / %d", start0 // max_dim0_count, nb_splits)  # type: ignore
-                count0 = min(max_dim0_count, dim0 - start0)  # type: ignore
-                start = [start0] + [0] * (len(dimensions) - 1)
-                count = [count0] + other_dims
-                logging.info(
-                    f"[{start0 // max_dim0_count} / {nb_splits}] Retrieving subarray starting at {start} with count {count}"  # type: ignore
+        dimensions = list(metadata.dimensions)
+        if (
+            len(start) != len(dimensions)
+            or len(count) != len(dimensions)
+            or any(s < 0 or c < 0 or s + c > d for s, c, d in zip(start, count, dimensions))
+        ):
+            raise ValueError(f"Region {list(start)} + {list(count)} is outside of the data array {dimensions}")
+        if out is not None and tuple(out.shape) != tuple(count):
+            raise ValueError(f"out has shape {out.shape}, the region has dimensions {list(count)}")
+        data_type = metadata.transport_array_type
+        array = out if out is not None else np.empty(tuple(count), dtype=get_any_array_type_dtype(data_type))
+        if array.size == 0:
+            return array
+        # The region is split in subarrays, aligned on the preferred ones of the store
+        try:
+            tiles = plan_chunks(
+                count,
+                get_wire_item_size(data_type),
+                max_subarray_size or self.max_array_chunk_size(),
+                metadata.preferred_subarray_dimensions,
+            )
+        except ValueError as e:
+            logging.error(e)
+            return None
+        # Position of the subarrays in the array, and in the result
+        chunks = [
+            ([s + t for s, t in zip(start, tile_start)], tile_count, tile_start) for tile_start, tile_count in tiles
+        ]
+        if journal is not None:
+            chunks = [
+                (chunk_start, tile_count, tile_start)
+                for chunk_start, tile_count, tile_start in chunks
+                if not journal.is_done(chunk_start, tile_count, array[chunk_slices(tile_start, tile_count)])
+            ]
+        nb_splits = len(chunks)
+        logging.info(
+            f"Retrieving {list(count)} values in {nb_splits} subarrays ({max_parallel} in parallel), "
+            f"{len(tiles) - nb_splits} already retrieved"
+        )
+
+        # The subarrays are written in place in the result
+        def _get_chunk(i: int) -> "Future[Optional[np.ndarray]]":
+            chunk_start, tile_count, tile_start = chunks[i]
+            logging.debug(f"[{i} / {nb_splits}] Retrieving subarray starting at {chunk_start} with count {tile_count}")
+            return self.get_data_subarray_future(
+                uri=uri,
+                path_in_resource=path_in_resource,
+                start=chunk_start,
+                count=tile_count,
+                timeout=timeout,
+                out=array[chunk_slices(tile_start, tile_count)],
+            )
+
+        def _on_chunk(i: int, values: np.ndarray, _: int):
+            if journal is not None:
+                journal.record(chunks[i][0], chunks[i][1], values)
+
+        try:
+            run_chunks(
+                nb_splits,
+                _get_chunk,
+                max_parallel=max_parallel,
+                retries=retries,
+                on_progress=on_progress,
+                on_chunk=_on_chunk,
+                poll=self.pending_requests.expire,
+            )
+        except ChunkTransferError as e:
+            logging.error(f"Failed to get subarray {e.chunk} of {uri} {path_in_resource}: {e.cause}")
+            return None
+
+        return array
+
+    def get_data_subarrays(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        regions: Sequence[Tuple[Sequence[int], Sequence[int]]],
+        max_subarray_size: Optional[int] = None,
+        timeout: int = 20,
+        max_parallel: int = 1,
+        retries: int = 0,
+        metadata: Optional[DataArrayMetadata] = None,
+    ) -> List[Optional[np.ndarray]]:
+        """Get many sub parts of a data array from the server, in as few messages as possible (e.g. every Nth layer of
+        a grid).
+
+        The regions that overlap or touch are merged first (see transfers.merge_regions). The merged regions are
+        then packed together in GetDataSubarrays messages, each one holding as many regions as the message size and
+        the MaxResponseCount capability of the server allow. A merged region too large for a message is retrieved in
+        several subarrays, as with get_data_subarray_safe.
+
+        Args:
+            uri (Union[str, ETPUri]): Usually the uri should be an uri of an ExternalDataArrayPart or an ExternalPartReference for resqml 2.0.1, and the uri of the object itself for resqml > 2.0.1.
+            path_in_resource (str): path to the array. Must be the same than in the original object
+            regions (Sequence[Tuple[Sequence[int], Sequence[int]]]): (start, count) of each region
+            max_subarray_size (Optional[int], optional): Maximum size of the values of a message in bytes. If None, max_array_chunk_size() is used. Defaults to None.
+            timeout (int, optional): Defaults to 20.
+            max_parallel (int, optional): maximum number of requests in flight. Defaults to 1.
+            retries (int, optional): number of times a failed request is sent again. Defaults to 0.
+            metadata (Optional[DataArrayMetadata], optional): metadata of the array, requested to the server if None. Defaults to None.
+
+        Returns:
+            List[Optional[np.ndarray]]: the values of each region, reshaped to its count. None for the regions that
+            could not be retrieved (or for all of them if the metadata of the array is not found).
+
+        Raises:
+            ValueError: if a region is outside of the array
+        """
+        uri = get_valid_uri_str(uri)
+        if metadata is None:
+            metadata = self.get_data_array_metadata(uri=uri, path_in_resource=path_in_resource, timeout=timeout).get(
+                "0"
+            )
+            if metadata is None or metadata.transport_array_type is None:
+                logging.error(f"No metadata found for data array {uri} {path_in_resource}")
+                return [None] * len(regions)
+        dimensions = list(metadata.dimensions)
+        for start, count in regions:
+            if (
+                len(start) != len(dimensions)
+                or len(count) != len(dimensions)
+                or any(s < 0 or c < 0 or s + c > d for s, c, d in zip(start, count, dimensions))
+            ):
+                raise ValueError(f"Region {list(start)} + {list(count)} is outside of the data array {dimensions}")
+        dtype = get_any_array_type_dtype(metadata.transport_array_type)
+        max_msg_size = max_subarray_size or self.max_array_chunk_size()
+
+        result: List[Optional[np.ndarray]] = [None] * len(regions)
+        wanted = [i for i, (_, count) in enumerate(regions) if math.prod(count) > 0]
+        for i in set(range(len(regions))) - set(wanted):
+            result[i] = np.empty(tuple(regions[i][1]), dtype=dtype)
+        boxes, owners = merge_regions([regions[i] for i in wanted])
+        values: List[Optional[np.ndarray]] = [None] * len(boxes)
+
+        small: List[int] = []
+        sizes: List[int] = []
+        large: List[int] = []
+        for b, (start, count) in enumerate(boxes):
+            values[b] = self._read_cached_array(self._cache_ticket(uri, path_in_resource, start, count), None)
+            if values[b] is not None:
+                continue
+            size = get_wire_size(count, dtype) + _array_entry_overhead((uri, path_in_resource), count)
+            if size <= max_msg_size:
+                small.append(b)
+                sizes.append(size)
+            else:
+                large.append(b)
+        max_count = self.get_capability("MaxResponseCount", CommunicationProtocol.DATA_ARRAY.value)
+        bins = [[small[i] for i in b] for b in pack_bins(sizes, max_msg_size, max_count)]
+        logging.info(
+            f"Retrieving {len(regions)} regions as {len(boxes)} merged regions: {len(small)} in {len(bins)} messages "
+            f"and {len(large)} in subarrays"
+        )
+
+        def _get_bin(i: int) -> "Future[Dict[int, np.ndarray]]":
+            tickets = [self._cache_ticket(uri, path_in_resource, *boxes[b]) for b in bins[i]]
+            request = get_data_subarrays_batch(uri, path_in_resource, [boxes[b] for b in bins[i]])
+            return map_future(
+                self.send_async(request, timeout=timeout),
+                lambda msgs: {
+                    bins[i][k]: self._cache_array(tickets[k], array)
+                    for k, array in (self._read_data_subarrays(msgs) or {}).items()
+                }
+                or None,
+            )
+
+        def _on_bin(i: int, received: Dict[int, np.ndarray], _: int):
+            for b, array in received.items():
+                values[b] = array
+
+        failures = run_chunks(
+            len(bins),
+            _get_bin,
+            max_parallel=max_parallel,
+            retries=retries,
+            on_chunk=_on_bin,
+            poll=self.pending_requests.expire,
+            fail_fast=False,
+        )
+        for failure in failures:
+            logging.error(f"Failed to get the regions {[boxes[b] for b in bins[failure.chunk]]}: {failure.cause}")
+        for b in large:
+            values[b] = self.get_data_subarray_safe(
+                uri,
+                path_in_resource,
+                start=boxes[b][0],
+                count=boxes[b][1],
+                max_subarray_size=max_subarray_size,
+                timeout=timeout,
+                max_parallel=max_parallel,
+                retries=retries,
+                metadata=metadata,
+            )
+
+        # Each region is cut out of the merged region containing it
+        shared = [owners.count(b) > 1 for b in range(len(boxes))]
+        for i, b in zip(wanted, owners):
+            box = values[b]
+            if box is None:
+                continue
+            start, count = regions[i]
+            local = chunk_slices([s - bs for s, bs in zip(start, boxes[b][0])], count)
+            region = box.reshape(boxes[b][1])[local]
+            result[i] = region.copy() if shared[b] else region
+        return result
+
+    @staticmethod
+    def _read_data_subarrays(gdar_msg_list: List[Message]) -> Optional[Dict[int, np.ndarray]]:
+        """The flat values of a GetDataSubarrays answer by position of the region, None if there are none."""
+        values = {}
+        for gdar in gdar_msg_list:
+            if isinstance(gdar.body, GetDataSubarraysResponse):
+                values.update(
+                    {int(k): np.asarray(sub.data.item.values) for k, sub in gdar.body.data_subarrays.items()}  # type: ignore
                 )
-                subarray = self.get_data_subarray(
-                    uri=uri,
-                    path_in_resource=path_in_resource,
-                    start=start,
-                    count=count,  # type: ignore
-                    timeout=timeout,
+            else:
+                logging.error("Error: %s", gdar.body)
+        return values or None
+
+    def array(
+        self, uri: Union[str, ETPUri], path_in_resource: str, max_parallel: int = 1, timeout: int = 20
+    ) -> ETPArray:
+        """Get a lazy proxy of a data array: its shape and dtype come from the metadata of the array, and indexing it
+        (e.g. arr[100:200, :, 5]) only retrieves the selected region, with GetDataSubarrays messages.
+
+        Args:
+            uri (Union[str, ETPUri]): Usually the uri should be an uri of an ExternalDataArrayPart or an ExternalPartReference for resqml 2.0.1, and the uri of the object itself for resqml > 2.0.1.
+            path_in_resource (str): path to the array. Must be the same than in the original object
+            max_parallel (int, optional): maximum number of subarray requests in flight for a selection. Defaults to 1.
+            timeout (int, optional): Defaults to 20.
+
+        Returns:
+            ETPArray: the lazy array
+        Raises:
+            ValueError: if the metadata of the array cannot be retrieved
+        """
+        uri = get_valid_uri_str(uri)
+        metadata = self.get_data_array_metadata(uri=uri, path_in_resource=path_in_resource, timeout=timeout).get("0")
+        if metadata is None or metadata.dimensions is None or metadata.transport_array_type is None:
+            raise ValueError(f"No metadata found for data array {uri} {path_in_resource}")
+        return ETPArray(self, uri, path_in_resource, metadata, max_parallel=max_parallel, timeout=timeout)
+
+    def get_data_array_to(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        sink: ArraySink,
+        max_subarray_size: Optional[int] = None,
+        timeout: int = 20,
+        max_parallel: int = 1,
+        retries: int = 0,
+        on_progress: Optional[ProgressCallback] = None,
+        journal: Optional[Union[str, os.PathLike]] = None,
+    ) -> bool:
+        """Get a data array from the server straight into a np.memmap, an h5py.Dataset or a file.
+        The array is retrieved in subarrays (see get_data_array_safe). Each subarray is written to its slice of the
+        sink as soon as it is received, then dropped: at most max_parallel subarrays are held in memory, so arrays
+        larger than the memory can be downloaded.
+
+        Args:
+            uri (Union[str, ETPUri]): Usually the uri should be an uri of an ExternalDataArrayPart or an ExternalPartReference for resqml 2.0.1, and the uri of the object itself for resqml > 2.0.1.
+            path_in_resource (str): path to the array. Must be the same than in the original object
+            sink (ArraySink): a np.memmap (or any numpy array) or an h5py.Dataset with the dimensions of the data array, or a file path: a .h5/.hdf5 file (the array is written in its dataset path_in_resource) or a .npy file (see array_sinks.open_array_sink).
+            max_subarray_size (Optional[int], optional): Maximum size of a subarray in bytes. If None, max_array_chunk_size() is used. Defaults to None.
+            timeout (int, optional): Defaults to 20.
+            max_parallel (int, optional): maximum number of subarray requests in flight. Defaults to 1.
+            retries (int, optional): number of times a failed subarray request is sent again. Defaults to 0.
+            on_progress (Optional[ProgressCallback], optional): called with (subarrays received, number of subarrays) after each subarray. Defaults to None.
+            journal (Optional[Union[str, os.PathLike]], optional): journal file of the subarrays written to the sink (see transfer_journal.TransferJournal). If it records an interrupted download of this version of the array, the values of the sink are kept and the subarrays already written with the same values are skipped. Defaults to None.
+
+        Returns:
+            bool: True if the whole array has been written to the sink
+        Raises:
+            ValueError: if the sink does not have the dimensions of the data array
+        """
+        uri = get_valid_uri_str(uri)
+        metadata = self.get_data_array_metadata(uri=uri, path_in_resource=path_in_resource, timeout=timeout).get("0")
+        if metadata is None or not metadata.dimensions or metadata.transport_array_type is None:
+            logging.error(f"No metadata found for data array {uri} {path_in_resource}")
+            return False
+        dimensions = list(metadata.dimensions)
+        try:
+            tiles = plan_chunks(
+                dimensions,
+                get_wire_item_size(metadata.transport_array_type),
+                max_subarray_size or self.max_array_chunk_size(),
+                metadata.preferred_subarray_dimensions,
+            )
+        except ValueError as e:
+            logging.error(e)
+            return False
+        journal_file = TransferJournal(journal) if journal is not None else None
+        resumed = journal_file is not None and journal_file.load(
+            self._download_transfer(uri, path_in_resource, metadata)
+        )
+
+        with contextlib.ExitStack() as stack:
+            target = stack.enter_context(
+                open_array_sink(
+                    sink,
+                    dimensions,
+                    get_any_array_type_dtype(metadata.transport_array_type),
+                    path_in_resource,
+                    resume=resumed,
                 )
-                if subarray is None:
-                    logging.error(f"Failed to get subarray starting at {start} with count {count}")
-                    return None
-                if array is None:
-                    array = subarray
-                else:
-                    array = np.concatenate((array, subarray))  # type: ignore
+            )
+            if journal_file is not None:
+                stack.enter_context(journal_file)
+                if not resumed:
+                    journal_file.begin(self._download_transfer(uri, path_in_resource, metadata))
+                tiles = [
+                    (start, count)
+                    for start, count in tiles
+                    if not journal_file.is_done(start, count, target[chunk_slices(start, count)])
+                ]
+            logging.info(f"Retrieving array in {len(tiles)} subarrays ({max_parallel} in parallel) into {sink}...")
+
+            def _get_chunk(i: int) -> "Future[Optional[np.ndarray]]":
+                start, count = tiles[i]
+                return self.get_data_subarray_future(
+                    uri=uri, path_in_resource=path_in_resource, start=start, count=count, timeout=timeout
+                )
+
+            def _write_chunk(i: int, values: np.ndarray, _: int):
+                start, count = tiles[i]
+                target[chunk_slices(start, count)] = values.reshape(count)
+                if journal_file is not None:
+                    journal_file.record(start, count, values)
+
+            try:
+                run_chunks(
+                    len(tiles),
+                    _get_chunk,
+                    max_parallel=max_parallel,
+                    retries=retries,
+                    on_progress=on_progress,
+                    on_chunk=_write_chunk,
+                    poll=self.pending_requests.expire,
+                )
+            except ChunkTransferError as e:
+                logging.error(f"Failed to get subarray {e.chunk} of {uri} {path_in_resource}: {e.cause}")
+                return False
+        return True
+
+    def iter_data_array_chunks(
+        self,
+        uri: Union[str, ETPUri],
+        path_in_resource: str,
+        chunk_shape: Optional[Sequence[int]] = None,
+        max_subarray_size: Optional[int] = None,
+        prefetch: int = 2,
+        timeout: int = 20,
+        retries: int = 0,
+    ) -> Iterator[Tuple[List[int], List[int], np.ndarray]]:
+        """Get a data array from the server chunk by chunk, to process it while it is downloaded.
+        The chunks are retrieved with GetDataSubarrays messages and yielded as they arrive (not necessarily in order).
+        While a chunk is processed, the next ones are already requested: up to `prefetch` requests are kept in flight.
+
+        Example:
+            ```python
+            low, high = np.inf, -np.inf
+            for start, count, values in client.iter_data_array_chunks(uri, "/RESQML/values", prefetch=4):
+                low, high = min(low, values.min()), max(high, values.max())
+            ```
+
+        Args:
+            uri (Union[str, ETPUri]): Usually the uri should be an uri of an ExternalDataArrayPart or an ExternalPartReference for resqml 2.0.1, and the uri of the object itself for resqml > 2.0.1.
+            path_in_resource (str): path to the array. Must be the same than in the original object
+            chunk_shape (Optional[Sequence[int]], optional): shape of the chunks (smaller at the end of each dimension). If None, the chunks are as large as the message size allows (see get_data_array_safe). Defaults to None.
+            max_subarray_size (Optional[int], optional): Maximum size of a chunk in bytes. If None, max_array_chunk_size() is used. Defaults to None.
+            prefetch (int, optional): maximum number of chunk requests in flight. Defaults to 2.
+            timeout (int, optional): Defaults to 20.
+            retries (int, optional): number of times a failed chunk request is sent again. Defaults to 0.
+
+        Yields:
+            Tuple[List[int], List[int], np.ndarray]: (start, count, values) of each chunk, values having the shape count
+        Raises:
+            ValueError: if the metadata of the array cannot be retrieved, or if a chunk of chunk_shape exceeds max_subarray_size
+            ChunkTransferError: if a chunk could not be retrieved after its retries
+        """
+        uri = get_valid_uri_str(uri)
+        metadata = self.get_data_array_metadata(uri=uri, path_in_resource=path_in_resource, timeout=timeout).get("0")
+        if metadata is None or not metadata.dimensions or metadata.transport_array_type is None:
+            raise ValueError(f"No metadata found for data array {uri} {path_in_resource}")
+        dimensions = list(metadata.dimensions)
+        type_size = get_wire_item_size(metadata.transport_array_type)
+        max_msg_size = max_subarray_size or self.max_array_chunk_size()
+        if chunk_shape is None:
+            tiles = plan_chunks(dimensions, type_size, max_msg_size, metadata.preferred_subarray_dimensions)
+        elif math.prod(chunk_shape) * type_size > max_msg_size:
+            raise ValueError(
+                f"A chunk of shape {list(chunk_shape)} exceeds the message size limit of {max_msg_size} bytes"
+            )
+        else:
+            tiles = grid_chunks(dimensions, chunk_shape)
+
+        def _get_chunk(i: int) -> "Future[Optional[np.ndarray]]":
+            start, count = tiles[i]
+            return self.get_data_subarray_future(
+                uri=uri, path_in_resource=path_in_resource, start=start, count=count, timeout=timeout
+            )
+
+        chunks = iter_chunks(
+            len(tiles), _get_chunk, max_parallel=prefetch, retries=retries, poll=self.pending_requests.expire
+        )
+        with contextlib.closing(chunks):
+            for i, values, _, failure in chunks:
+                if failure is not None:
+                    raise failure
+                start, count = tiles[i]
+                yield start, count, values.reshape(count)
+
+    def get_data_arrays(
+        self,
+        identifiers: Sequence[Tuple[Union[str, ETPUri], str]],
+        max_subarray_size: Optional[int] = None,
+        timeout: int = 20,
+        max_parallel: int = 1,
+        retries: int = 0,
+    ) -> Dict[DataArrayKey, Optional[np.ndarray]]:
+        """Get many data arrays from the server, in as few messages as possible.
+
+        The metadata of the arrays is requested first. The arrays that fit in a message are then packed together in
+        GetDataArrays messages, each one holding as many arrays as the message size (and the MaxResponseCount
+        capability of the server) allows. The arrays that are too large for a single message are retrieved in
+        subarrays, as with get_data_array_safe.
 
-            if array is not None:
-                return array.reshape(tuple(dimensions))  # type: ignore
+        Args:
+            identifiers (Sequence[Tuple[Union[str, ETPUri], str]]): (uri, path_in_resource) of each array
+            max_subarray_size (Optional[int], optional): Maximum size of the values of a message in bytes. If None, max_array_chunk_size() is used. Defaults to None.
+            timeout (int, optional): Defaults to 20.
+            max_parallel (int, optional): maximum number of requests in flight. Defaults to 1.
+            retries (int, optional): number of times a failed request is sent again. Defaults to 0.
+
+        Returns:
+            Dict[DataArrayKey, Optional[np.ndarray]]: the arrays by (uri, path_in_resource), None for the arrays that could not be retrieved
+        """
+        keys = list(dict.fromkeys((get_valid_uri_str(uri), path) for uri, path in identifiers))
+        result: Dict[DataArrayKey, Optional[np.ndarray]] = {key: None for key in keys}
+        max_msg_size = max_subarray_size or self.max_array_chunk_size()
+
+        metadata_by_key = self.get_data_arrays_metadata(
+            keys, timeout=timeout, max_parallel=max_parallel, retries=retries
+        )
+        small: List[DataArrayKey] = []
+        sizes: List[int] = []
+        large: List[DataArrayKey] = []
+        for key in keys:
+            metadata = metadata_by_key.get(key)
+            if metadata is None or not metadata.dimensions:
+                logging.error(f"No metadata found for data array {key[0]} {key[1]}")
+                continue
+            size = get_wire_size(metadata.dimensions, metadata.transport_array_type)
+            size += _array_entry_overhead(key, metadata.dimensions)
+            if size <= max_msg_size:
+                small.append(key)
+                sizes.append(size)
             else:
-                return None
+                large.append(key)
+
+        bins = self._pack_array_entries(small, sizes, max_msg_size)
+        logging.info(f"Retrieving {len(small)} arrays in {len(bins)} messages and {len(large)} arrays in subarrays")
+
+        def _get_bin(i: int) -> "Future[Dict[DataArrayKey, np.ndarray]]":
+            return map_future(
+                self.send_async(get_data_arrays_batch(bins[i]), timeout=timeout),
+                lambda gdar_msg_list: self._read_data_arrays(bins[i], gdar_msg_list),
+            )
+
+        failures = run_chunks(
+            len(bins),
+            _get_bin,
+            max_parallel=max_parallel,
+            retries=retries,
+            on_chunk=lambda i, arrays, _: result.update(arrays),
+            poll=self.pending_requests.expire,
+            fail_fast=False,
+        )
+        for failure in failures:
+            logging.error(f"Failed to get the data arrays {bins[failure.chunk]}: {failure.cause}")
+
+        for key in large:
+            result[key] = self._get_data_array_with_metadata(
+                key[0],
+                key[1],
+                metadata_by_key[key],
+                max_subarray_size=max_subarray_size,
+                timeout=timeout,
+                max_parallel=max_parallel,
+                retries=retries,
+            )
+        return result
+
+    @staticmethod
+    def _read_data_arrays(
+        keys: List[DataArrayKey], gdar_msg_list: List[Message]
+    ) -> Optional[Dict[DataArrayKey, np.ndarray]]:
+        arrays = {}
+        for gdar in gdar_msg_list:
+            if isinstance(gdar.body, GetDataArraysResponse):
+                for k, data_array in gdar.body.data_arrays.items():
+                    arrays[keys[int(k)]] = np.asarray(data_array.data.item.values).reshape(  # type: ignore
+                        tuple(data_array.dimensions)  # type: ignore
+                    )
+            else:
+                logging.error("@get_data_arrays Error: %s", gdar.body)
+        # None if nothing was received: the message is sent again if retries are allowed
+        return arrays or None
+
+    def put_data_arrays(
+        self,
+        arrays: Dict[Tuple[Union[str, ETPUri], str], Union[np.ndarray, list]],
+        max_subarray_size: Optional[int] = None,
+        timeout: int = 5,
+        max_parallel: int = 1,
+        retries: int = 0,
+    ) -> Dict[DataArrayKey, bool]:
+        """Put many data arrays to the server, in as few messages as possible.
+
+        The arrays that fit in a message are packed together in PutDataArrays messages, each one holding as many
+        arrays as the message size allows. The arrays that are too large for a single message are sent in subarrays,
+        as with put_data_array_safe.
+
+        Args:
+            arrays (Dict[Tuple[Union[str, ETPUri], str], Union[np.ndarray, list]]): the arrays by (uri, path_in_resource)
+            max_subarray_size (Optional[int], optional): Maximum size of the values of a message in bytes. If None, max_array_chunk_size() is used. Defaults to None.
+            timeout (int, optional): Defaults to 5.
+            max_parallel (int, optional): maximum number of requests in flight. Defaults to 1.
+            retries (int, optional): number of times a failed request is sent again. Defaults to 0.
+
+        Returns:
+            Dict[DataArrayKey, bool]: by (uri, path_in_resource), True if the array has been successfully put
+        """
+        values = {(get_valid_uri_str(uri), path): np.asarray(array) for (uri, path), array in arrays.items()}
+        result = {key: False for key in values}
+        for key in values:
+            self._invalidate_cached_array(*key)
+        max_msg_size = max_subarray_size or self.max_array_chunk_size()
+
+        small: List[DataArrayKey] = []
+        sizes: List[int] = []
+        large: List[DataArrayKey] = []
+        for key, array in values.items():
+            size = get_wire_size(array.shape, array.dtype) + _array_entry_overhead(key, array.shape)
+            if size <= max_msg_size:
+                small.append(key)
+                sizes.append(size)
+            else:
+                large.append(key)
+
+        bins = self._pack_array_entries(small, sizes, max_msg_size)
+        logging.info(f"Sending {len(small)} arrays in {len(bins)} messages and {len(large)} arrays in subarrays")
+
+        def _put_bin(i: int) -> "Future[Dict[DataArrayKey, bool]]":
+            request = put_data_arrays_batch([(uri, path, values[(uri, path)]) for uri, path in bins[i]])
+            return map_future(
+                self.send_async(request, timeout=timeout),
+                lambda pdar_msg_list: self._read_put_data_arrays_batch(bins[i], pdar_msg_list),
+            )
+
+        failures = run_chunks(
+            len(bins),
+            _put_bin,
+            max_parallel=max_parallel,
+            retries=retries,
+            on_chunk=lambda i, success, _: result.update(success),
+            poll=self.pending_requests.expire,
+            fail_fast=False,
+        )
+        for failure in failures:
+            logging.error(f"Failed to put the data arrays {bins[failure.chunk]}: {failure.cause}")
+
+        # The large arrays are all put uninitialized at once, then sent in subarrays
+        tiles = {}
+        for key in large:
+            try:
+                tiles[key] = plan_chunks(values[key].shape, get_wire_item_size(values[key].dtype), max_msg_size)
+            except (ValueError, NotImplementedError) as e:
+                logging.error(f"Cannot split the data array {key[0]} {key[1]}: {e}")
+        uninitialized = self.put_uninitialized_data_arrays(
+            {key: create_data_array_metadata(values[key].shape, str(values[key].dtype)) for key in tiles},
+            timeout=timeout,
+            max_parallel=max_parallel,
+            retries=retries,
+        )
+        for key, key_tiles in tiles.items():
+            if not uninitialized.get(key):
+                logging.error(f"Failed to put uninitialized data array for {key[0]} {key[1]}")
+                continue
+            res = self._put_data_array_subarrays(
+                key[0],
+                key[1],
+                values[key],
+                key_tiles,
+                timeout=timeout,
+                max_parallel=max_parallel,
+                retries=retries,
+            )
+            result[key] = res[key[0]]
+        return result
+
+    @staticmethod
+    def _read_put_data_arrays_batch(
+        keys: List[DataArrayKey], pdar_msg_list: List[Message]
+    ) -> Optional[Dict[DataArrayKey, bool]]:
+        success = {}
+        for pdar in pdar_msg_list:
+            if isinstance(pdar.body, PutDataArraysResponse):
+                success.update({keys[int(k)]: True for k in pdar.body.success})
+            else:
+                logging.info("Data arrays put failed: %s ==> %s", pdar, pdar.body)
+        # None if nothing was stored: the message is sent again if retries are allowed
+        return success or None
 
     #    _____                              __           __   ______
     #   / ___/__  ______  ____  ____  _____/ /____  ____/ /  /_  __/_  ______  ___  _____
@@ -1457,13 +2523,8 @@ def start_client(config: Optional[Union[ServerConfig, ETPConfig]] = None, verify
         spec=ETPConnection(connection_type=ConnectionType.CLIENT),
         config=config,
     )
-    client.start()
-
-    start_time = perf_counter()
-    while not client.is_connected() and perf_counter() - start_time < 5:
-        sleep(0.25)
-    if not client.is_connected():
-        logging.info("The ETP session could not be established in 5 seconds.")
+    if not client.start(timeout=5):
+        logging.info("The ETP session could not be established.")
         raise Exception(f"Connexion not established with {config.url}")
     else:
         logging.info("Now connected to ETP Server")
@@ -96,10 +96,33 @@ class ServerConfig(AuthConfigs, EnvironmentSettable):
     url: str = field(default="", metadata={"description": "ETP server URL (including protocol and port)"})
     timeout: int = field(default=30, metadata={"description": "Connection timeout in seconds"})
     max_web_socket_frame_payload_size: int = field(
-        default=900000, metadata={"description": "Maximum WebSocket frame payload size in bytes"}
+        default=0,
+        metadata={"description": "Maximum WebSocket frame payload size in bytes (0 to use the server's limit)"},
     )
     max_web_socket_message_payload_size: int = field(
-        default=900000, metadata={"description": "Maximum WebSocket message payload size in bytes"}
+        default=0,
+        metadata={"description": "Maximum WebSocket message payload size in bytes (0 to use the server's limit)"},
+    )
+    response_retention_count: int = field(
+        default=0, metadata={"description": "Number of received answers kept in memory for debugging (0 for none)"}
+    )
+    response_retention_bytes: int = field(
+        default=0, metadata={"description": "Maximum size in bytes of the answers kept for debugging (0 for no limit)"}
+    )
+    max_in_flight_requests: int = field(
+        default=0, metadata={"description": "Maximum number of requests waiting for an answer (0 for no limit)"}
+    )
+    max_in_flight_bytes: int = field(
+        default=0,
+        metadata={
+            "description": "Maximum size in bytes of the answer parts received for pending requests (0 for no limit)"
+        },
+    )
+    compression: str = field(
+        default="", metadata={"description": "Message compression requested to the server (gzip, or empty for none)"}
+    )
+    compression_threshold: int = field(
+        default=1024, metadata={"description": "Minimum size in bytes of an outgoing message to compress it"}
     )
     verify_ssl: bool = field(default=False, metadata={"description": "Whether to verify SSL certificates"})
     auto_reconnect: bool = field(
@@ -137,12 +160,12 @@ class ServerConfig(AuthConfigs, EnvironmentSettable):
         self.max_web_socket_frame_payload_size = (
             self.max_web_socket_frame_payload_size
             if self.max_web_socket_frame_payload_size is not None
-            else int(os.getenv("MAX_WEB_SOCKET_FRAME_PAYLOAD_SIZE", 900000))
+            else int(os.getenv("MAX_WEB_SOCKET_FRAME_PAYLOAD_SIZE", 0))
         )
         self.max_web_socket_message_payload_size = (
             self.max_web_socket_message_payload_size
             if self.max_web_socket_message_payload_size is not None
-            else int(os.getenv("MAX_WEB_SOCKET_MESSAGE_PAYLOAD_SIZE", 900000))
+            else int(os.getenv("MAX_WEB_SOCKET_MESSAGE_PAYLOAD_SIZE", 0))
         )
         self.verify_ssl = (
             self.verify_ssl if self.verify_ssl is not None else os.getenv("VERIFY_SSL", "false").lower() == "true"
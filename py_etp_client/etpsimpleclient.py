@@ -38,6 +38,7 @@ Example:
     ```
 """
 import asyncio
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
 from enum import Enum
 
@@ -45,23 +46,26 @@ import json
 import os
 import ssl
 import threading
-from typing import Optional, Any, List, Callable, Dict, Union
+from typing import Optional, Any, List, Callable, Dict, Iterator, Tuple, Union
 import websocket
 import time
 import logging
 
 from etpproto.connection import ETPConnection, ConnectionType
-from etpproto.messages import Message, decode_binary_message
+from etpproto.messages import Message, MessageFlags, decode_binary_message
 
 from etpproto.client_info import ClientInfo
 from etptypes.energistics.etp.v12.protocol.core.request_session import (
     RequestSession,
 )
 
+from py_etp_client.avro_arrays import MESSAGE_HEADER_MAX_SIZE, decode_message, encode_body, encode_header
+from py_etp_client.compression import SUPPORTED_COMPRESSIONS, CompressionStats, compress_frame, decompress_frame
+from py_etp_client.correlation import EXPIRY_CHECK_PERIOD, CorrelationTable, PendingRequest
 from py_etp_client.etpconfig import ETPConfig, ServerConfig
 from py_etp_client.etp_requests import default_request_session
 from py_etp_client.auth import AuthConfig, BasicAuthConfig, TokenManager
-from py_etp_client import CloseSession
+from py_etp_client import CloseSession, OpenSession, ProtocolException
 
 # To enable handlers
 from py_etp_client.serverprotocols import (
@@ -79,6 +83,10 @@ MSG_ID_LOGGER = logging.getLogger("MSG_ID_LOGGER")
 load_dotenv()
 DEBUG = os.getenv("DEBUG", "False").lower() in ["true", "1", "yes"]
 
+# Message size limit used until the server's limits are known, when none is configured
+DEFAULT_MAX_WEB_SOCKET_PAYLOAD_SIZE = 900000
+WEB_SOCKET_PAYLOAD_SIZE_CAPABILITIES = ("MaxWebSocketFramePayloadSize", "MaxWebSocketMessagePayloadSize")
+
 
 class EventType(Enum):
     """Enum defining the types of events that can trigger listeners.
@@ -114,7 +122,12 @@ class EventType(Enum):
     CLOSE = "close"
 
 
-class ETPSimpleClient:
+class ETPClientBase:
+    """Connection settings, ETP connection specification and listener management shared by
+    the threaded ETPSimpleClient and the asyncio based AsyncETPSimpleClient.
+
+    This class does not open any connection by itself: transports are implemented by subclasses.
+    """
 
     def __init__(
         self,
@@ -129,79 +142,8 @@ class ETPSimpleClient:
         req_session: Optional[RequestSession] = None,
         config: Optional[Union[ETPConfig, ServerConfig, AuthConfig]] = None,
     ):
-        """Initializes the ETPSimpleClient with the given parameters.
-        This class is a simple WebSocket client for ETP (Energistics Transfer Protocol) connections.
-        It handles the connection, sending and receiving messages, and managing the connection state.
-        It also provides a method to send messages and wait for responses.
-
-        Event Listener System:
-        ---------------------
-        The client supports a listener paradigm that allows you to register callback functions
-        to be notified when specific events occur. This enables reactive programming patterns
-        and decoupled event handling.
-
-        Available Event Types (from EventType enum):
-        - ON_OPEN: Triggered when WebSocket connection is established
-        - ON_CLOSE: Triggered when WebSocket connection is closed
-        - ON_ERROR: Triggered when an error occurs
-        - ON_MESSAGE: Triggered when a message is received
-        - START: Triggered when the client starts
-        - STOP: Triggered when the client stops gracefully
-        - CLOSE: Triggered when the client initiates a close operation
-
-        Listener Functions:
-        - Must accept (event_type: EventType, **kwargs) as parameters
-        - event_type: The EventType enum value indicating which event occurred
-        - **kwargs: Event-specific data, see details below:
-
-        Event-specific kwargs:
-        - ON_OPEN: ws (WebSocket object)
-        - ON_CLOSE: ws (WebSocket object), close_status_code (int), close_msg (str)
-        - ON_ERROR: ws (WebSocket object), error (exception/error object)
-        - ON_MESSAGE: ws (WebSocket object), message (raw bytes), received (decoded Message)
-        - START: No additional parameters
-        - STOP: No additional parameters
-        - CLOSE: No additional parameters
-
-        Example Usage:
-        ```python
-        def my_listener(event_type: EventType, **kwargs):
-            if event_type == EventType.ON_ERROR:
-                print(f"Error occurred: {kwargs.get('error')}")
-                print(f"WebSocket: {kwargs.get('ws')}")
-            elif event_type == EventType.ON_MESSAGE:
-                print(f"Message received: {len(kwargs.get('message', b''))} bytes")
-                print(f"Decoded message: {kwargs.get('received')}")
-            elif event_type == EventType.ON_CLOSE:
-                print(f"Connection closed with code: {kwargs.get('close_status_code')}")
-                print(f"Close message: {kwargs.get('close_msg')}")
-            elif event_type == EventType.ON_OPEN:
-                print(f"Connection opened: {kwargs.get('ws')}")
-
-        client = ETPSimpleClient(url="wss://example.com", spec=None)
-        client.add_listener(EventType.ON_ERROR, my_listener)
-        client.add_listener(EventType.ON_MESSAGE, my_listener)
-        client.add_listener(EventType.ON_CLOSE, my_listener)
-        client.add_listener(EventType.ON_OPEN, my_listener)
-        ```
-
-        Listener Management:
-        - add_listener(event_type, callback): Register a listener function
-        - remove_listener(event_type, callback): Unregister a specific listener
-        - Multiple listeners can be registered for the same event type
-        - Listener exceptions are caught and logged without affecting client operation
-
-        Args:
-            url (str): The WebSocket URL to connect to.
-            spec (Optional[ETPConnection]): The ETPConnection specification to use.
-            access_token (Optional[str], optional): Access token for authentication. Defaults to None.
-            username (Optional[str], optional): Username for basic authentication (ignored if access_token is provided). Defaults to None.
-            password (Optional[str], optional): Password for basic authentication (ignored if access_token is provided). Defaults to None.
-            headers (Optional[Union[dict, str]], optional): Additional headers to include in the WebSocket request. Defaults to None. If a string is provided, it will be parsed as JSON.
-            verify (Optional[Any], optional): SSL verification options. Defaults to None.
-            max_reconnect_attempts (int, optional): Maximum number of reconnection attempts. Defaults to 5.
-            req_session (Optional[RequestSession], optional): RequestSession object to use. If None provided, a default one will be created. Defaults to None.
-            config (Optional[Union[ETPConfig, ServerConfig, AuthConfig]], optional): Configuration object for server settings. Defaults to None.
+        """Resolves the url, headers, authentication and ETP specification from the given parameters.
+        See ETPSimpleClient for the description of the arguments.
         """
         self.url = url
 
@@ -243,14 +185,6 @@ class ETPSimpleClient:
         self.closed = False
         self.sslopt = None
         self.ws = None
-        self.thread = None
-        self.stop_event = threading.Event()
-        self.lock = threading.Lock()
-        # Cache for received msg
-        self.recieved_msg_dict = {}
-
-        # Dictionary to store waiting requests {message_id: (Event, response)}
-        self.pending_requests = {}
 
         self.client_info = (
             ClientInfo(
@@ -264,7 +198,30 @@ class ETPSimpleClient:
         if isinstance(config, ETPConfig):
             config = config.as_server_config()
 
+        # Requests waiting for an answer, and optionally the last answers kept for debugging
+        self.pending_requests = CorrelationTable()
+
+        # Endpoint capabilities: limits set in the configuration, and the ones announced by the server in its
+        # OpenSession (endpoint capabilities, and protocol capabilities by protocol number)
+        self.configured_capabilities: Dict[str, Any] = {}
+        self.server_capabilities: Dict[str, Any] = {}
+        self.server_protocol_capabilities: Dict[int, Dict[str, Any]] = {}
+
+        # Message compression: requested in the RequestSession, active once accepted in the OpenSession
+        self.compression: Optional[str] = None
+        self.compression_threshold = 1024
+        self.compression_counters = CompressionStats()
+
         if config is not None and isinstance(config, ServerConfig):
+            self.pending_requests = CorrelationTable(
+                retention_count=config.response_retention_count or 0,
+                retention_bytes=config.response_retention_bytes or 0,
+                max_requests=config.max_in_flight_requests or 0,
+                max_bytes=config.max_in_flight_bytes or 0,
+            )
+            if config.compression:
+                self.request_session.supported_compression = [config.compression]
+            self.compression_threshold = config.compression_threshold or 0
             self.url = config.url or self.url
             self.verify = config.verify_ssl if self.verify is None else self.verify
             # self.max_reconnect_attempts = (
@@ -298,32 +255,75 @@ class ETPSimpleClient:
             self.sslopt = {"cert_reqs": ssl.CERT_NONE}
 
     def _init_connection(self, config: Optional[Union[ServerConfig, AuthConfig]] = None) -> None:
+        self.compression = None
         if self.spec is None:
             self.spec = ETPConnection(connection_type=ConnectionType.CLIENT)
             if self.client_info is not None:
                 self.spec.client_info = self.client_info
 
-        if (
-            config is not None
-            and isinstance(config, ServerConfig)
-            and config.max_web_socket_frame_payload_size is not None
-        ):
-            self.spec.client_info.endpoint_capabilities["MaxWebSocketFramePayloadSize"] = (
-                config.max_web_socket_frame_payload_size
+        if config is not None and isinstance(config, ServerConfig):
+            if config.max_web_socket_frame_payload_size:
+                self.configured_capabilities["MaxWebSocketFramePayloadSize"] = config.max_web_socket_frame_payload_size
+            if config.max_web_socket_message_payload_size:
+                self.configured_capabilities["MaxWebSocketMessagePayloadSize"] = (
+                    config.max_web_socket_message_payload_size
+                )
+
+        # Until the OpenSession is received, the configured limits (or conservative defaults) are used
+        self.server_capabilities = {}
+        self.server_protocol_capabilities = {}
+        for name in WEB_SOCKET_PAYLOAD_SIZE_CAPABILITIES:
+            self.spec.client_info.endpoint_capabilities[name] = self.configured_capabilities.get(
+                name, DEFAULT_MAX_WEB_SOCKET_PAYLOAD_SIZE
             )
-        elif "MaxWebSocketFramePayloadSize" not in self.spec.client_info.endpoint_capabilities:
-            self.spec.client_info.endpoint_capabilities["MaxWebSocketFramePayloadSize"] = 900000
 
-        if (
-            config is not None
-            and isinstance(config, ServerConfig)
-            and config.max_web_socket_message_payload_size is not None
-        ):
-            self.spec.client_info.endpoint_capabilities["MaxWebSocketMessagePayloadSize"] = (
-                config.max_web_socket_message_payload_size
+    def _negotiate_capabilities(self, open_session: OpenSession) -> None:
+        """Stores the capabilities announced by the server and adopts its message size limits. The etpproto
+        negotiation then keeps the minimum of the client and server values.
+        """
+        self.server_capabilities = {k: getattr(v, "item", v) for k, v in open_session.endpoint_capabilities.items()}
+        self.server_protocol_capabilities = {
+            sp.protocol: {k: getattr(v, "item", v) for k, v in sp.protocol_capabilities.items()}
+            for sp in open_session.supported_protocols
+        }
+        if self.spec is None:
+            return
+        for name in WEB_SOCKET_PAYLOAD_SIZE_CAPABILITIES:
+            value = self.get_capability(name)
+            self.spec.client_info.endpoint_capabilities[name] = (
+                value if value is not None else DEFAULT_MAX_WEB_SOCKET_PAYLOAD_SIZE
             )
-        elif "MaxWebSocketMessagePayloadSize" not in self.spec.client_info.endpoint_capabilities:
-            self.spec.client_info.endpoint_capabilities["MaxWebSocketMessagePayloadSize"] = 900000
+        logging.debug(f"Server capabilities: {self.server_capabilities} {self.server_protocol_capabilities}")
+
+    def get_capability(self, name: str, protocol: Optional[int] = None) -> Optional[Any]:
+        """Returns the effective value of a capability limit: the minimum of the configured value, the server
+        endpoint capability and, if a protocol is given, the server capability for this protocol.
+
+        Args:
+            name (str): Name of the capability (e.g. "MaxWebSocketMessagePayloadSize", "MaxResponseCount")
+            protocol (Optional[int], optional): Protocol number for protocol capabilities. Defaults to None.
+
+        Returns:
+            Optional[Any]: The effective value, None if no endpoint defines this capability
+        """
+        values = [
+            self.configured_capabilities.get(name),
+            self.server_capabilities.get(name),
+            self.server_protocol_capabilities.get(protocol, {}).get(name) if protocol is not None else None,
+        ]
+        values = [v for v in values if v is not None]
+        try:
+            return min(values) if values else None
+        except TypeError:
+            return values[0]
+
+    def max_message_size(self) -> int:
+        """Maximum size in bytes of a message sent or received on this session: the smallest of the message and
+        frame payload limits of both endpoints (a message is sent in a single frame).
+        """
+        sizes = [self.get_capability(name) for name in WEB_SOCKET_PAYLOAD_SIZE_CAPABILITIES]
+        sizes = [size for size in sizes if size]
+        return min(sizes) if sizes else DEFAULT_MAX_WEB_SOCKET_PAYLOAD_SIZE
 
     def add_listener(self, event_type: EventType, callback: Callable[..., None]) -> None:
         """
@@ -377,8 +377,242 @@ class ETPSimpleClient:
             except Exception as e:
                 logging.error(f"Error in listener {callback.__name__} for event {event_type.value}: {e}")
 
+    def is_connected(self):
+        """Checks if the WebSocket connection is open and the etp connexion is active
+
+        Returns:
+            bool: True if connected, False otherwise
+        """
+        # logging.debug(self.spec)
+        # return self.spec.is_connected
+        return self.spec is not None and self.spec.is_connected and not self.closed
+
+    @property
+    def recieved_msg_dict(self) -> Dict[int, List[Message]]:
+        """Answers kept for debugging {correlation_id: messages}. Only filled if a response retention is set in
+        the ServerConfig (response_retention_count), answers are otherwise released once delivered.
+        """
+        return self.pending_requests.retained()
+
+    def correlation_stats(self) -> Dict[str, Any]:
+        """Counters of the correlation table and of the in-flight window, see CorrelationTable."""
+        return self.pending_requests.stats()
+
+    def compression_stats(self, message_type: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Number of messages and bytes sent and received per message type, with their compression ratio.
+
+        Example:
+        ```python
+        client.compression_stats("GetDataObjectsResponse")
+        # {"sent": {}, "received": {"GetDataObjectsResponse": {"messages": 3, "compressed_messages": 3,
+        #     "raw_bytes": 120532, "wire_bytes": 14873, "ratio": 8.1}}}
+        ```
+
+        Args:
+            message_type (Optional[str], optional): Only return the counters of this message type. Defaults to None.
+        """
+        return self.compression_counters.stats(message_type)
+
+    def _negotiate_compression(self, open_session: OpenSession) -> None:
+        """Activates the compression chosen by the server in its OpenSession, if the client requested it."""
+        chosen = open_session.supported_compression
+        if chosen and chosen in SUPPORTED_COMPRESSIONS and chosen in self.request_session.supported_compression:
+            self.compression = chosen
+            logging.info(f"Message compression negotiated: {chosen}")
+        else:
+            self.compression = None
+
+    def _encode_frame(self, header: Any, frame: bytes) -> bytes:
+        """Compresses an outgoing binary message if the compression is negotiated and the message is large enough."""
+        wire = frame
+        if self.compression is not None and len(frame) >= self.compression_threshold:
+            wire = compress_frame(frame, self.compression_threshold)
+        self.compression_counters.record("sent", header.protocol, header.message_type, len(frame), len(wire))
+        return wire
+
+    def _encode_message(self, obj_msg: Message) -> Iterator[Tuple[int, bytes]]:
+        """Encodes an outgoing message into binary parts, yielded with the message id.
+
+        Data array messages that fit in a single websocket message are encoded from their numpy buffers (see
+        avro_arrays). The other messages, and the data array messages to split in several parts, are encoded by
+        etpproto.
+        """
+        assert self.spec is not None, "ETPConnection spec must be defined before sending messages."
+        body_parts = encode_body(obj_msg.body)
+        if (
+            body_parts is not None
+            and sum(len(p) for p in body_parts) + MESSAGE_HEADER_MAX_SIZE <= self.max_message_size()
+        ):
+            msg_id = self.spec.consume_msg_id()
+            obj_msg.header.message_flags = obj_msg.header.message_flags | MessageFlags.FINALPART
+            obj_msg.header.message_id = msg_id
+            yield msg_id, encode_header(obj_msg.header) + b"".join(body_parts)
+        else:
+            yield from self.spec.send_msg_and_error_generator(obj_msg, None)  # type: ignore
+
+    @staticmethod
+    def _decode_message(frame: bytes) -> Optional[Message]:
+        """Decodes a received binary message. The data array answers are decoded with their values as numpy arrays
+        (see avro_arrays), the other messages by etpproto.
+        """
+        return decode_message(frame) or Message.decode_binary_message(
+            frame, dict_map_pro_to_class=ETPConnection.generic_transition_table
+        )
+
+    def _decode_frame(self, frame: bytes) -> bytes:
+        """Decompresses an incoming binary message if the compression is negotiated."""
+        if self.compression is not None:
+            return decompress_frame(frame)
+        return frame
+
+    async def _handle_message(self, msg: Message) -> None:
+        """Runs the etpproto protocol handlers (session negotiation, chunks reassembly, printers) on an already
+        decoded message, so that each received frame is decoded only once. Answers produced by the handlers
+        are not sent back to the server.
+        """
+        if self.spec is None:
+            return
+        if isinstance(msg.body, OpenSession):
+            self._negotiate_capabilities(msg.body)
+            self._negotiate_compression(msg.body)
+        async for _ in self.spec._handle_message_generator(msg):
+            pass
+
+
+class ETPSimpleClient(ETPClientBase):
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        spec: Optional[ETPConnection] = None,
+        access_token: Optional[str] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        headers: Optional[Union[dict, str]] = None,
+        verify: Optional[Any] = None,
+        max_reconnect_attempts: int = 5,
+        req_session: Optional[RequestSession] = None,
+        config: Optional[Union[ETPConfig, ServerConfig, AuthConfig]] = None,
+    ):
+        """Initializes the ETPSimpleClient with the given parameters.
+        This class is a simple WebSocket client for ETP (Energistics Transfer Protocol) connections.
+        It handles the connection, sending and receiving messages, and managing the connection state.
+        It also provides a method to send messages and wait for responses.
+
+        Event Listener System:
+        ---------------------
+        The client supports a listener paradigm that allows you to register callback functions
+        to be notified when specific events occur. This enables reactive programming patterns
+        and decoupled event handling.
+
+        Available Event Types (from EventType enum):
+        - ON_OPEN: Triggered when WebSocket connection is established
+        - ON_CLOSE: Triggered when WebSocket connection is closed
+        - ON_ERROR: Triggered when an error occurs
+        - ON_MESSAGE: Triggered when a message is received
+        - START: Triggered when the client starts
+        - STOP: Triggered when the client stops gracefully
+        - CLOSE: Triggered when the client initiates a close operation
+
+        Listener Functions:
+        - Must accept (event_type: EventType, **kwargs) as parameters
+        - event_type: The EventType enum value indicating which event occurred
+        - **kwargs: Event-specific data, see details below:
+
+        Event-specific kwargs:
+        - ON_OPEN: ws (WebSocket object)
+        - ON_CLOSE: ws (WebSocket object), close_status_code (int), close_msg (str)
+        - ON_ERROR: ws (WebSocket object), error (exception/error object)
+        - ON_MESSAGE: ws (WebSocket object), message (raw bytes), received (decoded Message)
+        - START: No additional parameters
+        - STOP: No additional parameters
+        - CLOSE: No additional parameters
+
+        Example Usage:
+        ```python
+        def my_listener(event_type: EventType, **kwargs):
+            if event_type == EventType.ON_ERROR:
+                print(f"Error occurred: {kwargs.get('error')}")
+                print(f"WebSocket: {kwargs.get('ws')}")
+            elif event_type == EventType.ON_MESSAGE:
+                print(f"Message received: {len(kwargs.get('message', b''))} bytes")
+                print(f"Decoded message: {kwargs.get('received')}")
+            elif event_type == EventType.ON_CLOSE:
+                print(f"Connection closed with code: {kwargs.get('close_status_code')}")
+                print(f"Close message: {kwargs.get('close_msg')}")
+            elif event_type == EventType.ON_OPEN:
+                print(f"Connection opened: {kwargs.get('ws')}")
+
+        client = ETPSimpleClient(url="wss://example.com", spec=None)
+        client.add_listener(EventType.ON_ERROR, my_listener)
+        client.add_listener(EventType.ON_MESSAGE, my_listener)
+        client.add_listener(EventType.ON_CLOSE, my_listener)
+        client.add_listener(EventType.ON_OPEN, my_listener)
+        ```
+
+        Listener Management:
+        - add_listener(event_type, callback): Register a listener function
+        - remove_listener(event_type, callback): Unregister a specific listener
+        - Multiple listeners can be registered for the same event type
+        - Listener exceptions are caught and logged without affecting client operation
+
+        Args:
+            url (str): The WebSocket URL to connect to.
+            spec (Optional[ETPConnection]): The ETPConnection specification to use.
+            access_token (Optional[str], optional): Access token for authentication. Defaults to None.
+            username (Optional[str], optional): Username for basic authentication (ignored if access_token is provided). Defaults to None.
+            password (Optional[str], optional): Password for basic authentication (ignored if access_token is provided). Defaults to None.
+            headers (Optional[Union[dict, str]], optional): Additional headers to include in the WebSocket request. Defaults to None. If a string is provided, it will be parsed as JSON.
+            verify (Optional[Any], optional): SSL verification options. Defaults to None.
+            max_reconnect_attempts (int, optional): Maximum number of reconnection attempts. Defaults to 5.
+            req_session (Optional[RequestSession], optional): RequestSession object to use. If None provided, a default one will be created. Defaults to None.
+            config (Optional[Union[ETPConfig, ServerConfig, AuthConfig]], optional): Configuration object for server settings. Defaults to None.
+        """
+        super().__init__(
+            url=url,
+            spec=spec,
+            access_token=access_token,
+            username=username,
+            password=password,
+            headers=headers,
+            verify=verify,
+            max_reconnect_attempts=max_reconnect_attempts,
+            req_session=req_session,
+            config=config,
+        )
+
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+        # Set when the OpenSession answer is processed, or when the connection fails before (see start)
+        self.session_event = threading.Event()
+        self.session_error: Optional[Any] = None
+
+        # Event loop running the etpproto handlers for every received message. It is created once and reused
+        # by the websocket thread: creating a new loop for each message is costly on multi-frame answers.
+        self.handler_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_handler_loop(self) -> asyncio.AbstractEventLoop:
+        """Returns the long-lived event loop used to run the etpproto message handlers."""
+        if self.handler_loop is None or self.handler_loop.is_closed():
+            self.handler_loop = asyncio.new_event_loop()
+        return self.handler_loop
+
+    def _close_handler_loop(self) -> None:
+        if self.handler_loop is not None and not self.handler_loop.is_running():
+            self.handler_loop.close()
+            self.handler_loop = None
+
+    def _session_failed(self, error: Any) -> None:
+        """Wakes up start() if the session is not established yet."""
+        if not self.session_event.is_set():
+            self.session_error = error
+            self.session_event.set()
+
     def on_error(self, ws, error):
         logging.info(f"Error: {error}")
+        self._session_failed(error)
         self._notify_listeners(EventType.ON_ERROR, ws=ws, error=error)
 
     def on_close(self, ws, close_status_code, close_msg):
@@ -386,18 +620,17 @@ class ETPSimpleClient:
         logging.info("WebSocket closed")
         self.closed = True
         self.stop_event.set()
+        self._session_failed(f"WebSocket closed before the ETP session was opened: {close_status_code} {close_msg}")
 
-        # Signal all waiting events to prevent hanging
-        if hasattr(self, "_connection_closed_events"):
-            for event in list(self._connection_closed_events):
-                event.set()
+        # Wake up all waiting requests to prevent hanging
+        self.pending_requests.fail_all(RuntimeError("WebSocket connection closed while waiting for response"))
 
         self._notify_listeners(EventType.ON_CLOSE, ws=ws, close_status_code=close_status_code, close_msg=close_msg)
 
     def on_open(self, ws):
         logging.info("Connected to WebSocket!")
         try:
-            req_sess = default_request_session()
+            req_sess = self.request_session
             # logging.debug("Sending RequestSession")
             # logging.debug(req_sess.json(by_alias=True, indent=4))
             answer = self.send(req_sess, 4)
@@ -407,6 +640,7 @@ class ETPSimpleClient:
 
             traceback.print_exc()
             logging.error(e)
+            self._session_failed(e)
 
         self._notify_listeners(EventType.ON_OPEN, ws=ws)
 
@@ -458,23 +692,53 @@ class ETPSimpleClient:
                 self.closed = True
                 break
 
-    def start(self):
-        """Start the WebSocket connection in a separate thread."""
+    def start(self, timeout: float = 10) -> bool:
+        """Start the WebSocket connection in a separate thread and wait for the ETP session.
+
+        Returns as soon as the OpenSession answer is processed, or as soon as the connection fails (ON_ERROR,
+        ON_CLOSE or ProtocolException answer). Reconnection attempts continue in the background after a failure.
+
+        Args:
+            timeout (float, optional): Maximum time to wait for the ETP session in seconds. Defaults to 10.
+
+        Returns:
+            bool: True if the ETP session is established
+        """
 
         self.ws = None
         self.closed = False
         self.lock = threading.Lock()
         self.stop_event = threading.Event()
-        self.recieved_msg_dict = {}
-        self.pending_requests = {}
+        self.session_event.clear()
+        self.session_error = None
+        self.pending_requests.clear()
         self._init_connection()
         if self.thread is None or not self.thread.is_alive():
             self.thread = threading.Thread(target=self._run_websocket, daemon=True)
             self.thread.start()
-            time.sleep(1)  # Allow time for connection
+        connected = self.wait_connected(timeout)
         self._notify_listeners(EventType.START)
 
         logging.debug("WebSocket client started. with headers : %s", self.headers)
+        return connected
+
+    def wait_connected(self, timeout: Optional[float] = 10) -> bool:
+        """Waits until the ETP session is established, the connection fails or the timeout expires.
+
+        Args:
+            timeout (Optional[float], optional): Maximum time to wait in seconds, None to wait forever.
+                Defaults to 10.
+
+        Returns:
+            bool: True if the ETP session is established
+        """
+        if self.is_connected():
+            return True
+        if not self.session_event.wait(timeout):
+            logging.info(f"The ETP session could not be established in {timeout} seconds.")
+        elif self.session_error is not None:
+            logging.error(f"The ETP session could not be established: {self.session_error}")
+        return self.is_connected()
 
     def stop(self):
         """Gracefully stop the WebSocket connection."""
@@ -486,6 +750,7 @@ class ETPSimpleClient:
         if self.thread and self.thread != threading.current_thread():
             self.thread.join()
             self.thread = None
+        self._close_handler_loop()
         self.spec = None
 
         self._notify_listeners(EventType.STOP)
@@ -505,10 +770,9 @@ class ETPSimpleClient:
         """Handles incoming WebSocket messages."""
         # logging.info(f"Received: {message}")
         # logging.debug("##> before recieved " )
-        recieved = Message.decode_binary_message(
-            message,
-            dict_map_pro_to_class=ETPConnection.generic_transition_table,
-        )
+        wire_size = len(message)
+        message = self._decode_frame(message)
+        recieved = self._decode_message(message)
 
         if not isinstance(recieved, Message):
             logging.error(f"Received message is not an instance of Message: {type(recieved)} : {recieved}")
@@ -524,43 +788,39 @@ class ETPSimpleClient:
             )
             return
 
-        async def handle_msg(conn: ETPConnection, client, msg: bytes):
-            try:
-                if message is not None and self.spec is not None:
-                    async for b_msg in self.spec.handle_bytes_generator(message):
-                        pass
-
-            # return None, None
-            except Exception as e:
-                logging.error(f"#ERR: {type(e).__name__}")
-                logging.error(f"#Err: {message}")
-                raise e
-
-        if recieved.header.correlation_id not in self.recieved_msg_dict:
-            self.recieved_msg_dict[recieved.header.correlation_id] = []
-            self.recieved_msg_dict[recieved.header.correlation_id].append(recieved)
-
+        self.compression_counters.record(
+            "received", recieved.header.protocol, recieved.header.message_type, len(message), wire_size
+        )
         if recieved.header.correlation_id is not None:
-            with self.lock:
-                if recieved.header.correlation_id in self.pending_requests:
-                    event, _ = self.pending_requests[recieved.header.correlation_id]
-                    self.pending_requests[recieved.header.correlation_id] = (
-                        event,
-                        self.recieved_msg_dict[recieved.header.correlation_id],
-                    )
-                    event.set()
-        asyncio.run(handle_msg(self.spec, self, message))
+            self.pending_requests.dispatch(recieved, len(message))
+        try:
+            self._get_handler_loop().run_until_complete(self._handle_message(recieved))
+        except Exception as e:
+            logging.error(f"#ERR: {type(e).__name__}")
+            logging.error(f"#Err: {recieved.header}")
+            raise e
+
+        if not self.session_event.is_set():
+            if isinstance(recieved.body, OpenSession) and self.is_connected():
+                self.session_event.set()
+            elif isinstance(recieved.body, ProtocolException):
+                self._session_failed(recieved.body)
 
         self._notify_listeners(EventType.ON_MESSAGE, ws=ws, message=message, received=recieved)
 
-    def send_and_wait(self, req, timeout: int = 5) -> List[Message]:
+    def send_and_wait(
+        self, req, timeout: int = 5, on_part: Optional[Callable[[Message], None]] = None
+    ) -> List[Message]:
         """
         Sends an ETP message and waits passively for all answers.
-        Returns a list of all messages received.
+        Returns a list of all messages received, once the final part (FINALPART flag) of the answer is received.
 
         Args:
             req: The request to send
-            timeout: Maximum time to wait for a response in seconds
+            timeout: Maximum time to wait for a response in seconds. For multipart answers, it is the maximum
+                time between two parts.
+            on_part: Optional callback called with each part of the answer as soon as it is received. It is called
+                from the websocket thread and must not block.
 
         Returns:
             List[Message]: List of received messages
@@ -570,52 +830,122 @@ class ETPSimpleClient:
             RuntimeError: If WebSocket connection is closed while waiting
         """
         t_start_send = time.time()
-        msg_id = self.send(req=req, timeout=timeout)
+        pending = self._send_request(req, timeout=timeout, on_part=on_part)
         logging.debug(f"[PERF] Message sent in {time.time() - t_start_send:.2f} seconds")
 
-        # Create event that will be triggered by on_message or on_close
-        event = threading.Event()
-
-        # Register a connection_closed callback if not already present
-        if not hasattr(self, "_connection_closed_events"):
-            self._connection_closed_events = set()
-
-        self._connection_closed_events.add(event)
-
-        with self.lock:
-            self.pending_requests[msg_id] = (event, None)
-
-        # Passive waiting - simply wait on the event with timeout
-        if not event.wait(timeout):
-            logging.debug(f"[PERF] timeout after {timeout} seconds for message ID: {msg_id}")
-            # Timeout occurred
-            with self.lock:
-                self.pending_requests.pop(msg_id, None)
-                if hasattr(self, "_connection_closed_events"):
-                    self._connection_closed_events.discard(event)
-            raise TimeoutError(f"No response received for message ID: {msg_id} within {timeout} seconds")
-
-        # Check if the wait was interrupted by connection close
-        if self.closed or self.stop_event.is_set():
-            with self.lock:
-                self.pending_requests.pop(msg_id, None)
-                if hasattr(self, "_connection_closed_events"):
-                    self._connection_closed_events.discard(event)
-            raise RuntimeError("WebSocket connection closed while waiting for response")
-
-        # Get the response
-        with self.lock:
-            logging.debug(f"[PERF] message {msg_id} received after {time.time() - t_start_send:.2f} seconds")
-            _, response = self.pending_requests.pop(msg_id, (None, None))
-            if hasattr(self, "_connection_closed_events"):
-                self._connection_closed_events.discard(event)
-
-        return response if response else []
+        try:
+            # Passive waiting - the deadline is pushed back each time a part is received
+            while True:
+                try:
+                    response = pending.future.result(
+                        timeout=max(0.0, pending.last_activity + timeout - time.monotonic())
+                    )
+                    break
+                except FutureTimeoutError:
+                    if pending.is_expired():
+                        logging.debug(f"[PERF] timeout after {timeout} seconds for message ID: {pending.msg_id}")
+                        raise TimeoutError(
+                            f"No response received for message ID: {pending.msg_id} within {timeout} seconds"
+                        )
+        finally:
+            self.pending_requests.discard(pending.msg_id)
+
+        logging.debug(f"[PERF] message {pending.msg_id} received after {time.time() - t_start_send:.2f} seconds")
+        return response
+
+    def send_async(
+        self, req, timeout: Optional[float] = None, on_part: Optional[Callable[[Message], None]] = None
+    ) -> "Future[List[Message]]":
+        """
+        Sends an ETP message without waiting for its answer. Several requests can be sent back-to-back and their
+        answers gathered later, avoiding a full round trip per request.
+
+        Example:
+        ```python
+        futures = [client.send_async(req) for req in requests]
+        answers = [f.result(timeout=30) for f in futures]
+        ```
+
+        Args:
+            req: The request to send
+            timeout: If set, the future fails with a TimeoutError when no part of the answer has been received for
+                this delay in seconds. Without timeout, the request is only released by its answer or the connection
+                closing.
+            on_part: Optional callback called with each part of the answer as soon as it is received. It is called
+                from the websocket thread and must not block.
+
+        Returns:
+            Future[List[Message]]: resolved with all the parts of the answer once the final part is received.
+            It fails with a RuntimeError if the connection is closed before.
+        """
+        return self._send_request(req, timeout=timeout, on_part=on_part).future
+
+    def wait_future(self, future: "Future[Any]") -> Any:
+        """Waits for a future of send_async (or derived from it) and returns its result. While waiting, the requests
+        sent with a timeout are expired even if nothing is received anymore from the server.
+
+        Raises:
+            TimeoutError: If a request sent with a timeout did not receive anything for this delay
+            RuntimeError: If WebSocket connection is closed while waiting
+        """
+        while True:
+            try:
+                return future.result(timeout=EXPIRY_CHECK_PERIOD)
+            except FutureTimeoutError:
+                self.pending_requests.expire()
+
+    def _send_request(
+        self, req, timeout: Optional[float] = None, on_part: Optional[Callable[[Message], None]] = None
+    ) -> PendingRequest:
+        # Future resolved by on_message with the final part, or failed by on_close
+        future: Future = Future()
+        pending = None
+        reserved = self._wait_for_window(timeout, reserve=True)
+
+        def register(msg_id: int):
+            # Registered before the message is sent so that a fast answer cannot be missed
+            nonlocal pending
+            pending = self.pending_requests.register(msg_id, future, on_part, timeout=timeout, reserved=reserved)
+
+        try:
+            self._send(req, on_msg_id=register)
+        except Exception:
+            if pending is not None:
+                self.pending_requests.discard(pending.msg_id)
+            elif reserved:
+                self.pending_requests.release_slot()
+            raise
+        assert pending is not None
+        pending.last_activity = time.monotonic()
+        return pending
+
+    def _wait_for_window(self, timeout: Optional[float], reserve: bool = False) -> bool:
+        """Blocks while the in-flight window (max_in_flight_requests/max_in_flight_bytes) is full.
+        Returns True if a slot has been reserved.
+        """
+        if threading.current_thread() is self.thread:
+            # Sending from a listener: the websocket thread must not wait for answers it is the only one to read
+            return False
+        waited = self.pending_requests.acquire_slot(timeout=timeout, reserve=reserve)
+        if waited > 0:
+            logging.debug(f"[PERF] waited {waited:.3f} seconds for a slot in the in-flight window")
+        return reserve
 
     def send(self, req, timeout: int = 5) -> int:
         """
-        Sends an ETP message and wait for all answers.
+        Sends an ETP message without registering it for an answer.
         Returns the message id
+
+        Args:
+            req: The request to send
+            timeout: Maximum time in seconds to wait for room in the in-flight window.
+        """
+        self._wait_for_window(timeout)
+        return self._send(req)
+
+    def _send(self, req, on_msg_id: Optional[Callable[[int], None]] = None) -> int:
+        """Encodes and sends an ETP message. on_msg_id is called with the message id before the first part
+        is sent.
         """
         if not self.ws:
             raise RuntimeError("WebSocket is not connected.")
@@ -631,9 +961,7 @@ class ETPSimpleClient:
         for (
             m_id,
             msg_to_send,
-        ) in self.spec.send_msg_and_error_generator(
-            obj_msg, None  # type: ignore
-        ):
+        ) in self._encode_message(obj_msg):
             if DEBUG:
                 # only use for debugging
                 _dg_msg = Message.decode_binary_message(msg_to_send, ETPConnection.generic_transition_table)
@@ -643,19 +971,11 @@ class ETPSimpleClient:
                     )
                 else:
                     MSG_ID_LOGGER.debug(f"[{self.url}] Sending: [{m_id:0>4.0f}] (could not decode message)")
-            self.ws.send(msg_to_send, websocket.ABNF.OPCODE_BINARY)
             if msg_id < 0:
                 msg_id = m_id
+                if on_msg_id is not None:
+                    on_msg_id(msg_id)
+            self.ws.send(self._encode_frame(obj_msg.header, msg_to_send), websocket.ABNF.OPCODE_BINARY)
             # logging.debug(obj_msg)
 
         return msg_id
-
-    def is_connected(self):
-        """Checks if the WebSocket connection is open and the etp connexion is active
-
-        Returns:
-            bool: True if connected, False otherwise
-        """
-        # logging.debug(self.spec)
-        # return self.spec.is_connected
-        return self.spec is not None and self.spec.is_connected and not self.closed
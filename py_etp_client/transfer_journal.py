@@ -0,0 +1,140 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+On-disk journal of the chunks of a data array transfer, so that a transfer interrupted halfway (expired token,
+network failure, process killed...) can be resumed instead of restarted.
+
+The journal is a JSON lines file: a first line describing the transfer (operation, array, dimensions, type...) and
+one line per chunk completed, with its (start, count) and the CRC32 of its values. When the same transfer is run
+again with the same journal, the chunks already recorded are skipped if their values still have the same checksum:
+the local values for an upload, the values already written in the destination (e.g. a memory mapped file) for a
+download. A journal describing another transfer is started over.
+
+An upload also records the storeLastWrite of the array after its chunks are written: it is resumed only if the array
+has not been written by anyone else since.
+"""
+import json
+import logging
+import os
+import zlib
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+def chunk_checksum(values: Any) -> int:
+    """CRC32 of the values of a chunk, in C order."""
+    return zlib.crc32(np.ascontiguousarray(values).data)
+
+
+class TransferJournal:
+    """Journal of the chunks completed by a transfer, stored in a file (see the module documentation).
+
+    Args:
+        path (Union[str, os.PathLike]): the journal file, created if needed
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"]):
+        self.path = os.fspath(path)
+        self.transfer: Optional[Dict[str, Any]] = None
+        self.chunks: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], int] = {}
+        self.store_last_write: Optional[int] = None
+        self._file: Optional[Any] = None
+
+    def __enter__(self) -> "TransferJournal":
+        return self
+
+    def __exit__(self, *exc: Any):
+        self.close()
+
+    def load(self, transfer: Dict[str, Any]) -> bool:
+        """Reads the journal file, if it describes this transfer.
+
+        Args:
+            transfer (Dict[str, Any]): description of the transfer (JSON serializable)
+
+        Returns:
+            bool: True if the file is a journal of this transfer, whose completed chunks are now known. False if there
+            is no such file or if it describes another transfer: begin() must be called to start a new journal.
+        """
+        self.transfer = None
+        self.chunks = {}
+        self.store_last_write = None
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        try:
+            if not lines or json.loads(lines[0]).get("transfer") != json.loads(json.dumps(transfer)):
+                logging.info(f"The journal {self.path} describes another transfer: starting over")
+                return False
+        except ValueError:
+            logging.warning(f"The journal {self.path} cannot be read: starting over")
+            return False
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+                if "store_last_write" in entry:
+                    self.store_last_write = entry["store_last_write"]
+                    continue
+                self.chunks[(tuple(entry["start"]), tuple(entry["count"]))] = entry["crc32"]
+            except (ValueError, KeyError, TypeError):
+                # The last line of a transfer killed while writing it may be incomplete
+                logging.warning(f"Skipping an invalid line of the journal {self.path}: {line!r}")
+        self.transfer = transfer
+        logging.info(f"Resuming the transfer of the journal {self.path}: {len(self.chunks)} chunks already done")
+        return True
+
+    def begin(self, transfer: Dict[str, Any]):
+        """Starts a new journal for this transfer, the file being overwritten."""
+        self.close()
+        self.transfer = transfer
+        self.chunks = {}
+        self.store_last_write = None
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"transfer": transfer}) + "\n")
+
+    def resume(self, transfer: Dict[str, Any]) -> bool:
+        """Loads the journal of this transfer, or begins a new one.
+
+        Returns:
+            bool: True if the transfer is resumed, False if it starts over
+        """
+        if self.load(transfer):
+            return True
+        self.begin(transfer)
+        return False
+
+    def is_done(self, start: Sequence[int], count: Sequence[int], values: Any) -> bool:
+        """True if the chunk (start, count) is recorded in the journal with the checksum of these values."""
+        checksum = self.chunks.get((tuple(int(s) for s in start), tuple(int(c) for c in count)))
+        return checksum is not None and checksum == chunk_checksum(values)
+
+    def record(self, start: Sequence[int], count: Sequence[int], values: Any):
+        """Records a completed chunk, with the checksum of its values. The line is flushed at once."""
+        if self.transfer is None:
+            raise RuntimeError(f"The journal {self.path} has not been started")
+        start = [int(s) for s in start]
+        count = [int(c) for c in count]
+        checksum = chunk_checksum(values)
+        self.chunks[(tuple(start), tuple(count))] = checksum
+        self._write({"start": start, "count": count, "crc32": checksum})
+
+    def record_store_last_write(self, store_last_write: Optional[int]):
+        """Records the storeLastWrite of the array once written by the transfer. The line is flushed at once."""
+        if self.transfer is None:
+            raise RuntimeError(f"The journal {self.path} has not been started")
+        self.store_last_write = store_last_write
+        self._write({"store_last_write": store_last_write})
+
+    def _write(self, entry: Dict[str, Any]):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self):
+        """Closes the journal file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,352 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Pipelined transfer of the chunks of a large data array.
+
+A chunked transfer sends one request per chunk (GetDataSubarrays, PutDataSubarrays, ...). Sending them one after
+the other leaves the connection idle during each round trip: run_chunks keeps up to `max_parallel` requests in
+flight on the same session, submits the next chunk as soon as one completes and retries the failed chunks.
+
+plan_chunks cuts an N-dimensional array into such chunks: tiles as large as the message size allows, aligned on the
+preferred subarray dimensions of the store when it announces some. pack_bins does the opposite for many small
+arrays: it groups them in as few messages as possible. merge_regions joins the regions of an array requested
+together that overlap or touch, before they are packed.
+"""
+import itertools
+import logging
+import math
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from py_etp_client.correlation import EXPIRY_CHECK_PERIOD
+
+# Called with the number of chunks completed and the total number of chunks
+ProgressCallback = Callable[[int, int], None]
+
+
+class ChunkTransferError(Exception):
+    """Raised when a chunk could not be transferred, after its retries."""
+
+    def __init__(self, chunk: int, attempts: int, cause: BaseException):
+        super().__init__(f"Chunk {chunk} failed after {attempts} attempt(s): {cause}")
+        self.chunk = chunk
+        self.attempts = attempts
+        self.cause = cause
+
+
+@dataclass
+class ChunkStatus:
+    """Outcome of the transfer of a chunk of a data array."""
+
+    index: int
+    starts: List[int]
+    counts: List[int]
+    success: bool = False
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+def tile_shape(
+    dimensions: Sequence[int],
+    item_size: int,
+    max_bytes: int,
+    preferred_dimensions: Optional[Sequence[int]] = None,
+) -> List[int]:
+    """Returns the counts of the largest tile of an array that fits in max_bytes.
+
+    The tile starts from the preferred dimensions (1 along each dimension without preference) and grows by whole
+    multiples of them, from the last dimension to the first one. Along a dimension, a tile count is thus either the
+    full extent or a multiple of the preferred count, and the tiles are contiguous in memory (C order) whenever the
+    dimensions after the first partial one are complete. If even the preferred tile does not fit, the preferred
+    dimensions are ignored.
+
+    Args:
+        dimensions (Sequence[int]): dimensions of the array
+        item_size (int): size of a value in bytes
+        max_bytes (int): maximum size of the values of a tile in bytes
+        preferred_dimensions (Optional[Sequence[int]], optional): preferred subarray dimensions (e.g. the
+            preferredSubarrayDimensions of the DataArrayMetadata). Ignored if it does not have one positive value per
+            dimension. Defaults to None.
+
+    Returns:
+        List[int]: the counts of a tile along each dimension
+
+    Raises:
+        ValueError: if a single value does not fit in max_bytes
+    """
+    budget = max_bytes // max(1, item_size)
+    if budget < 1:
+        raise ValueError(
+            f"Cannot split the array: a value of {item_size} bytes exceeds the limit of {max_bytes} bytes"
+        )
+    dimensions = [max(1, int(d)) for d in dimensions]
+    base = [1] * len(dimensions)
+    if (
+        preferred_dimensions
+        and len(preferred_dimensions) == len(dimensions)
+        and all(int(p) > 0 for p in preferred_dimensions)
+    ):
+        base = [min(int(p), d) for p, d in zip(preferred_dimensions, dimensions)]
+        if math.prod(base) > budget:
+            logging.info(
+                f"Preferred subarray dimensions {list(preferred_dimensions)} exceed {max_bytes} bytes, ignored"
+            )
+            base = [1] * len(dimensions)
+
+    counts = list(base)
+    for d in reversed(range(len(dimensions))):
+        others = math.prod(counts[:d] + counts[d + 1 :])
+        count = budget // others
+        counts[d] = dimensions[d] if count >= dimensions[d] else max(base[d], count // base[d] * base[d])
+    return counts
+
+
+def plan_chunks(
+    dimensions: Sequence[int],
+    item_size: int,
+    max_bytes: int,
+    preferred_dimensions: Optional[Sequence[int]] = None,
+) -> List[Tuple[List[int], List[int]]]:
+    """Cuts an array into tiles of at most max_bytes (see tile_shape), in C order.
+
+    Args:
+        dimensions (Sequence[int]): dimensions of the array
+        item_size (int): size of a value in bytes
+        max_bytes (int): maximum size of the values of a tile in bytes
+        preferred_dimensions (Optional[Sequence[int]], optional): preferred subarray dimensions. Defaults to None.
+
+    Returns:
+        List[Tuple[List[int], List[int]]]: the (starts, counts) of each tile. The tiles at the end of a dimension
+        may be smaller.
+
+    Raises:
+        ValueError: if a single value does not fit in max_bytes
+    """
+    return grid_chunks(dimensions, tile_shape(dimensions, item_size, max_bytes, preferred_dimensions))
+
+
+def grid_chunks(dimensions: Sequence[int], tile: Sequence[int]) -> List[Tuple[List[int], List[int]]]:
+    """Cuts an array into tiles of the given shape, in C order.
+
+    Args:
+        dimensions (Sequence[int]): dimensions of the array
+        tile (Sequence[int]): counts of a tile along each dimension
+
+    Returns:
+        List[Tuple[List[int], List[int]]]: the (starts, counts) of each tile. The tiles at the end of a dimension
+        may be smaller.
+    """
+    return [
+        (list(starts), [min(t, d - s) for s, t, d in zip(starts, tile, dimensions)])
+        for starts in itertools.product(*(range(0, d, max(1, int(t))) for d, t in zip(dimensions, tile)))
+    ]
+
+
+def pack_bins(sizes: Sequence[int], capacity: int, max_count: Optional[int] = None) -> List[List[int]]:
+    """Packs items into as few bins as possible (first fit decreasing), e.g. arrays into messages.
+
+    Args:
+        sizes (Sequence[int]): size of each item
+        capacity (int): maximum total size of the items of a bin. An item larger than that gets a bin of its own.
+        max_count (Optional[int], optional): maximum number of items in a bin. Defaults to None (no limit).
+
+    Returns:
+        List[List[int]]: the indices of the items of each bin
+    """
+    bins: List[List[int]] = []
+    free: List[int] = []
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        for b, room in enumerate(free):
+            if sizes[i] <= room and (not max_count or len(bins[b]) < max_count):
+                bins[b].append(i)
+                free[b] -= sizes[i]
+                break
+        else:
+            bins.append([i])
+            free.append(capacity - sizes[i])
+    return bins
+
+
+def merge_regions(
+    regions: Sequence[Tuple[Sequence[int], Sequence[int]]],
+) -> Tuple[List[Tuple[List[int], List[int]]], List[int]]:
+    """Merges the regions (starts, counts) of an array that overlap or touch, when their union is a region too: the
+    regions with the same extent in all the dimensions but one, and overlapping or adjacent in that one. Merging is
+    repeated until no more regions can be merged, so that e.g. the four quarters of an array become the whole array.
+
+    Args:
+        regions (Sequence[Tuple[Sequence[int], Sequence[int]]]): (starts, counts) of each region
+
+    Returns:
+        Tuple[List[Tuple[List[int], List[int]]], List[int]]: the merged regions, and for each region given the index
+        of the merged region that contains it
+    """
+    boxes = [(tuple(int(s) for s in starts), tuple(int(c) for c in counts)) for starts, counts in regions]
+    merged = list(dict.fromkeys(boxes))
+    index = {box: i for i, box in enumerate(merged)}
+    owners = [index[box] for box in boxes]
+    nb_dims = len(boxes[0][0]) if boxes else 0
+    changed = True
+    while changed:
+        changed = False
+        for d in range(nb_dims):
+
+            def _others(box: Tuple[Tuple[int, ...], Tuple[int, ...]]) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+                return box[0][:d] + box[0][d + 1 :], box[1][:d] + box[1][d + 1 :]
+
+            # Sorted by extent in the other dimensions, then by start in d: the mergeable regions are consecutive
+            order = sorted(range(len(merged)), key=lambda i: (_others(merged[i]), merged[i][0][d]))
+            joined: List[Tuple[Tuple[int, ...], Tuple[int, ...]]] = []
+            moved = [0] * len(merged)
+            for i in order:
+                starts, counts = merged[i]
+                if (
+                    joined
+                    and _others(joined[-1]) == _others(merged[i])
+                    and starts[d] <= joined[-1][0][d] + joined[-1][1][d]
+                ):
+                    last_starts, last_counts = joined[-1]
+                    end = max(last_starts[d] + last_counts[d], starts[d] + counts[d])
+                    joined[-1] = (last_starts, last_counts[:d] + (end - last_starts[d],) + last_counts[d + 1 :])
+                else:
+                    joined.append((starts, counts))
+                moved[i] = len(joined) - 1
+            changed = changed or len(joined) < len(merged)
+            owners = [moved[o] for o in owners]
+            merged = joined
+    return [(list(starts), list(counts)) for starts, counts in merged], owners
+
+
+def chunk_slices(starts: Sequence[int], counts: Sequence[int]) -> Tuple[slice, ...]:
+    """Returns the numpy index of the chunk (starts, counts) of an array."""
+    return tuple(slice(s, s + c) for s, c in zip(starts, counts))
+
+
+def iter_chunks(
+    nb_chunks: int,
+    submit: Callable[[int], "Future[Any]"],
+    max_parallel: int = 1,
+    retries: int = 0,
+    poll: Optional[Callable[[], None]] = None,
+) -> Iterator[Tuple[int, Any, int, Optional[ChunkTransferError]]]:
+    """Transfers nb_chunks chunks with at most max_parallel requests in flight, and yields them as they complete.
+
+    A chunk fails when its future raises an exception or is resolved with None (the answer was an error). A failed
+    chunk is submitted again, up to `retries` times. New chunks are only submitted while the generator is consumed:
+    the requests in flight go on while the caller processes a chunk, which reads ahead up to max_parallel chunks.
+    When the generator is closed before the end, it waits for the requests still in flight (their answers may be
+    written into the caller's buffers), which are dropped.
+
+    Args:
+        nb_chunks (int): number of chunks, numbered from 0
+        submit (Callable[[int], Future[Any]]): sends the request of a chunk and returns its future
+        max_parallel (int, optional): maximum number of chunks in flight. Defaults to 1.
+        retries (int, optional): number of retries of each chunk. Defaults to 0.
+        poll (Optional[Callable[[], None]], optional): called periodically while waiting, e.g. to expire the
+            requests that timed out. Defaults to None.
+
+    Yields:
+        Tuple[int, Any, int, Optional[ChunkTransferError]]: (chunk, result, attempts, error) for each chunk, in the
+        order they complete. error is set (and result None) if the chunk failed after its retries.
+    """
+    next_chunk = 0
+    completed = 0
+    attempts: Dict[int, int] = {}
+    in_flight: Dict["Future[Any]", int] = {}
+
+    def _submit(chunk: int):
+        attempts[chunk] = attempts.get(chunk, 0) + 1
+        try:
+            future = submit(chunk)
+        except Exception as e:
+            # e.g. the in-flight window stayed full: handled as a failed attempt
+            future = Future()
+            future.set_exception(e)
+        in_flight[future] = chunk
+
+    try:
+        while completed < nb_chunks:
+            while next_chunk < nb_chunks and len(in_flight) < max(1, max_parallel):
+                _submit(next_chunk)
+                next_chunk += 1
+
+            done, _ = wait(list(in_flight), timeout=EXPIRY_CHECK_PERIOD, return_when=FIRST_COMPLETED)
+            if not done:
+                if poll is not None:
+                    poll()
+                continue
+
+            for future in done:
+                chunk = in_flight.pop(future)
+                error: Optional[BaseException] = future.exception()
+                result = future.result() if error is None else None
+                if error is None and result is None:
+                    error = RuntimeError("the server answered with an error")
+                if error is not None and attempts[chunk] <= retries:
+                    logging.warning(f"Chunk {chunk} failed ({error}), retrying ({attempts[chunk]}/{retries})")
+                    _submit(chunk)
+                    continue
+                completed += 1
+                failure = ChunkTransferError(chunk, attempts[chunk], error) if error is not None else None
+                yield chunk, result, attempts[chunk], failure
+    finally:
+        # Stopped early (failure, consumer gone): the requests in flight are waited for (and expired by poll)
+        while in_flight:
+            done, _ = wait(list(in_flight), timeout=EXPIRY_CHECK_PERIOD)
+            for future in done:
+                in_flight.pop(future)
+            if in_flight and poll is not None:
+                poll()
+
+
+def run_chunks(
+    nb_chunks: int,
+    submit: Callable[[int], "Future[Any]"],
+    max_parallel: int = 1,
+    retries: int = 0,
+    on_progress: Optional[ProgressCallback] = None,
+    on_chunk: Optional[Callable[[int, Any, int], None]] = None,
+    poll: Optional[Callable[[], None]] = None,
+    fail_fast: bool = True,
+) -> List[ChunkTransferError]:
+    """Transfers nb_chunks chunks with at most max_parallel requests in flight (see iter_chunks).
+
+    When a chunk has exhausted its retries and fail_fast is set, no new chunk is submitted and ChunkTransferError is
+    raised once the chunks still in flight are completed (their results are dropped). Otherwise the other chunks are still transferred and the
+    failures are returned.
+
+    Args:
+        nb_chunks (int): number of chunks, numbered from 0
+        submit (Callable[[int], Future[Any]]): sends the request of a chunk and returns its future
+        max_parallel (int, optional): maximum number of chunks in flight. Defaults to 1.
+        retries (int, optional): number of retries of each chunk. Defaults to 0.
+        on_progress (Optional[ProgressCallback], optional): called with (completed chunks, nb_chunks) after each
+            chunk. Defaults to None.
+        on_chunk (Optional[Callable[[int, Any, int], None]], optional): called with (chunk, result, attempts) when a
+            chunk succeeds. Defaults to None.
+        poll (Optional[Callable[[], None]], optional): called periodically while waiting, e.g. to expire the
+            requests that timed out. Defaults to None.
+        fail_fast (bool, optional): stop at the first chunk failing after its retries. Defaults to True.
+
+    Returns:
+        List[ChunkTransferError]: the chunks that failed after their retries (always empty with fail_fast)
+
+    Raises:
+        ChunkTransferError: with fail_fast, if a chunk failed after its retries
+    """
+    completed = 0
+    failures: List[ChunkTransferError] = []
+    with closing(iter_chunks(nb_chunks, submit, max_parallel, retries, poll)) as chunks:
+        for chunk, result, attempts, failure in chunks:
+            if failure is not None:
+                if fail_fast:
+                    raise failure
+                failures.append(failure)
+            elif on_chunk is not None:
+                on_chunk(chunk, result, attempts)
+            completed += 1
+            if on_progress is not None:
+                on_progress(completed, nb_chunks)
+    return failures
@@ -0,0 +1,301 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+"""
+In-memory ETP store used by the tests: it answers the binary frames sent by the clients without any network.
+"""
+import queue
+import threading
+import uuid as pyUUID
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from energyml.utils.constants import epoch
+from etpproto.connection import ETPConnection
+from etpproto.messages import Message, MessageFlags
+from etptypes.energistics.etp.v12.datatypes.error_info import ErrorInfo
+
+from py_etp_client import (
+    ActiveStatusKind,
+    AnyArrayType,
+    DataArray,
+    DataArrayMetadata,
+    DataObject,
+    GetDataArrayMetadata,
+    GetDataArrayMetadataResponse,
+    GetDataArrays,
+    GetDataArraysResponse,
+    GetDataObjects,
+    GetDataObjectsResponse,
+    GetDataSubarrays,
+    GetDataSubarraysResponse,
+    OpenSession,
+    Ping,
+    Pong,
+    PutDataArrays,
+    PutDataArraysResponse,
+    PutDataSubarrays,
+    PutDataSubarraysResponse,
+    PutUninitializedDataArrays,
+    ProtocolException,
+    PutUninitializedDataArraysResponse,
+    RequestSession,
+    Resource,
+    Uuid,
+)
+from py_etp_client.compression import compress_frame, decompress_frame
+from py_etp_client.avro_arrays import decode_message, encode_message
+from py_etp_client.etp_requests import get_any_array_type, get_numpy_any_array
+
+LOGICAL_ARRAY_TYPES = {
+    "bool": "arrayOfBoolean",
+    "int32": "arrayOfInt32LE",
+    "int64": "arrayOfInt64LE",
+    "float32": "arrayOfFloat32LE",
+    "float64": "arrayOfDouble64LE",
+}
+
+
+def encode_answer(request: Message, body, msg_id: int, final: bool = True, multipart: bool = False) -> bytes:
+    flags = MessageFlags.NONE
+    if multipart:
+        flags |= MessageFlags.MULTIPART
+    if final:
+        flags |= MessageFlags.FINALPART
+    answer = Message.get_object_message(
+        body, msg_id=msg_id, correlation_id=request.header.message_id, message_flags=flags
+    )
+    assert answer is not None
+    return encode_message(answer.header, answer.body) or answer.encode_message()
+
+
+class FakeETPStore:
+    """Answers ETP requests from an in-memory dict of arrays {(uri, path_in_resource): np.ndarray} and of data
+    objects {uri: xml}. If compression is set (e.g. "gzip") and requested by the client, the answers are compressed.
+    protocol_capabilities ({protocol number: capabilities}) are announced in the OpenSession.
+    The storeLastWrite of an array is the number of writes received by the store when it was last written.
+    """
+
+    def __init__(
+        self,
+        endpoint_capabilities: Optional[Dict] = None,
+        compression: str = "",
+        protocol_capabilities: Optional[Dict[int, Dict]] = None,
+    ):
+        self.arrays: Dict[tuple, np.ndarray] = {}
+        self.preferred_subarray_dimensions: Dict[tuple, List[int]] = {}
+        self.store_last_write: Dict[tuple, int] = {}
+        self.nb_writes = 0
+        self.data_objects: Dict[str, str] = {}
+        self.endpoint_capabilities = endpoint_capabilities or {}
+        self.protocol_capabilities = protocol_capabilities or {}
+        self.compression = compression
+        self.negotiated_compression = ""
+        self.received: List[Message] = []
+        self.msg_id = 1
+        self.handlers: Dict[type, Callable] = {
+            RequestSession: self.on_request_session,
+            Ping: lambda req: [Pong(currentDateTime=epoch())],
+            GetDataObjects: self.on_get_data_objects,
+            GetDataArrays: self.on_get_data_arrays,
+            GetDataSubarrays: self.on_get_data_subarrays,
+            GetDataArrayMetadata: self.on_get_data_array_metadata,
+            PutDataArrays: self.on_put_data_arrays,
+            PutDataSubarrays: self.on_put_data_subarrays,
+            PutUninitializedDataArrays: self.on_put_uninitialized_data_arrays,
+        }
+
+    def touch(self, key: tuple):
+        """Records a write of an array."""
+        self.nb_writes += 1
+        self.store_last_write[key] = self.nb_writes
+
+    def consume_msg_id(self) -> int:
+        self.msg_id += 2
+        return self.msg_id
+
+    def answer(self, frame: bytes) -> List[bytes]:
+        """Returns the binary answers to a binary request."""
+        frame = decompress_frame(frame)
+        request = decode_message(frame) or Message.decode_binary_message(frame, ETPConnection.generic_transition_table)
+        assert request is not None
+        self.received.append(request)
+        handler = self.handlers.get(type(request.body))
+        if handler is None:
+            return []
+        bodies = handler(request.body)
+        answers = [
+            encode_answer(request, body, self.consume_msg_id(), final=i == len(bodies) - 1, multipart=len(bodies) > 1)
+            for i, body in enumerate(bodies)
+        ]
+        if self.negotiated_compression:
+            answers = [compress_frame(answer) for answer in answers]
+        return answers
+
+    def on_request_session(self, req: RequestSession):
+        self.negotiated_compression = self.compression if self.compression in req.supported_compression else ""
+        supported_protocols = [
+            sp.copy(update={"protocol_capabilities": self.protocol_capabilities.get(sp.protocol, {})})
+            for sp in req.requested_protocols
+        ]
+        return [
+            OpenSession(
+                applicationName="fake store",
+                applicationVersion="1.0",
+                serverInstanceId=Uuid(pyUUID.uuid4().bytes),
+                supportedProtocols=supported_protocols,
+                supportedDataObjects=[],
+                currentDateTime=epoch(),
+                earliestRetainedChangeTime=0,
+                sessionId=Uuid(pyUUID.uuid4().bytes),
+                endpointCapabilities=self.endpoint_capabilities,
+                supportedCompression=self.negotiated_compression,
+            )
+        ]
+
+    def on_get_data_objects(self, req: GetDataObjects):
+        res = {}
+        for k, uri in req.uris.items():
+            resource = Resource(
+                uri=uri,
+                name=uri,
+                lastChanged=epoch(),
+                storeLastWrite=epoch(),
+                storeCreated=epoch(),
+                activeStatus=ActiveStatusKind.ACTIVE,
+            )
+            res[k] = DataObject(resource=resource, data=self.data_objects[uri].encode())
+        return [GetDataObjectsResponse(dataObjects=res)]
+
+    def on_get_data_arrays(self, req: GetDataArrays):
+        res = {}
+        for k, uid in req.data_arrays.items():
+            array = self.arrays[(uid.uri, uid.path_in_resource)]
+            res[k] = DataArray(dimensions=list(array.shape), data=get_numpy_any_array(array))
+        return [GetDataArraysResponse(dataArrays=res)]
+
+    def on_get_data_subarrays(self, req: GetDataSubarrays):
+        res = {}
+        for k, sub in req.data_subarrays.items():
+            array = self.arrays[(sub.uid.uri, sub.uid.path_in_resource)]
+            slices = tuple(slice(s, s + c) for s, c in zip(sub.starts, sub.counts))
+            res[k] = DataArray(dimensions=list(sub.counts), data=get_numpy_any_array(array[slices]))
+        return [GetDataSubarraysResponse(dataSubarrays=res)]
+
+    def on_get_data_array_metadata(self, req: GetDataArrayMetadata):
+        res = {}
+        errors = {}
+        for k, uid in req.data_arrays.items():
+            array = self.arrays.get((uid.uri, uid.path_in_resource))
+            if array is None:
+                errors[k] = ErrorInfo(message=f"{uid.uri} {uid.path_in_resource} not found", code=11)
+                continue
+            res[k] = DataArrayMetadata(
+                dimensions=list(array.shape),
+                transportArrayType=get_any_array_type(str(array.dtype)),
+                logicalArrayType=LOGICAL_ARRAY_TYPES.get(str(array.dtype), "arrayOfCustom"),
+                storeLastWrite=self.store_last_write.get((uid.uri, uid.path_in_resource), 0),
+                storeCreated=epoch(),
+                preferredSubarrayDimensions=self.preferred_subarray_dimensions.get(
+                    (uid.uri, uid.path_in_resource), []
+                ),
+            )
+        return [GetDataArrayMetadataResponse(arrayMetadata=res)] + (
+            [ProtocolException(errors=errors)] if errors else []
+        )
+
+    def on_put_data_arrays(self, req: PutDataArrays):
+        for k, pda in req.data_arrays.items():
+            values = np.asarray(pda.array.data.item.values)
+            self.arrays[(pda.uid.uri, pda.uid.path_in_resource)] = values.reshape(pda.array.dimensions)
+            self.touch((pda.uid.uri, pda.uid.path_in_resource))
+        return [PutDataArraysResponse(success={k: "" for k in req.data_arrays})]
+
+    def on_put_subarrays_into(self, uid, starts, counts, values):
+        array = self.arrays[(uid.uri, uid.path_in_resource)]
+        slices = tuple(slice(s, s + c) for s, c in zip(starts, counts))
+        array[slices] = np.asarray(values).reshape(counts)
+        self.touch((uid.uri, uid.path_in_resource))
+
+    def on_put_data_subarrays(self, req: PutDataSubarrays):
+        for k, psa in req.data_subarrays.items():
+            self.on_put_subarrays_into(psa.uid, psa.starts, psa.counts, psa.data.item.values)
+        return [PutDataSubarraysResponse(success={k: "" for k in req.data_subarrays})]
+
+    def on_put_uninitialized_data_arrays(self, req: PutUninitializedDataArrays):
+        dtypes = {
+            AnyArrayType.ARRAY_OF_DOUBLE: np.float64,
+            AnyArrayType.ARRAY_OF_FLOAT: np.float32,
+            AnyArrayType.ARRAY_OF_LONG: np.int64,
+            AnyArrayType.ARRAY_OF_INT: np.int32,
+            AnyArrayType.ARRAY_OF_BOOLEAN: np.bool_,
+        }
+        for k, pua in req.data_arrays.items():
+            key = (pua.uid.uri, pua.uid.path_in_resource)
+            self.arrays[key] = np.zeros(pua.metadata.dimensions, dtype=dtypes[pua.metadata.transport_array_type])
+            self.preferred_subarray_dimensions[key] = list(pua.metadata.preferred_subarray_dimensions or [])
+            self.touch(key)
+        return [PutUninitializedDataArraysResponse(success={k: "" for k in req.data_arrays})]
+
+
+class FakeWebSocket:
+    """Stands for the websocket.WebSocketApp of an ETPSimpleClient: the frames sent by the client are answered by
+    the store from another thread, as a real connection would, through client.on_message.
+    """
+
+    def __init__(self, client, store: FakeETPStore):
+        self.client = client
+        self.store = store
+        self.frames: queue.Queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def send(self, data: bytes, opcode=None):
+        self.frames.put(data)
+
+    def close(self):
+        self.frames.put(None)
+
+    def _run(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            for answer in self.store.answer(frame):
+                self.client.on_message(self, answer)
+
+
+def connect_to_store(client, store: FakeETPStore, timeout: float = 5) -> FakeWebSocket:
+    """Opens the ETP session of an ETPSimpleClient on a FakeETPStore."""
+    client.closed = False
+    client._init_connection()
+    ws = FakeWebSocket(client, store)
+    client.ws = ws
+    client.on_open(ws)
+    assert client.wait_connected(timeout), "ETP session not opened"
+    return ws
+
+
+def serve_store(store: FakeETPStore, host: str = "127.0.0.1", latency: float = 0):
+    """Serves a FakeETPStore on a real websocket (requires the websockets module), from a daemon thread.
+    With a latency (in seconds), the answers are sent after this delay, without delaying the next requests.
+
+    Returns:
+        the websockets server (stop it with server.shutdown()) and its url
+    """
+    from websockets.sync.server import serve
+
+    def send_all(ws, answers: List[bytes]):
+        for answer in answers:
+            ws.send(answer)
+
+    def handler(ws):
+        for frame in ws:
+            answers = store.answer(frame)
+            if latency > 0:
+                threading.Timer(latency, send_all, (ws, answers)).start()
+            else:
+                send_all(ws, answers)
+
+    server = serve(handler, host, 0, subprotocols=[ETPConnection.SUB_PROTOCOL], close_timeout=0.1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"ws://{host}:{server.socket.getsockname()[1]}"
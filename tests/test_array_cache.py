@@ -0,0 +1,100 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import numpy as np
+
+from py_etp_client import GetDataArrayMetadata, GetDataArrays, GetDataSubarrays
+from py_etp_client.array_cache import ArrayChunkCache
+from py_etp_client.etpclient import ETPClient
+from tests.fake_etp_server import FakeETPStore, connect_to_store
+
+URI = "eml:///dataspace('test')/resqml20.obj_Grid2dRepresentation(00000000-0000-0000-0000-000000000001)"
+
+
+def test_lru_eviction_by_bytes():
+    cache = ArrayChunkCache(max_bytes=3 * 80)
+    tickets = [cache.ticket(URI, "/values", [i], [10]) for i in range(4)]
+    for i, ticket in enumerate(tickets[:3]):
+        cache.put(ticket, np.full(10, i, dtype=np.float64))
+    assert cache.get(tickets[0]) is not None  # the first chunk becomes the most recently used
+    cache.put(tickets[3], np.full(10, 3, dtype=np.float64))
+
+    assert cache.nbytes == 3 * 80
+    assert cache.get(tickets[1]) is None
+    assert [cache.get(tickets[i])[0] for i in (0, 2, 3)] == [0, 2, 3]
+    # A chunk larger than the cache is never kept
+    cache.put(cache.ticket(URI, "/large"), np.zeros(100))
+    assert cache.nbytes == 3 * 80
+
+
+def test_invalidation_and_store_last_write():
+    cache = ArrayChunkCache(max_bytes=1 << 20)
+    cache.set_store_last_write(URI, "/values", 1)
+    ticket = cache.ticket(URI, "/values", [0], [10])
+    cache.put(ticket, np.arange(10))
+    assert not cache.get(ticket).flags.writeable
+
+    # Another version of the array: the chunks of the previous one are dropped
+    cache.set_store_last_write(URI, "/values", 2)
+    assert cache.get(ticket) is None and cache.nbytes == 0
+
+    # An answer requested before a write of the client is not kept
+    in_flight = cache.ticket(URI, "/values", [0], [10])
+    cache.invalidate(URI, "/values")
+    cache.put(in_flight, np.arange(10))
+    assert cache.get(cache.ticket(URI, "/values", [0], [10])) is None
+
+
+def test_client_serves_reads_from_cache():
+    values = np.arange(64 * 50, dtype=np.float64).reshape(64, 50)
+    store = FakeETPStore()
+    store.arrays[(URI, "/values")] = values.copy()
+    client = ETPClient(url="ws://localhost:0")
+    client.array_cache = ArrayChunkCache(max_bytes=1 << 20)
+    connect_to_store(client, store)
+
+    def requests(kind):
+        return sum(isinstance(m.body, kind) for m in store.received)
+
+    # The large array is retrieved in 8 subarrays once, then only its metadata is requested again
+    for _ in range(2):
+        result = client.get_data_array_safe(URI, "/values", max_subarray_size=3200)
+        np.testing.assert_array_equal(result, values)
+    assert requests(GetDataSubarrays) == 8 and requests(GetDataArrayMetadata) == 2
+
+    for _ in range(2):
+        np.testing.assert_array_equal(client.get_data_array(URI, "/values"), values)
+        np.testing.assert_array_equal(client.get_data_subarray(URI, "/values", [2, 0], [3, 50]), values[2:5].ravel())
+    assert requests(GetDataArrays) == 1 and requests(GetDataSubarrays) == 8 + 1
+
+    # A cached array can be modified by the caller without altering the cache
+    client.get_data_array(URI, "/values")[:] = 0
+    np.testing.assert_array_equal(client.get_data_array(URI, "/values"), values)
+
+    # The writes of the client drop the cached chunks
+    assert client.put_data_array(URI, "/values", values.ravel() * 2, values.shape)
+    np.testing.assert_array_equal(client.get_data_array(URI, "/values"), values * 2)
+    assert requests(GetDataArrays) == 2
+
+    # The writes of another client are detected by get_data_array_safe, from the storeLastWrite of the metadata
+    store.arrays[(URI, "/values")][:] = -1
+    store.touch((URI, "/values"))
+    np.testing.assert_array_equal(client.get_data_array_safe(URI, "/values", max_subarray_size=3200), -1)
+
+
+def test_metadata_future_records_store_last_write():
+    values = np.arange(10, dtype=np.float64)
+    store = FakeETPStore()
+    store.arrays[(URI, "/values")] = values.copy()
+    client = ETPClient(url="ws://localhost:0")
+    client.array_cache = ArrayChunkCache(max_bytes=1 << 20)
+    connect_to_store(client, store)
+
+    assert "0" in client.get_data_array_metadata_future(URI, "/values").result(timeout=5)
+    np.testing.assert_array_equal(client.get_data_array(URI, "/values"), values)
+
+    # Written by another client: the metadata read with the future API drops the cached array
+    store.arrays[(URI, "/values")][:] = -1
+    store.touch((URI, "/values"))
+    client.get_data_array_metadata_future(URI, "/values").result(timeout=5)
+    np.testing.assert_array_equal(client.get_data_array(URI, "/values"), -1)
+    assert sum(isinstance(m.body, GetDataArrays) for m in store.received) == 2
@@ -0,0 +1,73 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+
+import numpy as np
+import pytest
+
+from tests.fake_etp_server import FakeETPStore
+
+websockets = pytest.importorskip("websockets")
+from websockets.asyncio.server import serve  # noqa: E402
+
+from py_etp_client.asyncetpclient import AsyncETPClient  # noqa: E402
+
+
+async def _serve_store(store: FakeETPStore):
+    async def handler(ws):
+        async for frame in ws:
+            for answer in store.answer(frame):
+                await ws.send(answer)
+
+    return await serve(handler, "127.0.0.1", 0, subprotocols=["etp12.energistics.org"])
+
+
+def test_async_client_concurrent_requests():
+    store = FakeETPStore()
+    store.arrays[("eml:///dataspace('test')", "/values")] = np.arange(12, dtype=np.float64).reshape((3, 4))
+
+    async def scenario():
+        server = await _serve_store(store)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async with AsyncETPClient(url=f"ws://127.0.0.1:{port}") as client:
+                assert client.is_connected()
+                pings = await asyncio.gather(*[client.ping() for _ in range(200)])
+                array = await client.get_data_array("test", "/values")
+                assert len(client.pending_requests) == 0
+            return pings, array
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    pings, array = asyncio.run(scenario())
+    assert all(pings)
+    np.testing.assert_array_equal(array, np.arange(12, dtype=np.float64).reshape((3, 4)))
+
+
+def test_async_client_data_arrays():
+    store = FakeETPStore()
+    uri = "eml:///dataspace('test')"
+    values = np.arange(12, dtype=np.int64).reshape((3, 4))
+
+    async def scenario():
+        server = await _serve_store(store)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async with AsyncETPClient(url=f"ws://127.0.0.1:{port}") as client:
+                assert await client.put_uninitialized_data_array(uri, "/values", [3, 4], data_type="int64")
+                metadata = (await client.get_data_array_metadata(uri, "/values"))["0"]
+                assert list(metadata.dimensions) == [3, 4]
+                response = await client.put_data_subarray(uri, "/values", values[1:].ravel(), [1, 0], [2, 4])
+                assert response is not None and "0" in response.success
+                out = np.zeros((2, 4), dtype=np.int64)
+                assert await client.get_data_subarray(uri, "/values", [1, 0], [2, 4], out=out) is out
+                assert "0" in await client.put_data_array(uri, "/other", values.ravel(), values.shape)
+                return out, await client.get_data_array(uri, "/other")
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    out, other = asyncio.run(scenario())
+    np.testing.assert_array_equal(out, values[1:])
+    np.testing.assert_array_equal(other, values)
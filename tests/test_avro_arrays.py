@@ -0,0 +1,126 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import numpy as np
+import pytest
+from etpproto.connection import ETPConnection
+from etpproto.messages import Message, MessageFlags
+
+from py_etp_client import DataArray, GetDataObjects, GetDataSubarraysResponse
+from py_etp_client.avro_arrays import (
+    decode_message,
+    decode_varints,
+    encode_body,
+    encode_long,
+    encode_message,
+    encode_varints,
+)
+from py_etp_client.etp_requests import get_any_array, put_data_arrays, put_data_subarrays
+from py_etp_client.etpclient import ETPClient
+from tests.fake_etp_server import FakeETPStore, connect_to_store
+
+URI = "eml:///dataspace('test')/resqml20.obj_Grid2dRepresentation(00000000-0000-0000-0000-000000000000)"
+
+ARRAYS = [
+    np.random.default_rng(0).random((3, 4)),
+    np.random.default_rng(0).random(7, dtype=np.float32),
+    np.array([0, -1, 1, -64, 64, 2**40, -(2**62), 2**63 - 1, -(2**63)], dtype=np.int64),
+    np.arange(-300, 300, dtype=np.int32),
+    np.array([True, False, True]),
+    np.array(["a", "bc"]),
+    np.array([], dtype=np.float64),
+]
+
+
+def _encode(body) -> bytes:
+    msg = Message.get_object_message(body, msg_id=2, message_flags=MessageFlags.FINALPART)
+    assert msg is not None
+    res = encode_message(msg.header, msg.body)
+    assert res is not None
+    return res
+
+
+@pytest.mark.parametrize("array", ARRAYS, ids=lambda a: str(a.dtype))
+def test_encoding_matches_etpproto(array):
+    body = put_data_arrays(URI, "/values", array, list(array.shape))
+    # The validated (list based) message gives the reference encoding
+    expected_body = body.copy(deep=True)
+    expected_body.data_arrays["0"].array.data = get_any_array(array)
+    expected = Message.get_object_message(expected_body, msg_id=2, message_flags=MessageFlags.FINALPART)
+    assert expected is not None
+    assert _encode(body) == expected.encode_message()
+
+    frame = _encode(put_data_subarrays(URI, "/values", array, [0], [array.size]))
+    decoded = Message.decode_binary_message(frame, ETPConnection.generic_transition_table)
+    assert decoded is not None
+    np.testing.assert_array_equal(np.array(decoded.body.data_subarrays["0"].data.item.values), array.ravel())
+    fast = decode_message(frame)
+    assert fast is not None
+    assert fast.body.data_subarrays["0"].uid == decoded.body.data_subarrays["0"].uid
+    assert fast.body.data_subarrays["0"].counts == [array.size]
+    np.testing.assert_array_equal(np.asarray(fast.body.data_subarrays["0"].data.item.values), array.ravel())
+
+
+def test_varints_block_boundaries(monkeypatch):
+    monkeypatch.setattr("py_etp_client.avro_arrays.VARINT_BLOCK_SIZE", 3)
+    values = np.array([1, 200, -70000, 5, 0, 2**33, -1])
+    expected = encode_varints(values[:3]) + encode_varints(values[3:])
+    assert encode_varints(values) == expected
+
+
+def test_other_messages_are_left_to_etpproto():
+    assert encode_body(GetDataObjects(uris={"0": URI})) is None
+    frame = Message.get_object_message(GetDataObjects(uris={"0": URI}), msg_id=2).encode_message()
+    assert decode_message(frame) is None
+
+
+@pytest.mark.parametrize("array", ARRAYS, ids=lambda a: str(a.dtype))
+def test_decoding_matches_etpproto(array):
+    # Encoded by etpproto from the validated (list based) model
+    body = GetDataSubarraysResponse(dataSubarrays={"0": DataArray(dimensions=[array.size], data=get_any_array(array))})
+    frame = Message.get_object_message(body, msg_id=3, correlation_id=2).encode_message()
+
+    decoded = decode_message(frame)
+    expected = Message.decode_binary_message(frame, ETPConnection.generic_transition_table)
+    assert decoded is not None and expected is not None
+    assert decoded.header == expected.header
+    values = decoded.body.data_subarrays["0"].data.item.values
+    assert type(decoded.body.data_subarrays["0"].data.item) is type(expected.body.data_subarrays["0"].data.item)
+    np.testing.assert_array_equal(np.asarray(values), np.asarray(expected.body.data_subarrays["0"].data.item.values))
+    if isinstance(values, np.ndarray):
+        assert values.flags.writeable
+
+
+def test_decode_varints_in_blocks(monkeypatch):
+    monkeypatch.setattr("py_etp_client.avro_arrays.VARINT_BLOCK_SIZE", 3)
+    values = np.array([1, 200, -70000, 5, 0, 2**33, -1, 2**63 - 1, -(2**63)])
+    data = np.frombuffer(encode_varints(values) + b"trailing", dtype=np.uint8)
+    decoded, size = decode_varints(data, len(values))
+    np.testing.assert_array_equal(decoded, values)
+    assert data[size:].tobytes() == b"trailing"
+
+
+def test_decode_multiple_blocks():
+    msg = Message.get_object_message(
+        GetDataSubarraysResponse(dataSubarrays={"0": DataArray(dimensions=[4], data=get_any_array([1.0, 2.0]))}),
+        msg_id=3,
+        correlation_id=2,
+    )
+    frame = msg.encode_message()
+    # Replace the values block (count 2) by two blocks, the second one with a negative count and its byte size
+    single = encode_long(2) + np.array([1.0, 2.0]).tobytes() + b"\x00"
+    blocks = encode_long(1) + np.array([1.0]).tobytes() + encode_long(-3) + encode_long(24)
+    blocks += np.array([2.0, 3.0, 4.0]).tobytes() + b"\x00"
+    decoded = decode_message(frame.replace(single, blocks))
+    assert decoded is not None
+    np.testing.assert_array_equal(decoded.body.data_subarrays["0"].data.item.values, [1.0, 2.0, 3.0, 4.0])
+
+
+def test_put_and_get_array_through_fast_encoding():
+    store = FakeETPStore()
+    client = ETPClient(url="ws://localhost:0")
+    connect_to_store(client, store)
+
+    values = np.arange(-5000, 5000, dtype=np.int64).reshape((100, 100))
+    assert client.put_data_array(URI, "/indices", values, list(values.shape))
+    np.testing.assert_array_equal(store.arrays[(URI, "/indices")], values)
+    np.testing.assert_array_equal(client.get_data_array(URI, "/indices"), values)
@@ -0,0 +1,44 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+from py_etp_client import DataValue, GetDataObjects
+from py_etp_client.etpclient import ETPClient
+from py_etp_client.etpconfig import ServerConfig
+from tests.fake_etp_server import FakeETPStore, connect_to_store
+
+
+def test_server_message_size_is_adopted():
+    store = FakeETPStore(endpoint_capabilities={"MaxWebSocketMessagePayloadSize": DataValue(item=128000000)})
+    client = ETPClient(config=ServerConfig(url="ws://localhost:0"))
+    assert client.max_message_size() == 900000
+    connect_to_store(client, store)
+
+    assert client.server_capabilities == {"MaxWebSocketMessagePayloadSize": 128000000}
+    assert client.spec.client_info.getCapability("MaxWebSocketMessagePayloadSize") == 128000000
+    assert client.max_message_size() == 128000000
+
+
+def test_configured_limit_lowers_server_capability():
+    store = FakeETPStore(
+        endpoint_capabilities={
+            "MaxWebSocketMessagePayloadSize": DataValue(item=128000000),
+            "MaxWebSocketFramePayloadSize": DataValue(item=128000000),
+        }
+    )
+    client = ETPClient(config=ServerConfig(url="ws://localhost:0", max_web_socket_message_payload_size=2000000))
+    connect_to_store(client, store)
+
+    assert client.max_message_size() == 2000000
+    assert client.spec.client_info.getCapability("MaxWebSocketMessagePayloadSize") == 2000000
+
+
+def test_get_data_object_batches_by_max_response_count():
+    store = FakeETPStore(protocol_capabilities={4: {"MaxResponseCount": DataValue(item=2)}})
+    uris = [f"eml:///dataspace('test')/resqml20.obj_Grid2dRepresentation({i})" for i in range(5)]
+    store.data_objects = {uri: f"<obj id='{i}'/>" for i, uri in enumerate(uris)}
+    client = ETPClient(config=ServerConfig(url="ws://localhost:0"))
+    connect_to_store(client, store)
+
+    assert client.get_capability("MaxResponseCount", 4) == 2
+    assert client.get_data_object(uris) == [f"<obj id='{i}'/>".encode() for i in range(5)]
+    assert client.get_data_object_future(uris[:3]).result(timeout=2) == [f"<obj id='{i}'/>".encode() for i in range(3)]
+    assert len([m for m in store.received if isinstance(m.body, GetDataObjects)]) == 3 + 2
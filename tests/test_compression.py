@@ -0,0 +1,56 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import numpy as np
+from energyml.utils.constants import epoch
+from etpproto.messages import Message, MessageFlags
+
+from py_etp_client import Pong
+from py_etp_client.compression import compress_frame, decompress_frame, read_header
+from py_etp_client.etp_requests import default_request_session
+from py_etp_client.etpclient import ETPClient
+from py_etp_client.etpconfig import ServerConfig
+from tests.fake_etp_server import FakeETPStore, connect_to_store
+
+
+def test_compress_frame_roundtrip():
+    msg = Message.get_object_message(Pong(currentDateTime=epoch()), msg_id=2)
+    frame = msg.encode_message()
+
+    compressed = compress_frame(frame + b"\0" * 1000)
+    header, _ = read_header(compressed)
+    assert header["messageFlags"] & MessageFlags.COMPRESSED
+    assert len(compressed) < len(frame) + 100
+    assert decompress_frame(compressed) == frame + b"\0" * 1000
+
+    # Below the threshold, or forbidden by the specification: unchanged
+    assert compress_frame(frame, threshold=len(frame)) == frame
+    session = Message.get_object_message(default_request_session(), msg_id=2).encode_message()
+    assert compress_frame(session) == session
+
+
+def test_compression_is_negotiated_and_transparent():
+    store = FakeETPStore(compression="gzip")
+    client = ETPClient(config=ServerConfig(url="ws://localhost:0", compression="gzip", compression_threshold=100))
+    connect_to_store(client, store)
+    assert client.compression == "gzip"
+
+    uri = "eml:///dataspace('test')/resqml20.obj_Grid2dRepresentation(00000000-0000-0000-0000-000000000000)"
+    values = np.zeros((100, 100), dtype=np.int64)
+    assert client.put_data_array(uri, "/indices", values, list(values.shape))
+    np.testing.assert_array_equal(client.get_data_array(uri, "/indices"), values)
+
+    stats = client.compression_stats()
+    assert stats["sent"]["PutDataArrays"]["compressed_messages"] == 1
+    assert stats["sent"]["PutDataArrays"]["ratio"] > 5
+    assert stats["received"]["GetDataArraysResponse"]["ratio"] > 5
+    assert stats["sent"]["RequestSession"]["compressed_messages"] == 0
+
+
+def test_no_compression_unless_requested():
+    store = FakeETPStore(compression="gzip")
+    client = ETPClient(config=ServerConfig(url="ws://localhost:0"))
+    connect_to_store(client, store)
+
+    assert client.compression is None
+    assert client.ping()
+    assert client.compression_stats()["received"]["Pong"]["compressed_messages"] == 0
@@ -0,0 +1,140 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+from energyml.utils.constants import epoch
+from etpproto.messages import Message, MessageFlags
+
+from py_etp_client import Pong, correlation
+from py_etp_client.correlation import CorrelationTable, gather_futures
+
+
+def _answer(correlation_id: int, final: bool = True) -> Message:
+    flags = MessageFlags.MULTIPART | (MessageFlags.FINALPART if final else MessageFlags.NONE)
+    msg = Message.get_object_message(
+        Pong(currentDateTime=epoch()), msg_id=correlation_id + 1, correlation_id=correlation_id, message_flags=flags
+    )
+    assert msg is not None
+    return msg
+
+
+def test_entry_dropped_once_answer_delivered():
+    table = CorrelationTable()
+    future: Future = Future()
+    table.register(2, future)
+
+    table.dispatch(_answer(2, final=False), size=100)
+    assert table.live_entries == 1
+    assert table.bytes_retained == 100
+    assert not future.done()
+
+    table.dispatch(_answer(2), size=50)
+    assert len(future.result()) == 2
+    assert table.stats() == {
+        "live_entries": 0,
+        "bytes_retained": 0,
+        "evictions": 0,
+        "delivered": 1,
+        "retained_answers": 0,
+        "window_queue_depth": 0,
+        "window_waits": 0,
+        "window_wait_time": 0.0,
+        "window_max_wait_time": 0.0,
+    }
+
+
+def test_dispatch_interleaved_with_discard():
+    table = CorrelationTable(retention_count=2, max_bytes=1000)
+    future: Future = Future()
+    # The caller gives up (timeout) while the parts are dispatched: discard runs between the bookkeeping of a part
+    # and the completion of the request
+    table.register(2, future, on_part=lambda msg: table.discard(2) if msg.is_final_msg() else None)
+    table.dispatch(_answer(2, final=False), size=100)
+    assert table.bytes_retained == 100
+
+    assert table.dispatch(_answer(2), size=50) is None
+    assert table.bytes_retained == 0 and table._pending_bytes == 0
+    assert table.delivered == 0 and table.evictions == 1 and table.retained() == {}
+    assert not future.done()
+    table.acquire_slot(timeout=0.05)
+
+
+def test_discard_and_fail_all_count_evictions():
+    table = CorrelationTable()
+    table.register(2, Future())
+    table.discard(2)
+    future: Future = Future()
+    table.register(4, future)
+    table.fail_all(RuntimeError("closed"))
+
+    assert table.live_entries == 0
+    assert table.evictions == 2
+    with pytest.raises(RuntimeError):
+        future.result()
+
+
+def test_retention_is_capped():
+    table = CorrelationTable(retention_count=2, retention_bytes=250)
+    for msg_id in (2, 4, 6):
+        table.register(msg_id, Future())
+        table.dispatch(_answer(msg_id), size=100)
+
+    assert list(table.retained().keys()) == [4, 6]
+    assert table.evictions == 1
+
+    # late answer nobody waits for, pushes the oldest out because of the size cap
+    table.dispatch(_answer(8), size=100)
+    assert list(table.retained().keys()) == [6, 8]
+    assert table.bytes_retained == 200
+
+
+def test_full_window_times_out():
+    table = CorrelationTable(max_requests=1)
+    assert table.acquire_slot(reserve=True) == 0
+    table.register(2, Future(), reserved=True)
+    with pytest.raises(TimeoutError):
+        table.acquire_slot(timeout=0.05)
+    assert table.window_waits == 1 and table.window_queue_depth == 0
+
+    table.dispatch(_answer(2), size=10)
+    table.acquire_slot(timeout=0.05)
+
+
+class _SlowFuture(Future):
+    """Future pausing after done(), so that concurrent check-then-set callers interleave."""
+
+    def done(self) -> bool:
+        done = super().done()
+        time.sleep(0.05)
+        return done
+
+
+def test_gather_futures_failing_concurrently(monkeypatch, caplog):
+    caplog.set_level(logging.ERROR, logger="concurrent.futures")
+    monkeypatch.setattr(correlation, "Future", _SlowFuture)
+    futures = [Future() for _ in range(4)]
+    gathered = gather_futures(futures)
+    barrier = threading.Barrier(len(futures))
+
+    def _fail(future: Future):
+        barrier.wait()
+        future.set_exception(RuntimeError("connection lost"))
+
+    threads = [threading.Thread(target=_fail, args=(f,)) for f in futures]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert isinstance(gathered.exception(timeout=1), RuntimeError)
+    # gathered is resolved once, without InvalidStateError in the callbacks
+    assert not caplog.records
+
+    futures = [Future() for _ in range(3)]
+    gathered = gather_futures(futures)
+    for i, future in enumerate(futures):
+        future.set_result(i)
+    assert gathered.result(timeout=1) == [0, 1, 2]
@@ -0,0 +1,62 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import numpy as np
+import pytest
+
+from py_etp_client import GetDataSubarrays
+from py_etp_client.dask_array import ETPClientPool, to_dask
+from py_etp_client.etpclient import ETPClient
+from tests.fake_etp_server import FakeETPStore, connect_to_store
+
+da = pytest.importorskip("dask.array")
+
+URI = "eml:///dataspace('test')"
+
+
+def _store() -> FakeETPStore:
+    store = FakeETPStore()
+    store.arrays[(URI, "/values")] = np.arange(6 * 70 * 80, dtype=np.float64).reshape((6, 70, 80))
+    return store
+
+
+def _client(store: FakeETPStore) -> ETPClient:
+    client = ETPClient(url="ws://localhost:0")
+    connect_to_store(client, store)
+    return client
+
+
+def test_to_dask_chunks_fit_in_a_message():
+    store = _store()
+    client = _client(store)
+    client.max_array_chunk_size = lambda: 8 * 80 * 30  # type: ignore
+
+    values = to_dask(client, URI, "/values")
+    assert values.shape == (6, 70, 80) and values.dtype == np.float64
+    assert values.chunksize == (1, 30, 80)
+
+    store.received.clear()
+    assert values.sum().compute(scheduler="threads") == store.arrays[(URI, "/values")].sum()
+    requests = [m.body for m in store.received if isinstance(m.body, GetDataSubarrays)]
+    assert len(requests) == values.npartitions == 18
+
+    # Only the chunks of the selection are retrieved
+    store.received.clear()
+    np.testing.assert_array_equal(values[2, 40:50].compute(), store.arrays[(URI, "/values")][2, 40:50])
+    assert len(store.received) == 1
+
+
+def test_to_dask_with_a_pool_and_explicit_chunks():
+    store = _store()
+    opened = []
+
+    def open_session() -> ETPClient:
+        opened.append(_client(store))
+        return opened[-1]
+
+    pool = ETPClientPool(open_session)
+    values = to_dask(pool, URI, "/values", chunks=(3, 35, 80))
+    np.testing.assert_array_equal(values.compute(scheduler="threads"), store.arrays[(URI, "/values")])
+    # One session for the process, shared by the tasks
+    assert len(opened) == 1
+    with pytest.raises(ValueError):
+        to_dask(pool, URI, "/missing")
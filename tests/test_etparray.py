@@ -0,0 +1,62 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import numpy as np
+import pytest
+
+from py_etp_client import GetDataSubarrays
+from py_etp_client.etparray import index_region
+from py_etp_client.etpclient import ETPClient
+from tests.fake_etp_server import FakeETPStore, connect_to_store
+
+URI = "eml:///dataspace('test')"
+
+VALUES = np.arange(6 * 7 * 8, dtype=np.float64).reshape((6, 7, 8))
+
+KEYS = [
+    (slice(1, 4), slice(None), 5),
+    (Ellipsis, 2),
+    (-1,),
+    (slice(None, None, -2), 3, slice(1, 7, 3)),
+    (slice(5, 1, -1), None, 0),
+    ([4, 1, 1], slice(2, 3)),
+    (np.array([True, False, True, False, False, True]), 0),
+    (slice(3, 3),),
+    (2, 3, 4),
+    ([],),
+]
+
+
+@pytest.mark.parametrize("key", KEYS)
+def test_index_region_matches_numpy(key):
+    starts, counts, local = index_region(key, VALUES.shape)
+    region = VALUES[tuple(slice(s, s + c) for s, c in zip(starts, counts))]
+    np.testing.assert_array_equal(region[local], VALUES[key])
+
+
+def test_index_region_errors():
+    with pytest.raises(IndexError):
+        index_region((0, 0, 0, 0), VALUES.shape)
+    with pytest.raises(IndexError):
+        index_region(6, VALUES.shape)
+    with pytest.raises(TypeError):
+        index_region("a", VALUES.shape)
+
+
+def test_lazy_array_only_retrieves_the_selection():
+    store = FakeETPStore()
+    store.arrays[(URI, "/values")] = VALUES
+    client = ETPClient(url="ws://localhost:0")
+    connect_to_store(client, store)
+
+    arr = client.array(URI, "/values")
+    assert arr.shape == (6, 7, 8) and arr.dtype == np.float64 and arr.ndim == 3 and len(arr) == 6
+
+    store.received.clear()
+    np.testing.assert_array_equal(arr[1:4, :, 5], VALUES[1:4, :, 5])
+    (request,) = [m.body for m in store.received]
+    assert isinstance(request, GetDataSubarrays)
+    assert request.data_subarrays["0"].starts == [1, 0, 5] and request.data_subarrays["0"].counts == [3, 7, 1]
+
+    np.testing.assert_array_equal(np.asarray(arr), VALUES)
+    with pytest.raises(ValueError):
+        client.array(URI, "/missing")
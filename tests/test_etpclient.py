@@ -0,0 +1,358 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import math
+
+import numpy as np
+import pytest
+from etptypes.energistics.etp.v12.datatypes.error_info import ErrorInfo
+
+from py_etp_client import DataValue, GetDataSubarrays, PutDataSubarrays, ProtocolException
+from py_etp_client.avro_arrays import encode_varints
+from py_etp_client.etp_requests import create_data_array_metadata, get_wire_item_size
+from py_etp_client.etpclient import ETPClient
+from tests.fake_etp_server import FakeETPStore, connect_to_store
+
+URI = "eml:///dataspace('test')"
+
+
+def _client(store: FakeETPStore) -> ETPClient:
+    client = ETPClient(url="ws://localhost:0")
+    connect_to_store(client, store)
+    return client
+
+
+def test_future_variants_match_blocking_calls():
+    store = FakeETPStore()
+    values = np.arange(60, dtype=np.float64).reshape((6, 10))
+    store.arrays[(URI, "/values")] = values
+    client = _client(store)
+
+    futures = [client.get_data_subarray_future(URI, "/values", [i, 0], [1, 10], timeout=2) for i in range(6)]
+    rows = [f.result(timeout=2) for f in futures]
+
+    np.testing.assert_array_equal(np.concatenate(rows).reshape((6, 10)), values)
+    np.testing.assert_array_equal(client.get_data_array_future(URI, "/values").result(timeout=2), values)
+    np.testing.assert_array_equal(client.get_data_array(URI, "/values"), values)
+    assert client.ping_future().result(timeout=2)
+
+
+def test_get_data_array_safe_writes_chunks_into_out():
+    store = FakeETPStore()
+    values = np.arange(600, dtype=np.int64).reshape((60, 10))
+    store.arrays[(URI, "/values")] = values
+    client = _client(store)
+
+    # 7 rows of 10 int64 per GetDataSubarrays: 9 chunks, the last one incomplete
+    array = client.get_data_array_safe(URI, "/values", max_subarray_size=7 * 10 * 8)
+    assert array is not None and array.dtype == np.int64
+    np.testing.assert_array_equal(array, values)
+
+    out = np.zeros((60, 10), dtype=np.float64)
+    assert client.get_data_array_safe(URI, "/values", max_subarray_size=7 * 10 * 8, out=out) is out
+    np.testing.assert_array_equal(out, values)
+    # Single message path
+    out = np.zeros((60, 10), dtype=np.int64)
+    assert client.get_data_array_safe(URI, "/values", out=out) is out
+    np.testing.assert_array_equal(out, values)
+
+    with pytest.raises(ValueError):
+        client.get_data_array_safe(URI, "/values", out=np.zeros(600))
+
+
+def test_get_data_array_safe_in_parallel_with_retries():
+    store = FakeETPStore()
+    values = np.arange(600, dtype=np.float64).reshape((60, 10))
+    store.arrays[(URI, "/values")] = values
+    get_subarrays = store.handlers[GetDataSubarrays]
+    failures = []
+
+    def flaky(req: GetDataSubarrays):
+        # The chunk starting at row 14 fails once
+        if req.data_subarrays["0"].starts[0] == 14 and not failures:
+            failures.append(req)
+            return [ProtocolException(error=ErrorInfo(message="busy", code=5))]
+        return get_subarrays(req)
+
+    store.handlers[GetDataSubarrays] = flaky
+    client = _client(store)
+
+    progress = []
+    array = client.get_data_array_safe(
+        URI,
+        "/values",
+        max_subarray_size=7 * 10 * 8,
+        max_parallel=4,
+        retries=1,
+        on_progress=lambda *p: progress.append(p),
+    )
+    np.testing.assert_array_equal(array, values)
+    assert len(failures) == 1
+    assert progress == [(i, 9) for i in range(1, 10)]
+
+    # Without retry, the failed chunk fails the whole download
+    failures.clear()
+    assert client.get_data_array_safe(URI, "/values", max_subarray_size=7 * 10 * 8, max_parallel=4) is None
+
+
+def test_put_data_array_safe_in_parallel_reports_each_chunk():
+    store = FakeETPStore()
+    put_subarrays = store.handlers[PutDataSubarrays]
+    calls = []
+
+    def flaky(req: PutDataSubarrays):
+        # The chunk starting at row 14 fails once, the one starting at row 56 always fails
+        start0 = req.data_subarrays["0"].starts[0]
+        calls.append(start0)
+        if (start0 == 14 and calls.count(14) == 1) or start0 == 56:
+            return [ProtocolException(error=ErrorInfo(message="busy", code=5))]
+        return put_subarrays(req)
+
+    store.handlers[PutDataSubarrays] = flaky
+    client = _client(store)
+    values = np.arange(600, dtype=np.float64).reshape((60, 10))
+
+    report = []
+    res = client.put_data_array_safe(
+        URI, "/values", values, max_subarray_size=7 * 10 * 8, max_parallel=4, retries=1, report=report
+    )
+    assert res == {URI: False}
+    assert [(c.index, c.starts, c.counts) for c in report] == [
+        (i, [i * 7, 0], [min(7, 60 - i * 7), 10]) for i in range(9)
+    ]
+    assert [c.index for c in report if not c.success] == [8]
+    assert report[8].attempts == 2 and "busy" in report[8].error
+    assert report[2].success and report[2].attempts == 2
+    # All the other chunks were uploaded
+    np.testing.assert_array_equal(store.arrays[(URI, "/values")][:56], values[:56])
+
+
+@pytest.mark.parametrize("dtype,value", [(np.int64, 2**62), (np.int32, -(2**31))])
+def test_safe_transfers_budget_integers_at_their_varint_size(dtype, value):
+    store = FakeETPStore()
+    values = np.full((40, 100), value, dtype=dtype)
+    values[::2] *= -1 if dtype == np.int64 else 1
+    client = _client(store)
+    max_size = 8000
+
+    assert client.put_data_array_safe(URI, "/values", values, max_subarray_size=max_size)[URI]
+    np.testing.assert_array_equal(store.arrays[(URI, "/values")], values)
+    puts = [m.body for m in store.received if isinstance(m.body, PutDataSubarrays)]
+    assert len(puts) == math.ceil(40 * 100 * get_wire_item_size(values.dtype) / max_size)
+    for put in puts:
+        sent = np.asarray(put.data_subarrays["0"].data.item.values)
+        assert len(encode_varints(sent)) <= max_size
+
+    store.received.clear()
+    np.testing.assert_array_equal(client.get_data_array_safe(URI, "/values", max_subarray_size=max_size), values)
+    gets = [m.body for m in store.received if isinstance(m.body, GetDataSubarrays)]
+    assert all(np.prod(g.data_subarrays["0"].counts) * get_wire_item_size(values.dtype) <= max_size for g in gets)
+
+
+def test_safe_transfers_tile_arrays_whose_dim0_slab_is_too_large():
+    store = FakeETPStore()
+    client = _client(store)
+    # A single row along dimension 0 (40 x 50 float64 = 16000 bytes) exceeds the 4000 bytes limit
+    values = np.arange(2 * 40 * 50, dtype=np.float64).reshape((2, 40, 50))
+
+    report = []
+    res = client.put_data_array_safe(
+        URI, "/values", values, max_subarray_size=4000, report=report, preferred_subarray_dimensions=[1, 8, 16]
+    )
+    assert res == {URI: True}
+    np.testing.assert_array_equal(store.arrays[(URI, "/values")], values)
+    # Tiles of 1 x 8 x 50 values: multiples of the preferred dimensions (or whole), as large as the limit allows
+    assert {tuple(c.counts) for c in report} == {(1, 8, 50)}
+    assert all(s % p == 0 for c in report for s, p in zip(c.starts, [1, 8, 16]))
+    assert sum(np.prod(c.counts) for c in report) == values.size
+
+    # The preferred dimensions are read back from the metadata
+    requested = []
+    get_subarrays = store.handlers[GetDataSubarrays]
+    store.handlers[GetDataSubarrays] = lambda req: requested.append(req.data_subarrays["0"]) or get_subarrays(req)
+    array = client.get_data_array_safe(URI, "/values", max_subarray_size=4000, max_parallel=3)
+    np.testing.assert_array_equal(array, values)
+    assert {tuple(r.counts) for r in requested} == {(1, 8, 50)}
+
+    store.preferred_subarray_dimensions.clear()
+    requested.clear()
+    np.testing.assert_array_equal(client.get_data_array_safe(URI, "/values", max_subarray_size=4000), values)
+    assert {tuple(r.counts) for r in requested} == {(1, 10, 50)}
+
+
+def test_bulk_data_arrays_are_packed_in_few_messages():
+    store = FakeETPStore()
+    client = _client(store)
+    arrays = {(URI, f"/small/{i}"): np.arange(i * 10, dtype=np.float64) + i for i in range(1, 31)}
+    # Does not fit in a single message: sent in subarrays
+    arrays[(URI, "/large")] = np.arange(4000, dtype=np.int64).reshape((40, 100))
+
+    res = client.put_data_arrays(arrays, max_subarray_size=8000, max_parallel=2)
+    assert res == {key: True for key in arrays}
+    put_messages = [type(m.body).__name__ for m in store.received]
+    # 30 small arrays (37 kB of values, 40 kB with their identifiers) in 6 messages, the large one in 5 subarrays
+    # (its int64 values are budgeted at 10 bytes, their largest varint size)
+    assert put_messages.count("PutDataArrays") == 6
+    assert put_messages.count("PutDataSubarrays") == 5
+
+    store.received.clear()
+    keys = list(arrays) + [(URI, "/small/1"), (URI, "/missing")]
+    got = client.get_data_arrays(keys, max_subarray_size=8000, max_parallel=2)
+    assert list(got) == list(arrays) + [(URI, "/missing")]
+    for key, array in arrays.items():
+        np.testing.assert_array_equal(got[key], array)
+    assert got[(URI, "/missing")] is None
+    get_messages = [type(m.body).__name__ for m in store.received]
+    assert get_messages.count("GetDataArrayMetadata") == 1
+    assert get_messages.count("GetDataArrays") == 6
+    # The int64 values are budgeted at 10 bytes (their largest varint size)
+    assert get_messages.count("GetDataSubarrays") == 5
+
+
+def test_bulk_integer_arrays_are_packed_at_their_varint_size():
+    store = FakeETPStore()
+    client = _client(store)
+    arrays = {(URI, f"/ints/{i}"): np.full(300, -(2**62), dtype=np.int64) for i in range(10)}
+
+    assert all(client.put_data_arrays(arrays, max_subarray_size=8000).values())
+    for message in (m.body for m in store.received if type(m.body).__name__ == "PutDataArrays"):
+        encoded = sum(len(encode_varints(np.asarray(a.array.data.item.values))) for a in message.data_arrays.values())
+        assert encoded <= 8000
+
+
+def test_bulk_metadata_and_uninitialized_arrays_within_max_response_count():
+    store = FakeETPStore(protocol_capabilities={9: {"MaxResponseCount": DataValue(item=40)}})
+    client = _client(store)
+    metadata = {(URI, f"/prop/{i}"): create_data_array_metadata([10, i + 1], "int32") for i in range(100)}
+
+    res = client.put_uninitialized_data_arrays(metadata, max_parallel=2)
+    assert res == {key: True for key in metadata}
+    assert [len(m.body.data_arrays) for m in store.received[1:]] == [40, 40, 20]
+    assert store.arrays[(URI, "/prop/7")].shape == (10, 8) and store.arrays[(URI, "/prop/7")].dtype == np.int32
+
+    store.received.clear()
+    got = client.get_data_arrays_metadata(list(metadata) + [(URI, "/missing")])
+    assert len(store.received) == 3
+    assert set(got) == set(metadata)
+    assert got[(URI, "/prop/7")].dimensions == [10, 8]
+
+    # put_data_arrays puts all its large arrays uninitialized in a single message
+    store.received.clear()
+    arrays = {(URI, f"/large/{i}"): np.full((20, 100), i, dtype=np.float64) for i in range(3)}
+    assert client.put_data_arrays(arrays, max_subarray_size=8000) == {key: True for key in arrays}
+    assert [type(m.body).__name__ for m in store.received].count("PutUninitializedDataArrays") == 1
+    for key, array in arrays.items():
+        np.testing.assert_array_equal(store.arrays[key], array)
+
+
+def test_get_data_array_to_sinks(tmp_path):
+    store = FakeETPStore()
+    values = np.arange(2 * 40 * 50, dtype=np.float64).reshape((2, 40, 50))
+    store.arrays[(URI, "/RESQML/values")] = values
+    client = _client(store)
+
+    path = tmp_path / "values.npy"
+    assert client.get_data_array_to(URI, "/RESQML/values", str(path), max_subarray_size=4000, max_parallel=2)
+    np.testing.assert_array_equal(np.load(path, mmap_mode="r"), values)
+
+    memmap = np.memmap(tmp_path / "values.raw", dtype=np.float64, mode="w+", shape=values.shape)
+    assert client.get_data_array_to(URI, "/RESQML/values", memmap, max_subarray_size=4000)
+    np.testing.assert_array_equal(np.fromfile(tmp_path / "values.raw").reshape(values.shape), values)
+
+    with pytest.raises(ValueError):
+        client.get_data_array_to(URI, "/RESQML/values", np.zeros(10))
+    assert not client.get_data_array_to(URI, "/missing", np.zeros(10))
+
+
+def test_get_data_array_to_hdf5(tmp_path):
+    h5py = pytest.importorskip("h5py")
+    store = FakeETPStore()
+    values = np.arange(2 * 40 * 50, dtype=np.int32).reshape((2, 40, 50))
+    store.arrays[(URI, "/RESQML/values")] = values
+    client = _client(store)
+
+    path = tmp_path / "values.h5"
+    assert client.get_data_array_to(URI, "/RESQML/values", path, max_subarray_size=4000)
+    with h5py.File(path, "r") as f:
+        np.testing.assert_array_equal(f["/RESQML/values"][()], values)
+        assert f["/RESQML/values"].dtype == np.int32
+
+    with h5py.File(tmp_path / "other.h5", "w") as f:
+        dataset = f.create_dataset("copy", shape=values.shape, dtype=np.int64)
+        assert client.get_data_array_to(URI, "/RESQML/values", dataset, max_subarray_size=4000)
+        np.testing.assert_array_equal(dataset[()], values)
+
+
+def test_iter_data_array_chunks_reads_ahead():
+    store = FakeETPStore()
+    values = np.arange(2 * 40 * 50, dtype=np.float64).reshape((2, 40, 50))
+    store.arrays[(URI, "/values")] = values
+    client = _client(store)
+
+    submitted = []
+    get_data_subarray_future = client.get_data_subarray_future
+    client.get_data_subarray_future = lambda **kwargs: submitted.append(kwargs) or get_data_subarray_future(**kwargs)
+
+    seen = np.zeros(values.shape, dtype=bool)
+    requested_before_first = None
+    for start, count, chunk in client.iter_data_array_chunks(URI, "/values", max_subarray_size=4000, prefetch=3):
+        if requested_before_first is None:
+            requested_before_first = len(submitted)
+        index = tuple(slice(s, s + c) for s, c in zip(start, count))
+        np.testing.assert_array_equal(chunk, values[index])
+        seen[index] = True
+    assert seen.all()
+    # The next chunks were requested before the first one was processed
+    assert requested_before_first == 3
+
+    chunks = list(client.iter_data_array_chunks(URI, "/values", chunk_shape=[1, 30, 50]))
+    assert sorted((s, c) for s, c, _ in chunks) == [
+        ([0, 0, 0], [1, 30, 50]),
+        ([0, 30, 0], [1, 10, 50]),
+        ([1, 0, 0], [1, 30, 50]),
+        ([1, 30, 0], [1, 10, 50]),
+    ]
+    with pytest.raises(ValueError):
+        next(client.iter_data_array_chunks(URI, "/values", chunk_shape=[2, 40, 50], max_subarray_size=4000))
+
+
+def test_get_data_subarrays_merges_and_packs_regions():
+    store = FakeETPStore()
+    values = np.arange(24 * 20 * 30, dtype=np.float64).reshape((24, 20, 30))
+    store.arrays[(URI, "/values")] = values
+    client = _client(store)
+
+    # Every 4th layer, a layer requested in two adjacent halves and an empty region
+    regions = [([k, 0, 0], [1, 20, 30]) for k in range(0, 24, 4)]
+    regions += [([2, 0, 0], [1, 10, 30]), ([2, 10, 0], [1, 10, 30]), ([1, 5, 0], [0, 3, 30])]
+    store.received.clear()
+    result = client.get_data_subarrays(URI, "/values", regions)
+    for (start, count), region in zip(regions, result):
+        np.testing.assert_array_equal(region, values[tuple(slice(s, s + c) for s, c in zip(start, count))])
+    requests = [m.body for m in store.received if isinstance(m.body, GetDataSubarrays)]
+    assert len(requests) == 1 and len(requests[0].data_subarrays) == 7
+
+    # 2 layers per message, and a region too large for a message, retrieved in subarrays
+    store.received.clear()
+    result = client.get_data_subarrays(
+        URI, "/values", regions[:6] + [([1, 0, 0], [3, 20, 29])], max_subarray_size=12000
+    )
+    np.testing.assert_array_equal(result[-1], values[1:4, :, :29])
+    requests = [m.body for m in store.received if isinstance(m.body, GetDataSubarrays)]
+    assert [len(r.data_subarrays) for r in requests[:3]] == [2, 2, 2] and len(requests) == 3 + 2
+
+    with pytest.raises(ValueError):
+        client.get_data_subarrays(URI, "/values", [([20, 0, 0], [5, 20, 30])])
+
+
+def test_get_data_subarrays_packs_integer_regions_at_their_varint_size():
+    store = FakeETPStore()
+    values = np.full((12, 10, 30), 2**62, dtype=np.int64)
+    store.arrays[(URI, "/values")] = values
+    client = _client(store)
+
+    regions = [([k, 0, 0], [1, 10, 30]) for k in range(0, 12, 2)]
+    for region in client.get_data_subarrays(URI, "/values", regions, max_subarray_size=8000):
+        np.testing.assert_array_equal(region, values[:1])
+    requests = [m.body for m in store.received if isinstance(m.body, GetDataSubarrays)]
+    # 300 values of 10 bytes per layer: 2 layers per message
+    assert [len(r.data_subarrays) for r in requests] == [2, 2, 2]
@@ -0,0 +1,115 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import time
+
+from energyml.utils.constants import epoch
+from etpproto.messages import Message
+
+from py_etp_client import GetResources, GetResourcesResponse, Ping, Pong
+from py_etp_client.etp_requests import default_request_session, get_resources
+from py_etp_client.etpconfig import ServerConfig
+from py_etp_client.etpsimpleclient import ETPSimpleClient, EventType
+from tests.fake_etp_server import FakeETPStore, connect_to_store, encode_answer
+
+
+def _ping_answers(nb: int):
+    answers = []
+    for i in range(nb):
+        request = Message.get_object_message(Ping(currentDateTime=epoch()), msg_id=2 * i + 2)
+        answers.append(encode_answer(request, Pong(currentDateTime=epoch()), msg_id=2 * i + 1))
+    return answers
+
+
+def test_handler_loop_is_reused_between_messages():
+    client = ETPSimpleClient(url="ws://localhost:0")
+    client._init_connection()
+    client.spec.is_connected = True
+
+    loops = set()
+    for answer in _ping_answers(5):
+        client.on_message(None, answer)
+        loops.add(id(client.handler_loop))
+
+    assert len(loops) == 1
+    loop = client.handler_loop
+    assert loop is not None and not loop.is_closed()
+
+    client.stop()
+    assert loop.is_closed()
+    assert client.handler_loop is None
+
+
+def test_received_frames_are_decoded_once(monkeypatch):
+    client = ETPSimpleClient(url="ws://localhost:0")
+    client._init_connection()
+    store = FakeETPStore()
+    request = Message.get_object_message(default_request_session(), msg_id=2)
+    (open_session,) = store.answer(request.encode_message())
+
+    received = []
+    client.add_listener(EventType.ON_MESSAGE, lambda event_type, **kwargs: received.append(kwargs["received"]))
+
+    decode = Message.decode_binary_message
+    calls = []
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(Message, "decode_binary_message", counting_decode)
+    client.on_message(None, open_session)
+
+    assert len(calls) == 1
+    # The handlers ran on the shared decoded message: the OpenSession was processed
+    assert client.spec.is_connected
+    assert len(received) == 1
+
+
+def test_send_and_wait_returns_all_parts_of_multipart_answer():
+    store = FakeETPStore()
+    store.handlers[GetResources] = lambda req: [GetResourcesResponse(resources=[]) for _ in range(3)]
+    client = ETPSimpleClient(url="ws://localhost:0")
+    connect_to_store(client, store)
+
+    streamed = []
+    answers = client.send_and_wait(get_resources(), timeout=2, on_part=streamed.append)
+
+    assert len(answers) == 3
+    assert answers[-1].is_final_msg() and not answers[0].is_final_msg()
+    assert streamed == answers
+    assert len(client.pending_requests) == 0
+
+
+def test_send_async_pipelines_requests():
+    store = FakeETPStore()
+    client = ETPSimpleClient(url="ws://localhost:0")
+    connect_to_store(client, store)
+
+    futures = [client.send_async(Ping(currentDateTime=epoch()), timeout=2) for _ in range(50)]
+    answers = [f.result(timeout=2) for f in futures]
+
+    assert all(isinstance(a[0].body, Pong) for a in answers)
+    assert len(client.pending_requests) == 0
+
+
+def test_in_flight_window_bounds_pending_requests():
+    store = FakeETPStore()
+    client = ETPSimpleClient(config=ServerConfig(url="ws://localhost:0", max_in_flight_requests=2))
+    in_flight = []
+
+    def slow_pong(req):
+        in_flight.append(len(client.pending_requests))
+        time.sleep(0.005)
+        return [Pong(currentDateTime=epoch())]
+
+    store.handlers[Ping] = slow_pong
+    connect_to_store(client, store)
+
+    futures = [client.send_async(Ping(currentDateTime=epoch()), timeout=2) for _ in range(20)]
+    assert all(isinstance(f.result(timeout=2)[0].body, Pong) for f in futures)
+
+    assert max(in_flight) <= 2
+    stats = client.correlation_stats()
+    assert stats["window_waits"] > 0
+    assert stats["window_queue_depth"] == 0
+    assert stats["window_max_wait_time"] <= stats["window_wait_time"]
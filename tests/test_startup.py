@@ -0,0 +1,40 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import socket
+import time
+
+import pytest
+
+from py_etp_client.etpsimpleclient import ETPSimpleClient, EventType
+from tests.fake_etp_server import FakeETPStore, serve_store
+
+pytest.importorskip("websockets")
+
+
+def test_start_returns_once_session_is_opened():
+    server, url = serve_store(FakeETPStore())
+    client = ETPSimpleClient(url=url, max_reconnect_attempts=0)
+    started = []
+    client.add_listener(EventType.START, lambda event_type, **kwargs: started.append(client.is_connected()))
+    try:
+        t_start = time.monotonic()
+        assert client.start(timeout=5)
+        assert time.monotonic() - t_start < 1
+        assert started == [True]
+    finally:
+        server.shutdown()
+        client.stop()
+
+
+def test_start_fails_fast_when_connection_is_refused():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    client = ETPSimpleClient(url=f"ws://127.0.0.1:{port}", max_reconnect_attempts=0)
+    try:
+        t_start = time.monotonic()
+        assert not client.start(timeout=5)
+        assert time.monotonic() - t_start < 1
+        assert client.session_error is not None
+    finally:
+        client.stop()
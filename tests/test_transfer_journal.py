@@ -0,0 +1,165 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import numpy as np
+import pytest
+from etptypes.energistics.etp.v12.datatypes.error_info import ErrorInfo
+
+from py_etp_client import GetDataSubarrays, ProtocolException, PutDataSubarrays, PutUninitializedDataArrays
+from py_etp_client.etpclient import ETPClient
+from py_etp_client.transfer_journal import TransferJournal
+from tests.fake_etp_server import FakeETPStore, connect_to_store
+
+URI = "eml:///dataspace('test')"
+VALUES = np.arange(64 * 50, dtype=np.float64).reshape(64, 50)
+# 8 subarrays of 8 x 50 values
+CHUNK_SIZE = 3200
+
+
+def _client(store: FakeETPStore) -> ETPClient:
+    client = ETPClient(url="ws://localhost:0")
+    connect_to_store(client, store)
+    return client
+
+
+def _fail_after(store: FakeETPStore, request_type: type, nb_successes: int):
+    """Makes the store answer the requests of that type with an error, after nb_successes of them."""
+    handler = store.handlers[request_type]
+    calls = []
+
+    def _handler(req):
+        calls.append(req)
+        if len(calls) > nb_successes:
+            return [ProtocolException(errors={"0": ErrorInfo(message="connection lost", code=5)})]
+        return handler(req)
+
+    store.handlers[request_type] = _handler
+    return handler
+
+
+def _count(store: FakeETPStore, request_type: type) -> int:
+    return sum(isinstance(m.body, request_type) for m in store.received)
+
+
+def test_journal_file(tmp_path):
+    path = tmp_path / "transfer.journal"
+    transfer = {"operation": "get", "dimensions": [4, 4]}
+    with TransferJournal(path) as journal:
+        assert not journal.resume(transfer)
+        journal.record([0, 0], [2, 4], VALUES[:2, :4])
+    with open(path, "a") as f:
+        f.write('{"start": [2, 0], "cou')  # interrupted while writing
+
+    with TransferJournal(path) as journal:
+        assert journal.resume(transfer)
+        assert journal.is_done([0, 0], [2, 4], VALUES[:2, :4])
+        assert not journal.is_done([0, 0], [2, 4], VALUES[2:4, :4])
+        assert not journal.is_done([2, 0], [2, 4], VALUES[2:4, :4])
+        # The journal of another transfer is started over
+        assert not journal.resume({"operation": "get", "dimensions": [4, 5]})
+        assert journal.chunks == {}
+
+
+def test_resume_upload(tmp_path):
+    store = FakeETPStore()
+    client = _client(store)
+    journal = tmp_path / "upload.journal"
+    handler = _fail_after(store, PutDataSubarrays, 3)
+    res = client.put_data_array_safe(URI, "/values", VALUES, max_subarray_size=CHUNK_SIZE, journal=journal)
+    assert res == {URI: False}
+
+    store.handlers[PutDataSubarrays] = handler
+    store.received.clear()
+    report = []
+    res = client.put_data_array_safe(
+        URI, "/values", VALUES, max_subarray_size=CHUNK_SIZE, journal=journal, report=report
+    )
+    assert res == {URI: True}
+    np.testing.assert_array_equal(store.arrays[(URI, "/values")], VALUES)
+    # The array is not put uninitialized again, and only the missing subarrays are sent
+    assert _count(store, PutUninitializedDataArrays) == 0 and _count(store, PutDataSubarrays) == 5
+    assert [chunk.attempts for chunk in report] == [0] * 3 + [1] * 5 and all(chunk.success for chunk in report)
+
+    # Modified values are sent again
+    store.received.clear()
+    values = VALUES.copy()
+    values[-1, -1] = -1
+    assert client.put_data_array_safe(URI, "/values", values, max_subarray_size=CHUNK_SIZE, journal=journal)[URI]
+    assert _count(store, PutDataSubarrays) == 1 and store.arrays[(URI, "/values")][-1, -1] == -1
+
+
+def test_resume_upload_of_a_recreated_array(tmp_path):
+    store = FakeETPStore()
+    client = _client(store)
+    journal = tmp_path / "upload.journal"
+    handler = _fail_after(store, PutDataSubarrays, 3)
+    assert client.put_data_array_safe(URI, "/values", VALUES, max_subarray_size=CHUNK_SIZE, journal=journal) == {
+        URI: False
+    }
+
+    # The array was put again meanwhile with the same dimensions but another type: the upload starts over
+    store.arrays[(URI, "/values")] = np.zeros(VALUES.shape, dtype=np.float32)
+    store.touch((URI, "/values"))
+    store.handlers[PutDataSubarrays] = handler
+    store.received.clear()
+    assert client.put_data_array_safe(URI, "/values", VALUES, max_subarray_size=CHUNK_SIZE, journal=journal)[URI]
+    assert _count(store, PutUninitializedDataArrays) == 1 and _count(store, PutDataSubarrays) == 8
+    assert store.arrays[(URI, "/values")].dtype == np.float64
+    np.testing.assert_array_equal(store.arrays[(URI, "/values")], VALUES)
+
+
+def test_resume_upload_of_an_array_written_by_another_client(tmp_path):
+    store = FakeETPStore()
+    client = _client(store)
+    journal = tmp_path / "upload.journal"
+    handler = _fail_after(store, PutDataSubarrays, 3)
+    assert not client.put_data_array_safe(URI, "/values", VALUES, max_subarray_size=CHUNK_SIZE, journal=journal)[URI]
+    assert TransferJournal(journal).load(
+        {"operation": "put", "uri": URI, "path_in_resource": "/values", "dimensions": [64, 50], "data_type": "float64"}
+    )
+
+    # Another client wrote the array between the two attempts: its values are not kept
+    store.arrays[(URI, "/values")][:] = -1
+    store.touch((URI, "/values"))
+    store.handlers[PutDataSubarrays] = handler
+    store.received.clear()
+    assert client.put_data_array_safe(URI, "/values", VALUES, max_subarray_size=CHUNK_SIZE, journal=journal)[URI]
+    assert _count(store, PutUninitializedDataArrays) == 1 and _count(store, PutDataSubarrays) == 8
+    np.testing.assert_array_equal(store.arrays[(URI, "/values")], VALUES)
+
+
+def test_resume_download_into_memmap(tmp_path):
+    store = FakeETPStore()
+    store.arrays[(URI, "/values")] = VALUES.copy()
+    client = _client(store)
+    journal = tmp_path / "download.journal"
+    sink = tmp_path / "values.npy"
+    handler = _fail_after(store, GetDataSubarrays, 5)
+    assert not client.get_data_array_to(URI, "/values", sink, max_subarray_size=CHUNK_SIZE, journal=journal)
+
+    store.handlers[GetDataSubarrays] = handler
+    store.received.clear()
+    assert client.get_data_array_to(URI, "/values", sink, max_subarray_size=CHUNK_SIZE, journal=journal)
+    assert _count(store, GetDataSubarrays) == 3
+    np.testing.assert_array_equal(np.load(sink), VALUES)
+
+    # get_data_array_safe resumes into a memmap kept between the attempts
+    out = np.lib.format.open_memmap(tmp_path / "out.npy", mode="w+", dtype=np.float64, shape=VALUES.shape)
+    journal = tmp_path / "safe.journal"
+    _fail_after(store, GetDataSubarrays, 2)
+    assert client.get_data_array_safe(URI, "/values", CHUNK_SIZE, out=out, journal=journal) is None
+    store.handlers[GetDataSubarrays] = handler
+    store.received.clear()
+    assert client.get_data_array_safe(URI, "/values", CHUNK_SIZE, out=out, journal=journal) is out
+    assert _count(store, GetDataSubarrays) == 6
+    np.testing.assert_array_equal(out, VALUES)
+
+    # Another version of the array is downloaded again
+    store.arrays[(URI, "/values")] *= 2
+    store.touch((URI, "/values"))
+    store.received.clear()
+    assert client.get_data_array_safe(URI, "/values", CHUNK_SIZE, out=out, journal=journal) is out
+    assert _count(store, GetDataSubarrays) == 8
+    np.testing.assert_array_equal(out, VALUES * 2)
+
+    with pytest.raises(ValueError):
+        client.get_data_array_safe(URI, "/values", CHUNK_SIZE, journal=journal)
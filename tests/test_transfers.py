@@ -0,0 +1,119 @@
+# Copyright (c) 2022-2023 Geosiris.
+# SPDX-License-Identifier: Apache-2.0
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from py_etp_client.transfers import (
+    ChunkTransferError,
+    chunk_slices,
+    iter_chunks,
+    merge_regions,
+    pack_bins,
+    plan_chunks,
+    run_chunks,
+    tile_shape,
+)
+
+
+def _covers(dimensions, chunks) -> bool:
+    seen = np.zeros(dimensions, dtype=np.int64)
+    for starts, counts in chunks:
+        seen[chunk_slices(starts, counts)] += 1
+    return bool((seen == 1).all())
+
+
+@pytest.mark.parametrize(
+    "dimensions,max_bytes,preferred,expected",
+    [
+        ((60, 10), 560, None, [7, 10]),
+        ((2, 4000, 4000), 800_000, None, [1, 25, 4000]),
+        ((2, 4000, 4000), 800_000, [1, 256, 256], [1, 256, 256]),
+        ((2, 4000, 4000), 800_000, [1, 16, 4000], [1, 16, 4000]),
+        # The preferred tile does not fit: ignored
+        ((2, 4000, 4000), 800_000, [1, 64, 4000], [1, 25, 4000]),
+        ((3, 5), 10_000, None, [3, 5]),
+        ((1000,), 80, [3], [9]),
+        # The preferred tile does not fit: ignored
+        ((100, 100), 800, [20, 20], [1, 100]),
+        # Wrong number of preferred dimensions: ignored
+        ((100, 100), 800, [20], [1, 100]),
+    ],
+)
+def test_tile_shape(dimensions, max_bytes, preferred, expected):
+    tile = tile_shape(dimensions, 8, max_bytes, preferred)
+    assert tile == expected
+    assert np.prod(tile) * 8 <= max_bytes
+
+
+@pytest.mark.parametrize(
+    "dimensions,max_bytes,preferred",
+    [((2, 40, 50), 4000, None), ((2, 40, 50), 4000, [1, 8, 16]), ((7, 11, 13), 600, [2, 3, 5]), ((17,), 40, None)],
+)
+def test_plan_chunks_covers_the_array_once(dimensions, max_bytes, preferred):
+    chunks = plan_chunks(dimensions, 8, max_bytes, preferred)
+    assert _covers(dimensions, chunks)
+    assert all(np.prod(counts) * 8 <= max_bytes for _, counts in chunks)
+
+
+def test_plan_chunks_rejects_a_limit_below_a_value():
+    with pytest.raises(ValueError):
+        plan_chunks((10,), 8, 7)
+
+
+def test_pack_bins():
+    assert pack_bins([5, 3, 3, 2, 7, 1], 10) == [[4, 1], [0, 2, 3], [5]]
+    assert pack_bins([1] * 5, 10, max_count=2) == [[0, 1], [2, 3], [4]]
+    # An item larger than the capacity gets a bin of its own
+    assert pack_bins([20, 4], 10) == [[0], [1]]
+    assert pack_bins([], 10) == []
+
+
+def test_merge_regions():
+    # The four quarters of an array become the whole array, once merged along each dimension
+    quarters = [([0, 0], [5, 5]), ([0, 5], [5, 5]), ([5, 0], [5, 5]), ([5, 5], [5, 5]), ([0, 0], [5, 5])]
+    assert merge_regions(quarters) == ([([0, 0], [10, 10])], [0] * 5)
+    # Overlapping rows are merged, as well as a region contained in another one
+    merged, owners = merge_regions([([0, 0], [2, 10]), ([1, 0], [3, 10]), ([6, 0], [1, 10]), ([6, 2], [1, 3])])
+    assert sorted(merged) == [([0, 0], [4, 10]), ([6, 0], [1, 10])]
+    assert [merged[o] for o in owners] == [([0, 0], [4, 10])] * 2 + [([6, 0], [1, 10])] * 2
+    # Layers with a gap between them stay apart
+    layers = [([k, 0, 0], [1, 4, 4]) for k in range(0, 12, 3)]
+    assert sorted(merge_regions(layers)[0]) == layers
+    assert merge_regions([]) == ([], [])
+
+
+def test_iter_chunks_yields_failures_after_retries():
+    calls = []
+
+    def submit(chunk: int) -> "Future":
+        calls.append(chunk)
+        future = Future()
+        # Chunk 1 always fails, chunk 2 fails once
+        future.set_result(None if chunk == 1 or (chunk == 2 and calls.count(2) == 1) else chunk * 10)
+        return future
+
+    results = list(iter_chunks(4, submit, max_parallel=2, retries=1))
+    assert sorted((c, r, a) for c, r, a, _ in results) == [(0, 0, 1), (1, None, 2), (2, 20, 2), (3, 30, 1)]
+    assert [f.chunk for _, _, _, f in results if f is not None] == [1]
+
+
+def test_run_chunks_waits_for_chunks_in_flight_on_failure():
+    futures = []
+
+    def submit(chunk: int) -> "Future":
+        future = Future()
+        if chunk == 0:
+            future.set_result(None)
+        else:
+            # The other chunks are answered later, e.g. written into the caller's buffer
+            threading.Timer(0.2, future.set_result, args=(chunk,)).start()
+        futures.append(future)
+        return future
+
+    with pytest.raises(ChunkTransferError):
+        run_chunks(4, submit, max_parallel=3)
+    # No new chunk is submitted, and the failure is raised once the chunks in flight are done
+    assert len(futures) == 3 and all(f.done() for f in futures)